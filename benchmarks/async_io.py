@@ -0,0 +1,37 @@
+""" compare I/O-bound tasks run as threads and as coroutines
+
+    Usage: python benchmarks/async_io.py [tasks] [wait_ms]
+
+    Every task waits `wait_ms` (standing in for an HTTP or database call) after
+    a shared setup task; the same workload is registered once with blocking
+    functions on 8 worker threads and once with coroutine functions.
+"""
+import sys
+import time
+import asyncio
+from functools import partial
+from threaded_order import Scheduler
+
+def blocking(seconds):
+    time.sleep(seconds)
+
+async def non_blocking(seconds):
+    await asyncio.sleep(seconds)
+
+def run(function, count, seconds):
+    scheduler = Scheduler(workers=8, store_results=False)
+    scheduler.register(lambda: None, 'setup')
+    scheduler.register_many((f'call_{index:05}', partial(function, seconds), ['setup'], False)
+                            for index in range(count))
+    return scheduler.start()['duration']
+
+def main(count, wait_ms):
+    seconds = wait_ms / 1000
+    threads = run(blocking, count, seconds)
+    coroutines = run(non_blocking, count, seconds)
+    print(f'{count} tasks waiting {wait_ms}ms: threads {threads:.2f}s, '
+          f'coroutines {coroutines:.2f}s ({threads / coroutines:.0f}x)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 100)
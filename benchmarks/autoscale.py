@@ -0,0 +1,43 @@
+""" compare fixed worker counts with autoscaling on an I/O phase followed by a CPU phase
+
+    Usage: python benchmarks/autoscale.py [waits] [loops]
+
+    `waits` blocking 50 ms waits (standing in for HTTP calls) are followed, through
+    a tag dependency, by `loops` pure-Python loops. A few workers leave the I/O
+    phase crawling, many workers oversubscribe the CPU phase; autoscale=(1, 64)
+    starts at 2 workers and resizes as it goes. Each autoscaling decision is listed.
+"""
+import sys
+import time
+from functools import partial
+from threaded_order import Scheduler
+
+def wait(seconds):
+    time.sleep(seconds)
+
+def spin(iterations):
+    total = 0
+    for index in range(iterations):
+        total += index * index % 7
+    return total
+
+def run(waits, loops, workers, autoscale=None):
+    scheduler = Scheduler(workers=workers, autoscale=autoscale, store_results=False)
+    scheduler.register_many((f'wait_{index:04}', partial(wait, 0.05), [], False, {'tags': 'io'})
+                            for index in range(waits))
+    scheduler.register_many((f'spin_{index:03}', partial(spin, 500_000), [], False,
+                             {'after_tags': 'io'}) for index in range(loops))
+    return scheduler.start()
+
+def main(waits, loops):
+    print(f'{waits} waits of 50 ms, then {loops} CPU loops')
+    for workers in (2, 64):
+        print(f'{workers:>3} workers: {run(waits, loops, workers)["duration"]:.2f}s')
+    summary = run(waits, loops, 2, autoscale=(1, 64))
+    print(f"autoscale:  {summary['duration']:.2f}s")
+    for seconds, slots, reason in summary['autoscale']:
+        print(f'  {seconds:6.2f}s -> {slots:>2} workers: {reason}')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 600,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 20)
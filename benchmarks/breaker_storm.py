@@ -0,0 +1,41 @@
+""" compare a run without and with a circuit breaker while a shared service is down
+
+    Usage: python benchmarks/breaker_storm.py [tasks] [workers]
+
+    Half of the tasks are tagged db and each of them waits 200 ms for a database
+    that is down before failing with ConnectionError; the other half take 20 ms
+    and pass. The first run lets every db task fail on its own; the second sets
+    breaker=(5, 30), so once five db tasks failed within 30 seconds the rest are
+    skipped with CircuitOpenError without running.
+"""
+import sys
+import time
+from threaded_order import Scheduler
+
+def query():
+    time.sleep(0.2)
+    raise ConnectionError('connection to database timed out')
+
+def compute():
+    time.sleep(0.02)
+
+def run(count, workers, breaker):
+    scheduler = Scheduler(workers=workers, store_results=False, breaker=breaker)
+    for index in range(count):
+        if index % 2:
+            scheduler.register(compute, f'task_{index:04}')
+        else:
+            scheduler.register(query, f'task_{index:04}', tags='db')
+    return scheduler.start()
+
+def main(count, workers):
+    print(f'{count} tasks, half of them waiting 200 ms on a database that is down, '
+          f'{workers} workers')
+    for label, breaker in (('no breaker', None), ('breaker=(5, 30)', (5, 30))):
+        summary = run(count, workers, breaker)
+        print(f'{label:>15}: {summary["duration"]:.2f}s, {len(summary["passed"])} passed, '
+              f'{len(summary["failed"])} failed, {len(summary["skipped"])} skipped')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
@@ -0,0 +1,26 @@
+""" measure scheduler dispatch latency on a deep chain of short tasks
+
+    Usage: python benchmarks/chain_latency.py [steps] [task_ms]
+
+    Every task depends on the previous one, so the wall time is the sum of the
+    task durations plus the time the scheduler needs to notice each completion
+    and dispatch the next task.
+"""
+import sys
+import time
+from threaded_order import Scheduler
+
+def main(steps, task_ms):
+    scheduler = Scheduler(workers=4, store_results=False)
+    for index in range(steps):
+        after = [f'step_{index - 1:04}'] if index else None
+        scheduler.register(lambda: time.sleep(task_ms / 1000), f'step_{index:04}', after=after)
+    summary = scheduler.start()
+    ideal = steps * task_ms / 1000
+    overhead = summary['duration'] - ideal
+    print(f'{steps} x {task_ms}ms chain: {summary["duration"]:.2f}s '
+          f'(ideal {ideal:.2f}s, {overhead / steps * 1000:.2f}ms overhead per step)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 5)
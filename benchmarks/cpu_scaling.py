@@ -0,0 +1,56 @@
+""" compare CPU-bound tasks run on the thread and process backends
+
+    Usage: python benchmarks/cpu_scaling.py [tasks] [iterations]
+
+    A setup task fans out to `tasks` pure-Python loops of `iterations` steps
+    each, which a final task joins (the shape of a parameter sweep). The same
+    DAG runs on both backends with 1, 2, 4 and 8 workers, capped at the number
+    of CPUs; the speedup is relative to one worker of the same backend.
+
+    Run it under a regular and a free-threaded interpreter (python3.13 and
+    python3.13t, say) to compare the builds: with the GIL disabled the thread
+    backend scales like the process backend without pickling or worker startup.
+"""
+import os
+import sys
+from functools import partial
+from threaded_order import Scheduler
+from threaded_order.scheduler import gil_enabled
+
+def spin(iterations):
+    total = 0
+    for index in range(iterations):
+        total += index * index % 7
+    return total
+
+def noop():
+    pass
+
+def run(backend, workers, count, iterations):
+    scheduler = Scheduler(workers=workers, backend=backend)
+    scheduler.register(noop, 'setup')
+    names = [f'spin_{index:03}' for index in range(count)]
+    scheduler.register_many((name, partial(spin, iterations), ['setup'], False) for name in names)
+    scheduler.register(noop, 'join', after=names)
+    summary = scheduler.start()
+    assert len(summary['passed']) == count + 2, summary['failures']
+    return summary['duration']
+
+def main(count, iterations):
+    counts = [workers for workers in (1, 2, 4, 8) if workers <= os.cpu_count()]
+    build = 'GIL enabled' if gil_enabled() else 'free-threaded, GIL disabled'
+    print(f'Python {sys.version.split()[0]} ({build}), {count} tasks x {iterations} '
+          f'iterations on {os.cpu_count()} CPUs')
+    print(f"{'workers':>8}" + ''.join(f'{backend:>22}' for backend in ('thread', 'process')))
+    base = {}
+    for workers in counts:
+        row = f'{workers:>8}'
+        for backend in ('thread', 'process'):
+            duration = run(backend, workers, count, iterations)
+            base.setdefault(backend, duration)
+            row += f'{duration:>13.2f}s ({base[backend] / duration:.1f}x)'
+        print(row)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 2_000_000)
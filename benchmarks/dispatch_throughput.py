@@ -0,0 +1,32 @@
+""" compare scheduler-thread and worker dispatch throughput on no-op tasks
+
+    Usage: python benchmarks/dispatch_throughput.py [tasks] [workers]
+
+    The tasks do nothing, so the run time is pure dispatch overhead: releasing
+    dependents, handing ready tasks to threads and collecting results.
+"""
+import sys
+import time
+from threaded_order import Scheduler
+from graph_registration import chain, layered
+
+def run(shape, count, workers, worker_dispatch):
+    scheduler = Scheduler(workers=workers, store_results=False, worker_dispatch=worker_dispatch)
+    scheduler.register_many((name, lambda: None, after, False) for name, after in shape(count))
+    started = time.perf_counter()
+    summary = scheduler.start()
+    elapsed = time.perf_counter() - started
+    assert len(summary['passed']) == count
+    return elapsed
+
+def main(count, workers):
+    print(f"{'shape':<8} {'tasks':>7} {'scheduler':>12} {'worker':>12} {'speedup':>8}")
+    for shape in (chain, layered):
+        central = run(shape, count, workers, worker_dispatch=False)
+        local = run(shape, count, workers, worker_dispatch=True)
+        print(f'{shape.__name__:<8} {count:>7} {count / central:>8.0f}/s {count / local:>8.0f}/s '
+              f'{central / local:>7.1f}x')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
@@ -0,0 +1,35 @@
+""" compare a full run with a max_failures run on a workload with failing tasks
+
+    Usage: python benchmarks/fail_fast.py [tasks] [workers]
+
+    Every task takes 50 ms and one in forty fails. The first run finishes the
+    whole DAG; the second sets max_failures=3, so no task starts after the third
+    failure, the running tasks drain and the rest are skipped with
+    MaxFailuresError.
+"""
+import sys
+import time
+from functools import partial
+from threaded_order import Scheduler
+
+def task(failing):
+    time.sleep(0.05)
+    if failing:
+        raise RuntimeError('broken')
+
+def run(count, workers, max_failures):
+    scheduler = Scheduler(workers=workers, store_results=False, max_failures=max_failures)
+    scheduler.register_many((f'task_{index:04}', partial(task, index % 40 == 39), [], False, {})
+                            for index in range(count))
+    return scheduler.start()
+
+def main(count, workers):
+    print(f'{count} tasks of 50 ms, one in forty failing, {workers} workers')
+    for label, max_failures in (('full run', None), ('max_failures=3', 3)):
+        summary = run(count, workers, max_failures)
+        print(f'{label:>14}: {summary["duration"]:.2f}s, {len(summary["passed"])} passed, '
+              f'{len(summary["failed"])} failed, {len(summary["skipped"])} skipped')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
@@ -0,0 +1,33 @@
+""" measure the cost of draining a DAGraph the way the Scheduler does
+
+    Usage: python benchmarks/graph_drain.py [max_nodes]
+
+    Repeatedly asks for candidates for a fixed number of worker slots and
+    removes them as if they completed, reporting the time per node.
+"""
+import sys
+import time
+from threaded_order.graph import DAGraph
+from graph_registration import layered
+
+def drain(graph, workers=8):
+    active = []
+    while not graph.is_empty():
+        active.extend(graph.get_candidates(active, workers - len(active)))
+        graph.remove(active.pop(0))
+
+def main(max_nodes):
+    print(f"{'nodes':>8} {'seconds':>9} {'us/node':>8}")
+    count = 12_500
+    while count <= max_nodes:
+        graph = DAGraph()
+        for name, after in layered(count):
+            graph.add(name, after=after)
+        started = time.perf_counter()
+        drain(graph)
+        elapsed = time.perf_counter() - started
+        print(f'{count:>8} {elapsed:>9.3f} {elapsed / count * 1e6:>8.2f}')
+        count *= 2
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
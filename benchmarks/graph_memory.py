@@ -0,0 +1,50 @@
+""" compare memory use and throughput of DAGraph and CompactDAGraph
+
+    Usage: python benchmarks/graph_memory.py [nodes]
+
+    Builds the same layered graph (three dependencies per node) with each
+    backend, reports the memory held by the graph itself (node names are
+    allocated up front and excluded) and the time to register and drain it.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from threaded_order.graph import DAGraph, CompactDAGraph
+from graph_registration import layered
+from graph_drain import drain
+
+def build(graph_class, records):
+    graph = graph_class()
+    for name, after in records:
+        graph.add(name, after=after)
+    return graph
+
+def measure_memory(graph_class, records):
+    gc.collect()
+    tracemalloc.start()
+    graph = build(graph_class, records)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graph
+    return size
+
+def measure_time(graph_class, records):
+    started = time.perf_counter()
+    graph = build(graph_class, records)
+    added = time.perf_counter() - started
+    started = time.perf_counter()
+    drain(graph)
+    return added, time.perf_counter() - started
+
+def main(count):
+    records = list(layered(count))
+    print(f'{count} nodes, {sum(len(after) for _, after in records)} edges')
+    print(f"{'backend':<15} {'MiB':>8} {'add s':>8} {'drain s':>8}")
+    for graph_class in (DAGraph, CompactDAGraph):
+        size = measure_memory(graph_class, records)
+        added, drained = measure_time(graph_class, records)
+        print(f'{graph_class.__name__:<15} {size / 2**20:>8.1f} {added:>8.2f} {drained:>8.2f}')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
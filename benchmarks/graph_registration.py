@@ -0,0 +1,47 @@
+""" measure DAGraph.add registration time as the graph grows
+
+    Usage: python benchmarks/graph_registration.py [max_nodes]
+
+    Registers a deep chain (every node depends on the previous one) and a
+    layered graph (every node depends on three nodes of the previous layer)
+    and reports the time per node; a flat per-node cost means registration
+    scales linearly with the number of nodes.
+"""
+import sys
+import time
+from threaded_order.graph import DAGraph
+
+def chain(count):
+    yield 'n0', []
+    for index in range(1, count):
+        yield f'n{index}', [f'n{index - 1}']
+
+def layered(count, width=100):
+    for index in range(count):
+        if index < width:
+            yield f'n{index}', []
+        else:
+            base = index - index % width - width
+            yield f'n{index}', [f'n{base + (index + k) % width}' for k in range(3)]
+
+def measure(shape, count):
+    graph = DAGraph()
+    started = time.perf_counter()
+    for name, after in shape(count):
+        graph.add(name, after=after)
+    return time.perf_counter() - started
+
+def main(max_nodes):
+    sizes = []
+    count = 12_500
+    while count <= max_nodes:
+        sizes.append(count)
+        count *= 2
+    print(f"{'shape':<8} {'nodes':>8} {'seconds':>9} {'us/node':>8}")
+    for shape in (chain, layered):
+        for count in sizes:
+            elapsed = measure(shape, count)
+            print(f'{shape.__name__:<8} {count:>8} {elapsed:>9.3f} {elapsed / count * 1e6:>8.2f}')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,46 @@
+""" measure hedged re-execution of idempotent tasks on a workload with stragglers
+
+    Usage: python benchmarks/hedging.py [fetches] [runs]
+
+    Each run makes `fetches` fetches of 20-40 ms, one in twenty of which stalls
+    for 1 s the way a dropped connection does. The same runs are made with plain
+    tasks and with idempotent=True. The first runs record the durations the hedges
+    are timed from, so only the runs after hedge_samples are compared.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from functools import partial
+from threaded_order import Scheduler
+from threaded_order.scheduler import hedge_samples
+
+def fetch(rng):
+    time.sleep(1.0 if rng.random() < 0.05 else rng.uniform(0.02, 0.04))
+
+def run(count, idempotent, history_file, rng):
+    scheduler = Scheduler(workers=8, history_file=history_file, store_results=False)
+    scheduler.register_many((f'fetch_{index:03}', partial(fetch, rng), [], False,
+                             {'idempotent': idempotent}) for index in range(count))
+    return scheduler.start()
+
+def main(count, runs):
+    print(f'{count} fetches, 5% stalling for 1 s, 8 workers, {runs} runs')
+    for label, idempotent in (('plain', False), ('hedged', True)):
+        rng = random.Random(1)
+        with tempfile.TemporaryDirectory() as directory:
+            history_file = os.path.join(directory, 'history.json')
+            durations = []
+            hedged = 0
+            for index in range(hedge_samples + runs):
+                summary = run(count, idempotent, history_file, rng)
+                if index >= hedge_samples:
+                    durations.append(summary['duration'])
+                    hedged += len(summary.get('hedged', ()))
+        print(f'{label:>7}: {sum(durations) / len(durations):.2f}s per run, '
+              f'worst {max(durations):.2f}s, {hedged} hedged copies')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,86 @@
+""" compare the makespan of the built-in scheduling policies
+
+    Usage: python benchmarks/makespan.py [workers]
+
+    Simulates the scheduler on two DAGs with known task durations (as the
+    history file would provide them): the examples/test_dag.py structure with
+    durations drawn like its tasks (1-4s, several seeds), and a skewed DAG
+    whose long chain sorts after many short independent tasks.
+"""
+import ast
+import sys
+import heapq
+import random
+from pathlib import Path
+from threaded_order.graph import DAGraph
+from threaded_order.policy import get_policy, policies
+
+EXAMPLE = Path(__file__).resolve().parent.parent / 'examples' / 'test_dag.py'
+
+def example_records():
+    """ return (name, after) for every @mark function of examples/test_dag.py
+    """
+    records = []
+    for node in ast.parse(EXAMPLE.read_text()).body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call) and getattr(decorator.func, 'id', '') == 'mark':
+                after = [ast.literal_eval(keyword.value)
+                         for keyword in decorator.keywords if keyword.arg == 'after']
+                records.append((node.name, after[0] if after else []))
+    return records
+
+def skewed_records():
+    """ 40 one-second tasks named ahead of a ten-step chain of two-second tasks
+    """
+    records = [(f'a_{index:02}', []) for index in range(40)]
+    records += [(f'z_{index}', [f'z_{index - 1}'] if index else []) for index in range(10)]
+    durations = {name: 2.0 if name.startswith('z_') else 1.0 for name, _ in records}
+    return records, durations
+
+class KnownDurations:
+    """ stands in for a History holding exactly the simulated durations
+    """
+    def __init__(self, durations):
+        self._durations = durations
+
+    def duration(self, name, default=None):
+        return self._durations.get(name, default)
+
+    def mean(self, default=None):
+        return sum(self._durations.values()) / len(self._durations)
+
+def simulate(records, durations, workers, policy):
+    """ return the simulated wall time to run `records` on `workers` threads
+    """
+    graph = DAGraph()
+    graph.add_many(records)
+    policy = get_policy(policy)
+    options = {name: {'tags': [], 'after_tags': [], 'priority': None} for name, _ in records}
+    policy.prepare(graph, options, KnownDurations(durations))
+    graph.set_priority(policy.key)
+    now = 0.0
+    running = []
+    while not graph.is_empty():
+        for name in graph.get_candidates((), workers - len(running)):
+            heapq.heappush(running, (now + durations[name], name))
+        now, name = heapq.heappop(running)
+        graph.remove(name)
+    return now
+
+def main(workers):
+    print(f"{'dag':>22}" + ''.join(f'{policy:>16}' for policy in policies))
+    records = example_records()
+    for seed in range(5):
+        rng = random.Random(seed)
+        durations = {name: rng.uniform(1, 4) for name, _ in records}
+        report(f'test_dag.py seed={seed}', records, durations, workers)
+    report('skewed chain', *skewed_records(), workers)
+
+def report(label, records, durations, workers):
+    makespans = [simulate(records, durations, workers, policy) for policy in policies]
+    print(f'{label:>22}' + ''.join(f'{makespan:>15.2f}s' for makespan in makespans))
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
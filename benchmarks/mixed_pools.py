@@ -0,0 +1,52 @@
+""" compare a mixed I/O and CPU DAG on one shared pool and on routed pools
+
+    Usage: python benchmarks/mixed_pools.py [io_tasks] [cpu_tasks]
+
+    After a setup task, `io_tasks` blocking 50 ms waits (standing in for HTTP or
+    database calls) and `cpu_tasks` pure-Python loops run side by side, and a
+    report task joins them. The same DAG runs once with every task on the 8
+    worker threads and once with the waits routed to a 64-thread 'io' pool and
+    the loops to a 'cpu' process pool sized to the number of CPUs.
+"""
+import os
+import sys
+import time
+from functools import partial
+from threaded_order import Scheduler
+
+def wait(seconds):
+    time.sleep(seconds)
+
+def spin(iterations):
+    total = 0
+    for index in range(iterations):
+        total += index * index % 7
+    return total
+
+def noop():
+    pass
+
+def run(io_count, cpu_count, routed):
+    executors = {'io': 'thread:64', 'cpu': f'process:{os.cpu_count()}'} if routed else None
+    scheduler = Scheduler(workers=8, executors=executors)
+    scheduler.register(noop, 'setup')
+    options = {'tags': 'work', 'executor': 'io' if routed else None}
+    scheduler.register_many((f'wait_{index:04}', partial(wait, 0.05), ['setup'], False, options)
+                            for index in range(io_count))
+    options = {'tags': 'work', 'executor': 'cpu' if routed else None}
+    scheduler.register_many((f'spin_{index:02}', partial(spin, 2_000_000), ['setup'], False,
+                             options) for index in range(cpu_count))
+    scheduler.register(noop, 'report', after_tags='work')
+    summary = scheduler.start()
+    assert len(summary['passed']) == io_count + cpu_count + 2, summary['failures']
+    return summary['duration']
+
+def main(io_count, cpu_count):
+    shared = run(io_count, cpu_count, routed=False)
+    routed = run(io_count, cpu_count, routed=True)
+    print(f'{io_count} waits + {cpu_count} loops on {os.cpu_count()} CPUs: one pool '
+          f'{shared:.2f}s, routed pools {routed:.2f}s ({shared / routed:.1f}x)')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
@@ -0,0 +1,30 @@
+""" regression check: fail if per-task scheduler overhead exceeds a budget
+
+    Usage: python benchmarks/overhead.py [tasks] [scheduler_us] [worker_us]
+
+    Runs no-op tasks on 8 workers in both dispatch modes, keeps the best of
+    three runs and exits with status 1 when the time per task exceeds the
+    budget (defaults: 40us with scheduler-thread dispatch, 22us with worker
+    dispatch; measured 20-33us and 9-15us on CPython 3.11, against 47us and
+    29us before the overhead cuts).
+"""
+import sys
+from dispatch_throughput import run
+from graph_registration import layered
+
+def main(count, budgets):
+    failed = False
+    for worker_dispatch, budget in zip((False, True), budgets):
+        elapsed = min(run(layered, count, 8, worker_dispatch) for _ in range(3))
+        per_task = elapsed / count * 1e6
+        mode = 'worker' if worker_dispatch else 'scheduler'
+        verdict = 'ok' if per_task <= budget else 'OVER BUDGET'
+        print(f'{mode:<9} dispatch: {per_task:6.1f}us per task (budget {budget:.0f}us) {verdict}')
+        failed = failed or per_task > budget
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    arguments = sys.argv[1:]
+    sys.exit(main(int(arguments[0]) if arguments else 20_000,
+                  (float(arguments[1]) if len(arguments) > 1 else 40,
+                   float(arguments[2]) if len(arguments) > 2 else 22)))
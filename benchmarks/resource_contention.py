@@ -0,0 +1,43 @@
+""" compare fake dependency chains with resource tokens on a contended workload
+
+    Usage: python benchmarks/resource_contention.py [queries] [workers]
+
+    Every query holds one of 2 database connections for 20-300 ms and feeds a
+    report of 20-300 ms that needs no connection. The first run keeps at most 2
+    queries in flight the old way, by chaining the queries into 2 fixed
+    sequences with after=; the second gives each query resources={'db': 1} and
+    the Scheduler resources={'db': 2}. Utilization is busy time over workers x
+    wall time.
+"""
+import sys
+import time
+import random
+from functools import partial
+from threaded_order import Scheduler
+
+def wait(seconds):
+    time.sleep(seconds)
+
+def run(count, workers, tokens):
+    rng = random.Random(1)
+    durations = [(rng.uniform(0.02, 0.3), rng.uniform(0.02, 0.3)) for _ in range(count)]
+    scheduler = Scheduler(workers=workers, resources={'db': 2} if tokens else None)
+    for index, (query, report) in enumerate(durations):
+        after = [f'query_{index - 2:03}'] if index >= 2 and not tokens else []
+        options = {'resources': {'db': 1}} if tokens else {}
+        scheduler.register_many([
+            (f'query_{index:03}', partial(wait, query), after, False, options),
+            (f'report_{index:03}', partial(wait, report), [f'query_{index:03}'], False)])
+    summary = scheduler.start()
+    busy = sum(query + report for query, report in durations)
+    return summary['duration'], busy / (workers * summary['duration'])
+
+def main(count, workers):
+    print(f'{count} queries on 2 connections, {workers} workers')
+    for label, tokens in (('after= chains', False), ('resource tokens', True)):
+        duration, utilization = run(count, workers, tokens)
+        print(f'{label:>16}: {duration:.2f}s, utilization {utilization:.0%}')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
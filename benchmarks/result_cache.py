@@ -0,0 +1,55 @@
+""" compare a cold run with a warm run of cached tasks, and a run after one change
+
+    Usage: python benchmarks/result_cache.py [tasks] [workers]
+
+    Every task takes 50 ms, is cached and depends on the task before it in its
+    chain of ten; the first task of a chain reads its own seed from the state.
+    The first run fills a fresh cache, the second restores every result from it,
+    and the third changes the seed of one chain, so only that chain runs again.
+"""
+import sys
+import time
+import shutil
+import tempfile
+from functools import partial
+from threaded_order import Scheduler
+
+def first(chain, state):
+    time.sleep(0.05)
+    return state[f'seed_{chain}']
+
+def step(parent, state):
+    time.sleep(0.05)
+    return state['results'][parent] + 1
+
+def run(count, workers, directory, changed=None):
+    state = {}
+    scheduler = Scheduler(workers=workers, state=state, cache_dir=directory)
+    for index in range(count):
+        chain, link = divmod(index, 10)
+        name = f'task_{index:04}'
+        if link:
+            parent = f'task_{index - 1:04}'
+            scheduler.register(partial(step, parent), name, after=[parent], with_state=True,
+                               cache=['version'])
+        else:
+            # the first task of each chain reads its own seed
+            state[f'seed_{chain}'] = 1 if chain == changed else 0
+            scheduler.register(partial(first, chain), name, with_state=True,
+                               cache=[f'seed_{chain}'])
+    return scheduler.start()
+
+def main(count, workers):
+    print(f'{count} cached tasks of 50 ms in chains of ten, {workers} workers')
+    directory = tempfile.mkdtemp()
+    try:
+        for label, changed in (('cold', None), ('warm', None), ('one chain changed', 0)):
+            summary = run(count, workers, directory, changed)
+            print(f'{label:>17}: {summary["duration"]:.2f}s, {summary["cache"]["hits"]} hits, '
+                  f'{summary["cache"]["misses"]} misses')
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 8)
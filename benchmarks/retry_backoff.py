@@ -0,0 +1,58 @@
+""" compare retrying inside a task with the scheduler's retries on a flaky workload
+
+    Usage: python benchmarks/retry_backoff.py [calls] [workers]
+
+    Every call takes 50 ms and one in five fails its first two attempts. The first
+    run retries inside the task, sleeping 0.2 s and then 0.4 s between attempts
+    and holding its worker all along; the second registers the calls with
+    retries=2, backoff=0.2 so a failed attempt waits on the scheduler's timer heap
+    and its worker runs other calls meanwhile.
+"""
+import sys
+import time
+from collections import Counter
+from threaded_order import Scheduler
+
+def call(attempts, name, flaky):
+    attempts[name] += 1
+    time.sleep(0.05)
+    if flaky and attempts[name] <= 2:
+        raise ConnectionError('connection reset')
+
+def call_with_retries(attempts, name, flaky):
+    for attempt in range(3):
+        try:
+            return call(attempts, name, flaky)
+        except ConnectionError:
+            if attempt == 2:
+                raise
+            time.sleep(0.2 * 2 ** attempt)
+
+def task(function, attempts, name, flaky):
+    """ return `function` bound to call `name`, named after it for the scheduler's logs
+    """
+    def bound():
+        return function(attempts, name, flaky)
+    bound.__name__ = f'call_{name:03}'
+    return bound
+
+def run(count, workers, scheduled):
+    attempts = Counter()
+    scheduler = Scheduler(workers=workers, store_results=False)
+    function = call if scheduled else call_with_retries
+    options = {'retries': 2, 'backoff': 0.2} if scheduled else {}
+    scheduler.register_many((f'call_{index:03}', task(function, attempts, index, index % 5 == 0),
+                             [], False, options) for index in range(count))
+    summary = scheduler.start()
+    return summary, sum(attempts.values())
+
+def main(count, workers):
+    print(f'{count} calls of 50 ms, one in five failing twice, {workers} workers')
+    for label, scheduled in (('in-task sleep', False), ('retries=2', True)):
+        summary, attempts = run(count, workers, scheduled)
+        print(f'{label:>13}: {summary["duration"]:.2f}s, {len(summary["passed"])} passed, '
+              f'{len(summary.get("retried", {}))} retried, {attempts} attempts')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 4)
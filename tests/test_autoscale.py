@@ -0,0 +1,99 @@
+import unittest
+from mock import patch
+from threaded_order.autoscale import Autoscaler
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestAutoscaler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.cpu_clock = Clock()
+        self.autoscaler = Autoscaler(1, 16, interval=1.0, cpus=2,
+                                     clock=self.clock, cpu_clock=self.cpu_clock)
+
+    def window(self, done, duration=0.1, cpu=0.0):
+        """ finish `done` tasks over the next second, using `cpu` seconds of CPU
+        """
+        self.clock.now += 1.0
+        self.cpu_clock.now += cpu
+        for _ in range(done):
+            self.autoscaler.task_done(duration)
+
+    @patch('threaded_order.autoscale.available_cpus', return_value=3)
+    def test_init_When_NoCpus(self, *patches):
+        # saturation is measured against the CPUs the process may use
+        self.assertEqual(Autoscaler(1, 4)._cpus, 3)
+
+    def test_init_ValueError(self, *patches):
+        with self.assertRaises(ValueError):
+            Autoscaler(0, 4)
+        with self.assertRaises(ValueError):
+            Autoscaler(4, 2)
+
+    def test_clamp(self, *patches):
+        self.assertEqual(self.autoscaler.clamp(0), 1)
+        self.assertEqual(self.autoscaler.clamp(40), 16)
+
+    def test_update_When_TooSoonOrNothingDone(self, *patches):
+        self.clock.now = 0.5
+        self.autoscaler.task_done(0.1)
+        self.assertEqual(self.autoscaler.update(4, 10), (4, None))
+        self.clock.now = 5.0
+        self.autoscaler = Autoscaler(1, 16, clock=self.clock, cpu_clock=self.cpu_clock)
+        self.clock.now = 10.0
+        self.assertEqual(self.autoscaler.update(4, 10), (4, None))
+
+    def test_update_When_Backlog(self, *patches):
+        self.window(10)
+        slots, reason = self.autoscaler.update(2, 50)
+        self.assertEqual(slots, 4)
+        self.assertEqual(reason, '50 ready tasks waiting at 10.0 tasks/s')
+        self.window(20)
+        self.assertEqual(self.autoscaler.update(4, 50)[0], 8)
+        # no ready tasks: hold
+        self.window(40)
+        self.assertEqual(self.autoscaler.update(8, 0), (8, None))
+        self.assertEqual([slots for _, slots, _ in self.autoscaler.decisions], [4, 8])
+
+    def test_update_When_NoGain(self, *patches):
+        self.window(10)
+        self.assertEqual(self.autoscaler.update(4, 50)[0], 8)
+        self.window(10)
+        slots, reason = self.autoscaler.update(8, 50)
+        self.assertEqual(slots, 4)
+        self.assertIn('did not improve', reason)
+        # holds before growing again, then grows by a quarter
+        for _ in range(3):
+            self.window(10)
+            self.assertEqual(self.autoscaler.update(4, 50), (4, None))
+        self.window(10)
+        self.assertEqual(self.autoscaler.update(4, 50)[0], 5)
+
+    def test_update_When_CpuSaturated(self, *patches):
+        self.window(10, cpu=1.9)
+        slots, reason = self.autoscaler.update(8, 50)
+        self.assertEqual(slots, 6)
+        self.assertEqual(reason, 'CPU saturated at 95%')
+        self.window(10, cpu=2.0)
+        self.assertEqual(self.autoscaler.update(1, 50), (1, None))
+
+    def test_update_When_Slower(self, *patches):
+        self.window(10, duration=0.1)
+        self.autoscaler.update(8, 0)
+        self.window(10, duration=0.2)
+        slots, reason = self.autoscaler.update(8, 0)
+        self.assertEqual(slots, 6)
+        self.assertEqual(reason, 'mean task time up from 0.100s to 0.200s')
+
+    def test_start(self, *patches):
+        self.window(10)
+        self.autoscaler.update(2, 50)
+        self.autoscaler.start()
+        self.assertEqual(self.autoscaler.decisions, [])
@@ -0,0 +1,83 @@
+import unittest
+from threaded_order.breaker import CircuitBreaker
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.breaker = CircuitBreaker(3, window=10, probe_after=5, clock=self.clock)
+
+    def fail(self, name, tags=('db',), error_type='ConnectionError'):
+        return self.breaker.record(name, list(tags), False, error_type)
+
+    def test_init_ValueError(self, *patches):
+        for args in ((0,), (1, 0), (1, 1, -1)):
+            with self.assertRaises(ValueError):
+                CircuitBreaker(*args)
+
+    def test_record_When_FailuresWithinWindow(self, *patches):
+        self.assertEqual(self.fail('task1'), [])
+        self.assertEqual(self.fail('task2'), [])
+        self.assertIsNone(self.breaker.blocked_by('task4', ['db']))
+        self.assertEqual(self.fail('task3', tags=('db', 'api')), ['db'])
+        self.assertEqual(self.breaker.blocked_by('task4', ['api', 'db']), 'db')
+        self.assertIsNone(self.breaker.blocked_by('task5', ['api']))
+        self.assertIsNone(self.breaker.blocked_by('task6', None))
+        self.assertEqual(self.breaker.trips, {'db': 1})
+
+    def test_record_When_FailuresOutsideWindow(self, *patches):
+        self.fail('task1')
+        self.fail('task2')
+        self.clock.now = 10
+        self.assertEqual(self.fail('task3'), [])
+        self.assertEqual(self.breaker.record('task4', ['db'], True), [])
+        self.assertFalse(self.breaker.is_open('db'))
+
+    def test_record_When_ErrorTypes(self, *patches):
+        breaker = CircuitBreaker(1, error_types=['TimeoutError'])
+        self.assertEqual(breaker.record('task1', ['db'], False, 'ValueError'), [])
+        self.assertEqual(breaker.record('task2', ['db'], False, 'TimeoutError'), ['db'])
+
+    def test_blocked_by_When_HalfOpen(self, *patches):
+        for name in ('task1', 'task2', 'task3'):
+            self.fail(name)
+        self.clock.now = 4
+        self.assertEqual(self.breaker.blocked_by('task4', ['db']), 'db')
+        self.clock.now = 5
+        # task4 probes the circuit, the others wait for its outcome
+        self.assertIsNone(self.breaker.blocked_by('task4', ['db']))
+        self.assertIsNone(self.breaker.blocked_by('task4', ['db']))
+        self.assertEqual(self.breaker.blocked_by('task5', ['db']), 'db')
+        # a task that started before the circuit opened does not decide
+        self.assertEqual(self.breaker.record('task0', ['db'], True), [])
+        self.assertEqual(self.fail('task4'), ['db'])
+        self.assertEqual(self.breaker.blocked_by('task5', ['db']), 'db')
+        self.clock.now = 10
+        self.assertIsNone(self.breaker.blocked_by('task5', ['db']))
+        self.breaker.record('task5', ['db'], True)
+        self.assertFalse(self.breaker.is_open('db'))
+        self.assertIsNone(self.breaker.blocked_by('task6', ['db']))
+        self.assertEqual(self.breaker.trips, {'db': 2})
+
+    def test_blocked_by_When_NoProbe(self, *patches):
+        breaker = CircuitBreaker(1, clock=self.clock)
+        breaker.record('task1', ['db'], False, 'ValueError')
+        self.clock.now = 1000
+        self.assertEqual(breaker.blocked_by('task2', ['db']), 'db')
+
+    def test_start(self, *patches):
+        self.fail('task1')
+        for name in ('task2', 'task3', 'task4'):
+            self.fail(name, tags=('api',))
+        self.breaker.start()
+        self.assertFalse(self.breaker.is_open('api'))
+        self.assertEqual(self.fail('task5'), [])
+        self.assertEqual(self.breaker.trips, {})
@@ -0,0 +1,86 @@
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import unittest
+from functools import partial
+from threaded_order.cache import ResultCache, code_digest, task_key, value_digest
+
+def double(value):
+    return value * 2
+
+def triple(value):
+    return value * 3
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.key_file = os.path.join(self.directory, 'keys', 'cache.key')
+        self.cache = ResultCache(os.path.join(self.directory, 'cache'), max_bytes=1000,
+                                 key_file=self.key_file)
+
+    def test_get_When_Missing(self, *patches):
+        self.assertEqual(self.cache.get('ab' * 32), (False, None))
+
+    def test_put_get(self, *patches):
+        self.assertTrue(self.cache.put('ab' * 32, {'rows': [1, 2]}))
+        self.assertEqual(self.cache.get('ab' * 32), (True, {'rows': [1, 2]}))
+        self.assertTrue(os.path.isfile(self.cache._path('ab' * 32)))
+        self.assertEqual(os.stat(self.key_file).st_mode & 0o777, 0o600)
+
+    def test_put_When_Unpicklable(self, *patches):
+        self.assertFalse(self.cache.put('ab' * 32, threading.Lock()))
+        self.assertEqual(self.cache.get('ab' * 32), (False, None))
+
+    def test_get_When_Unreadable(self, *patches):
+        path = self.cache._path('ab' * 32)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as handle:
+            handle.write(b'not a pickle')
+        self.assertEqual(self.cache.get('ab' * 32), (False, None))
+
+    def test_get_When_Forged(self, *patches):
+        self.cache.put('ab' * 32, 'trusted')
+        path = self.cache._path('ab' * 32)
+        with open(path, 'rb') as handle:
+            signature = handle.read(32)
+        with open(path, 'wb') as handle:
+            handle.write(signature + pickle.dumps('forged'))
+        self.assertEqual(self.cache.get('ab' * 32), (False, None))
+        # an entry signed under another secret does not verify either
+        other = ResultCache(self.cache.directory, key_file=os.path.join(self.directory, 'other'))
+        other.put('cd' * 32, 'foreign')
+        self.assertEqual(self.cache.get('cd' * 32), (False, None))
+        self.assertEqual(other.get('cd' * 32), (True, 'foreign'))
+
+    def test_evict(self, *patches):
+        keys = [f'{index:02}' * 32 for index in range(4)]
+        for age, key in enumerate(keys):
+            self.cache.put(key, b'x' * 400)
+            os.utime(self.cache._path(key), (1000 + age, 1000 + age))
+        # reading the oldest entry makes it the most recently used
+        self.assertTrue(self.cache.get(keys[0])[0])
+        self.assertEqual(self.cache.evict(), 2)
+        self.assertEqual([self.cache.get(key)[0] for key in keys], [True, False, False, True])
+        self.assertEqual(self.cache.evict(), 0)
+
+    def test_code_digest(self, *patches):
+        self.assertEqual(code_digest(double), code_digest(double))
+        self.assertNotEqual(code_digest(double), code_digest(triple))
+        self.assertNotEqual(code_digest(partial(double, 1)), code_digest(partial(double, 2)))
+        self.assertEqual(len(code_digest(len)), 64)
+
+    def test_task_key(self, *patches):
+        key = task_key('code', {'env': 'dev'}, {'a': [1, 2]})
+        self.assertEqual(key, task_key('code', {'env': 'dev'}, {'a': [1, 2]}))
+        self.assertNotEqual(key, task_key('other', {'env': 'dev'}, {'a': [1, 2]}))
+        self.assertNotEqual(key, task_key('code', {'env': 'prod'}, {'a': [1, 2]}))
+        self.assertNotEqual(key, task_key('code', {'env': 'dev'}, {'a': [1, 3]}))
+        self.assertNotEqual(key, task_key('code', {}, {'a': [1, 2]}))
+
+    def test_value_digest_When_Unpicklable(self, *patches):
+        lock = threading.Lock()
+        self.assertEqual(value_digest(lock), value_digest(lock))
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from threaded_order import cpus
+from threaded_order.cpus import (CpuPinner, affinity_cpus, auto_workers, available_cpus,
+                                 cpu_quota, worker_limit)
+
+class TestCpus(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cgroup_file = os.path.join(self.root, 'cgroup')
+
+    def write(self, relative, text):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+
+    def quota(self):
+        return cpu_quota(self.root, self.cgroup_file)
+
+    @patch('threaded_order.cpus.os.sched_getaffinity', create=True, return_value={3, 1})
+    def test_affinity_cpus(self, *patches):
+        self.assertEqual(affinity_cpus(), [1, 3])
+
+    @patch('threaded_order.cpus.os.cpu_count', return_value=2)
+    @patch('threaded_order.cpus.os.sched_getaffinity', create=True, side_effect=AttributeError)
+    def test_affinity_cpus_When_Unsupported(self, *patches):
+        self.assertEqual(affinity_cpus(), [0, 1])
+
+    def test_cpu_quota_When_V2(self, *patches):
+        self.write('cgroup', '0::/app/job\n')
+        self.write('app/job/cpu.max', 'max 100000\n')
+        self.write('app/cpu.max', '250000 100000\n')
+        self.write('cpu.max', '400000 100000\n')
+        self.assertEqual(self.quota(), 2.5)
+
+    def test_cpu_quota_When_V1(self, *patches):
+        self.write('cgroup', '4:memory:/job\n3:cpu,cpuacct:/job\n')
+        self.write('cpu,cpuacct/job/cpu.cfs_quota_us', '150000\n')
+        self.write('cpu,cpuacct/job/cpu.cfs_period_us', '100000\n')
+        self.assertEqual(self.quota(), 1.5)
+        self.write('cpu,cpuacct/job/cpu.cfs_quota_us', '-1\n')
+        self.assertIsNone(self.quota())
+
+    def test_cpu_quota_When_NoCgroup(self, *patches):
+        self.assertIsNone(self.quota())
+        self.write('cpu.max', '50000 100000\n')
+        self.assertEqual(self.quota(), 0.5)
+
+    @patch('threaded_order.cpus.cpu_quota')
+    @patch('threaded_order.cpus.affinity_cpus', return_value=list(range(8)))
+    def test_available_cpus(self, affinity_cpus_patch, cpu_quota_patch, *patches):
+        for quota, expected in ((None, 8), (2.5, 3), (16, 8), (0.5, 1)):
+            cpu_quota_patch.return_value = quota
+            self.assertEqual(available_cpus(), expected)
+
+    @patch('threaded_order.cpus.available_cpus', return_value=4)
+    def test_worker_limit(self, *patches):
+        self.assertEqual(worker_limit(), 8)
+        self.assertEqual(worker_limit('process'), 4)
+        self.assertEqual(worker_limit(cpus=64), 32)
+
+    @patch('threaded_order.cpus.cpu_quota', return_value=2)
+    @patch('threaded_order.cpus.affinity_cpus', return_value=list(range(8)))
+    def test_auto_workers(self, *patches):
+        self.assertEqual(auto_workers(100), (6, '2 usable CPUs (8 in affinity, 2 CPU quota), '
+                                                'thread limit 6, DAG at most 100 tasks wide'))
+        self.assertEqual(auto_workers(100, 'process')[0], 2)
+        self.assertEqual(auto_workers(3)[0], 3)
+        self.assertEqual(auto_workers(0)[0], 1)
+
+    @patch('threaded_order.cpus.os.sched_setaffinity', create=True)
+    def test_CpuPinner(self, sched_setaffinity_patch, *patches):
+        pinner = CpuPinner([2, 5])
+        for _ in range(3):
+            pinner()
+        self.assertEqual([call.args for call in sched_setaffinity_patch.call_args_list],
+                         [(0, {2}), (0, {5}), (0, {2})])
+        sched_setaffinity_patch.side_effect = OSError
+        pinner()
+
+    def test_cgroup_dirs(self, *patches):
+        self.write('cgroup', '0::/a/b\n')
+        self.assertEqual(cpus._cgroup_dirs('/cg', self.cgroup_file),
+                         ['/cg/a/b', '/cg/a', '/cg'])
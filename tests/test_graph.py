@@ -1,12 +1,14 @@
 import unittest
 from mock import patch
 from mock import Mock
-from threaded_order.graph import DAGraph, log_candidates
+from threaded_order.graph import DAGraph, CompactDAGraph, log_candidates
 
 class TestDAGraph(unittest.TestCase):
 
+    graph_class = DAGraph
+
     def setUp(self):
-        self.graph = DAGraph()
+        self.graph = self.graph_class()
         self.graph.add('a')
         self.graph.add('b')
         self.graph.add('c', after=['a'])
@@ -22,11 +24,85 @@ class TestDAGraph(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.graph.add('g', after=['h'])
 
-    @patch('threaded_order.graph.DAGraph._has_cycle', return_value=True)
+    @patch('threaded_order.graph.DAGraph._creates_cycle', return_value=True)
     def test_add_Should_RaiseValueError_When_CreatesCycle(self, *patches):
         with self.assertRaises(ValueError) as error:
             self.graph.add('g', after=['f'])
         self.assertEqual(str(error.exception), 'adding g will create a cycle')
+        self.assertNotIn('g', self.graph.nodes())
+        self.assertNotIn('g', self.graph.children_of('f'))
+
+    def test_add_When_DeepChain(self, *patches):
+        g = self.graph_class()
+        g.add('n0')
+        for index in range(1, 5000):
+            g.add(f'n{index}', after=[f'n{index - 1}'])
+        self.assertEqual(g.parents_of('n4999'), ['n4998'])
+
+    def test_add_many_When_ForwardReferences(self, *patches):
+        self.graph.add_many([('i', ['h', 'f']), ('h', ['g']), ('g', ['a'])])
+        self.assertEqual(self.graph.original_parents_of('i'), ['h', 'f'])
+        self.assertEqual(self.graph.children_of('g'), ['h'])
+        self.assertEqual(len(self.graph), 9)
+        self.assertEqual(self.graph.get_candidates([], 10), ['a', 'b'])
+
+    def test_add_many_Should_ReportAllProblems_When_Invalid(self, *patches):
+        records = [
+            ('a', []),
+            ('g', ['x']),
+            ('h', ['i']),
+            ('i', ['h']),
+            ('j', ['i']),
+            ('k', ['c'])]
+        with self.assertRaises(ValueError) as error:
+            self.graph.add_many(records)
+        self.assertEqual(
+            str(error.exception),
+            "['a'] have already been added; g depends on unknown ['x']; "
+            "adding ['h', 'i'] will create a cycle")
+        self.assertNotIn('k', self.graph.nodes())
+        self.assertEqual(len(self.graph), 6)
+
+    def test_add_many_When_CallerProblems(self, *patches):
+        with self.assertRaises(ValueError) as error:
+            self.graph.add_many([('g', ['a'])], problems=['g is not callable'])
+        self.assertEqual(str(error.exception), 'g is not callable')
+        self.assertNotIn('g', self.graph.nodes())
+
+    def test_reduce(self, *patches):
+        # g -> a and g -> d are implied by g -> f (f -> d -> a)
+        self.graph.add('g', after=['a', 'f', 'd', 'b'])
+        self.assertEqual(self.graph.reduce(), 3)
+        self.assertEqual(self.graph.original_parents_of('g'), ['a', 'f', 'd', 'b'])
+        self.assertEqual(self.graph.dependencies_of('g'), ['f'])
+        self.assertEqual(self.graph.parents_of('g'), ['f'])
+        self.assertEqual(sorted(self.graph.children_of('a')), ['c', 'd'])
+        self.assertEqual(self.graph.children_of('b'), ['e'])
+        self.assertEqual(self.graph.reduce(), 0)
+        for name in ['a', 'b', 'c', 'd', 'e']:
+            self.graph.remove(name)
+        self.assertEqual(self.graph.get_candidates([], 10), ['f'])
+        self.graph.remove('f')
+        self.assertEqual(self.graph.get_candidates([], 10), ['g'])
+
+    def test_add_When_Barrier(self, *patches):
+        self.graph.add('tag:x', after=['c', 'd'], barrier=True)
+        self.graph.add_many([('tag:y', ['e']), ('g', ['tag:y'])], barriers=['tag:y'])
+        self.assertTrue(self.graph.is_barrier('tag:x'))
+        self.assertTrue(self.graph.is_barrier('tag:y'))
+        self.assertFalse(self.graph.is_barrier('g'))
+        self.assertEqual(self.graph.barriers(), ['tag:x', 'tag:y'])
+
+    def test_descendants_of_and_prune(self, *patches):
+        self.assertEqual(self.graph.descendants_of('a'), ['c', 'd', 'f'])
+        self.assertEqual(self.graph.descendants_of('f'), [])
+        self.graph.prune(['d', 'f'])
+        self.assertEqual(sorted(self.graph.nodes()), ['a', 'b', 'c', 'e'])
+        self.graph.remove('b')
+        self.graph.remove('e')
+        self.assertEqual(self.graph.get_candidates([], 10), ['a'])
+        self.graph.remove('a')
+        self.assertEqual(self.graph.get_candidates([], 10), ['c'])
 
     def test_remove(self, *patches):
         self.assertIn('c', self.graph.children_of('a'))
@@ -39,10 +115,26 @@ class TestDAGraph(unittest.TestCase):
 
     def test_remove_partial(self, *patches):
         g = DAGraph()
-        g._children['a'] = ('b',)
-        g._parents['b'] = []
+        g.add('a')
+        g._children['a'] = {'b'}
         g.remove('a')
         self.assertNotIn('a', g.nodes())
+        self.assertNotIn('b', g.nodes())
+
+    def test_remove_Should_QueueChildren_When_LastDependencyRemoved(self, *patches):
+        self.assertEqual(self.graph.get_candidates([], 10), ['a', 'b'])
+        self.graph.remove('b')
+        self.assertEqual(self.graph.get_candidates([], 10), ['e'])
+        self.graph.remove('e')
+        # f still waits on d
+        self.assertEqual(self.graph.get_candidates([], 10), [])
+        self.assertEqual(self.graph.parents_of('f'), ['d'])
+        self.graph.remove('a')
+        self.assertEqual(self.graph.get_candidates([], 1), ['c'])
+        self.assertEqual(self.graph.get_candidates([], 1), ['d'])
+        self.graph.remove('d')
+        self.assertEqual(self.graph.get_candidates([], 10), ['f'])
+        self.assertEqual(self.graph.original_parents_of('f'), ['d', 'e'])
 
     def test_is_empty(self, *patches):
         self.assertFalse(self.graph.is_empty())
@@ -67,6 +159,63 @@ class TestDAGraph(unittest.TestCase):
         self.assertEqual(candidates, ['b'])
         candidates = self.graph.get_candidates(['a', 'b'], 4, sort=True)
         self.assertEqual(candidates, [])
+        # active nodes stay queued; handed out nodes are not offered again
+        candidates = self.graph.get_candidates([], 4)
+        self.assertEqual(candidates, ['a'])
+        self.assertEqual(set(self.graph.ready()), {'a', 'b'})
+
+    def test_longest_paths(self, *patches):
+        weights = {'a': 1, 'b': 5, 'c': 1, 'd': 2, 'e': 1, 'f': 3}
+        paths = self.graph.longest_paths(weights.get)
+        self.assertEqual(paths, {'a': 6, 'b': 9, 'c': 1, 'd': 5, 'e': 4, 'f': 3})
+        self.graph.remove('b')
+        self.assertEqual(self.graph.longest_paths(weights.get)['e'], 4)
+        self.assertNotIn('b', self.graph.longest_paths(weights.get))
+
+    def test_max_width(self, *patches):
+        # c, d and e never depend on one another
+        self.assertEqual(self.graph.max_width(), 3)
+        # nodes minus the longest chain (a, d, f) plus one
+        self.assertEqual(self.graph.max_width(exact_limit=0), 4)
+        self.graph.remove('a')
+        self.graph.remove('b')
+        self.assertEqual(self.graph.max_width(), 3)
+        self.assertEqual(self.graph_class().max_width(), 0)
+
+    def test_set_priority(self, *patches):
+        # nodes already queued are re-ordered
+        self.graph.set_priority(lambda name: {'a': 2, 'b': 1}.get(name, 0))
+        self.assertEqual(self.graph.get_candidates([], 1), ['b'])
+        self.graph.remove('b')
+        self.assertEqual(self.graph.get_candidates([], 2), ['e', 'a'])
+        self.graph.set_priority()
+        self.graph.remove('a')
+        self.assertEqual(self.graph.get_candidates([], 2), ['c', 'd'])
+
+    def test_set_priority_Should_HoldActiveEntries(self, *patches):
+        self.graph.set_priority(lambda name: -ord(name))
+        self.assertEqual(self.graph.get_candidates(['b'], 1), ['a'])
+        self.assertEqual(self.graph.get_candidates([], 1), ['b'])
+
+    def test_set_lanes(self, *patches):
+        lanes = {'a': 'slow', 'c': 'slow'}
+        self.graph.set_lanes(lanes.get)
+        self.assertEqual(self.graph.get_candidates([], 2), ['b'])
+        self.assertEqual(self.graph.get_candidates([], 2, lane='slow'), ['a'])
+        self.assertEqual(self.graph.get_candidates([], 2, lane='other'), [])
+        self.graph.remove('a')
+        self.graph.remove('b')
+        self.assertEqual(self.graph.get_candidates([], 3), ['d', 'e'])
+        self.assertEqual(self.graph.get_candidates([], 3, lane='slow'), ['c'])
+        self.graph.set_lanes()
+        self.assertEqual(self.graph.get_candidates([], 3, lane='slow'), [])
+
+    def test_requeue(self, *patches):
+        self.assertEqual(self.graph.get_candidates([], 2), ['a', 'b'])
+        self.assertEqual(self.graph.get_candidates([], 2), [])
+        self.graph.requeue('b')
+        self.graph.requeue('c')
+        self.assertEqual(self.graph.get_candidates([], 2), ['b'])
 
     @patch('builtins.print')
     def test_repr(self, *patches):
@@ -94,42 +243,46 @@ class TestDAGraph(unittest.TestCase):
         log_candidates(['a'], 3)
         logger_mock.debug.assert_called_with('requested 3 and found 1 candidate eligible for submission a')
 
-    def test_has_cycle_returns_false_for_acyclic_graph(self):
-        g = DAGraph()
-        # A -> B -> C (meaning: A depends on B, B depends on C)
-        g._parents = {
-            'A': ['B'],
-            'B': ['C'],
-            'C': [],
-        }
-        self.assertFalse(g._has_cycle())
-
-    def test_has_cycle_returns_true_for_simple_cycle(self):
-        g = DAGraph()
-        # A <-> B cycle
-        g._parents = {
-            'A': ['B'],
-            'B': ['A'],
-        }
-        self.assertTrue(g._has_cycle())
-
-    def test_has_cycle_returns_true_for_self_loop(self):
-        g = DAGraph()
-        # A depends on itself
-        g._parents = {
-            'A': ['A'],
-        }
-        self.assertTrue(g._has_cycle())
+    def test_creates_cycle_returns_false_for_new_node(self):
+        self.assertFalse(self.graph._creates_cycle('g', ['f']))
 
-    def test_has_cycle_returns_true_for_cycle_in_subgraph(self):
-        g = DAGraph()
-        # Component 1 (acyclic): X -> Y
-        # Component 2 (cyclic):  A -> B -> C -> A
-        g._parents = {
-            'X': ['Y'],
-            'Y': [],
-            'A': ['B'],
-            'B': ['C'],
-            'C': ['A'],
-        }
-        self.assertTrue(g._has_cycle())
+    def test_creates_cycle_returns_false_for_unrelated_dependency(self):
+        # a already has descendants c, d and f but b is not one of them
+        self.assertFalse(self.graph._creates_cycle('a', ['b']))
+
+    def test_creates_cycle_returns_true_for_self_loop(self):
+        self.assertTrue(self.graph._creates_cycle('a', ['a']))
+
+    def test_creates_cycle_returns_true_for_descendant_dependency(self):
+        # f is a descendant of a (a -> d -> f)
+        self.assertTrue(self.graph._creates_cycle('a', ['f']))
+        self.assertTrue(self.graph._creates_cycle('b', ['e', 'c']))
+
+
+class TestCompactDAGraph(TestDAGraph):
+
+    graph_class = CompactDAGraph
+
+    def test_remove_partial(self, *patches):
+        g = CompactDAGraph()
+        g.add('a')
+        g.add('b', after=['a'])
+        g._indegree[g._ids['b']] = 0
+        g.remove('a')
+        self.assertNotIn('a', g.nodes())
+        self.assertIn('b', g.nodes())
+
+    def test_add_Should_StoreEdgesOnce(self, *patches):
+        self.assertEqual(len(self.graph._parent_ids), 5)
+        self.assertEqual(len(self.graph._edge_child), 5)
+        self.assertEqual(self.graph._parent_ids.typecode, 'i')
+        self.assertEqual(sorted(self.graph.children_of('a')), ['c', 'd'])
+        self.assertEqual(self.graph.original_parents_of('f'), ['d', 'e'])
+        self.assertEqual(self.graph.original_parents_of('x'), [])
+        self.assertEqual(self.graph.children_of('x'), [])
+
+    def test_add_When_NameReusedAfterRemove(self, *patches):
+        self.graph.remove('a')
+        self.graph.add('a')
+        self.assertIn('a', self.graph.nodes())
+        self.assertEqual(len(self.graph), 6)
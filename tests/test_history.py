@@ -0,0 +1,76 @@
+import os
+import json
+import tempfile
+import unittest
+from threaded_order.history import History, default_history_file
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache', 'history.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_init_When_NoPath(self, *patches):
+        cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        try:
+            history = History()
+            history.record('task1', 1.0)
+            history.save()
+            self.assertTrue(os.path.exists(default_history_file))
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(history.path, default_history_file)
+
+    def test_load_When_Missing(self, *patches):
+        history = History(self.path)
+        self.assertEqual(len(history), 0)
+        self.assertIsNone(history.duration('task1'))
+        self.assertEqual(history.mean(default=1.0), 1.0)
+
+    def test_load_When_Unreadable(self, *patches):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as handle:
+            handle.write('{not json')
+        with self.assertLogs('threaded_order.history', level='WARNING'):
+            history = History(self.path)
+        self.assertEqual(len(history), 0)
+
+    def test_record_and_save(self, *patches):
+        history = History(self.path, samples=2)
+        for duration in (1.0, 2.0, 4.0):
+            history.record('task1', duration)
+        history.record('task2', 1.0)
+        history.save()
+        with open(self.path) as handle:
+            self.assertEqual(json.load(handle)['durations'], {'task1': [2.0, 4.0], 'task2': [1.0]})
+        reloaded = History(self.path)
+        self.assertIn('task1', reloaded)
+        self.assertEqual(reloaded.duration('task1'), 3.0)
+        self.assertEqual(reloaded.mean(), 2.0)
+
+    def test_record_outcome(self, *patches):
+        history = History(self.path)
+        history.record_outcome('task1', 'passed')
+        history.record_outcome('task2', 'failed')
+        history.record_outcome('task3', 'skipped')
+        history.save()
+        reloaded = History(self.path)
+        self.assertEqual(reloaded.outcome('task2'), 'failed')
+        self.assertIsNone(reloaded.outcome('task4'))
+        self.assertEqual(reloaded.failed(), ['task2', 'task3'])
+        reloaded.record_outcome('task2', 'passed')
+        self.assertEqual(reloaded.failed(), ['task3'])
+
+    def test_percentile(self, *patches):
+        history = History(self.path)
+        for duration in range(1, 21):
+            history.record('task1', float(duration))
+        self.assertEqual(history.percentile('task1', 0.95), 19.0)
+        self.assertEqual(history.percentile('task1', 0.5), 10.0)
+        self.assertEqual(history.percentile('task1', 0.0), 1.0)
+        self.assertIsNone(history.percentile('task2', 0.95))
+        self.assertEqual(history.percentile('task1', 0.95, default=0.0, minimum=21), 0.0)
@@ -19,6 +19,7 @@ class TestInitModule(unittest.TestCase):
 
         Scheduler = getattr(pkg, 'Scheduler')
         DAGraph = getattr(pkg, 'DAGraph')
+        CompactDAGraph = getattr(pkg, 'CompactDAGraph')
         configure_logging = getattr(pkg, 'configure_logging')
         ThreadProxyLogger = getattr(pkg, 'ThreadProxyLogger')
         dmark = getattr(pkg, 'dmark')
@@ -27,6 +28,7 @@ class TestInitModule(unittest.TestCase):
 
         self.assertEqual(Scheduler.__name__, 'Scheduler')
         self.assertEqual(DAGraph.__name__, 'DAGraph')
+        self.assertEqual(CompactDAGraph.__name__, 'CompactDAGraph')
         self.assertEqual(configure_logging.__name__, 'configure_logging')
         self.assertEqual(ThreadProxyLogger.__name__, 'ThreadProxyLogger')
         self.assertEqual(dmark.__name__, 'dmark')
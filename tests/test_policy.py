@@ -0,0 +1,71 @@
+import unittest
+from mock import Mock
+from threaded_order.graph import DAGraph
+from threaded_order.policy import FailedFirstPolicy, NamePolicy, get_policy, policies
+
+class TestPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [
+            ('tag:slow', ['d_long']),
+            ('a', []), ('b', []), ('d_long', []),
+            ('c', ['b']), ('e', ['tag:slow']), ('f', ['tag:slow'])]
+        # registration order differs from name order
+        self.options = {name: {'tags': [], 'after_tags': [], 'priority': None}
+                        for name in ('d_long', 'b', 'a', 'c', 'e', 'f')}
+        self.options['a']['priority'] = 10
+        self.history = Mock()
+        self.history.mean.return_value = 1.0
+        self.history.duration.side_effect = \
+            lambda name, default: {'a': 0.5, 'b': 2.0, 'd_long': 3.0}.get(name, default)
+
+    def order(self, policy):
+        graph = DAGraph()
+        graph.add_many(self.records, barriers=['tag:slow'])
+        policy = get_policy(policy)
+        policy.prepare(graph, self.options, self.history)
+        graph.set_priority(policy.key)
+        return graph.get_candidates([], 3)
+
+    def test_name(self, *patches):
+        self.assertEqual(self.order(None), ['a', 'b', 'd_long'])
+        self.assertEqual(self.order('name'), ['a', 'b', 'd_long'])
+
+    def test_fifo(self, *patches):
+        self.assertEqual(self.order('fifo'), ['d_long', 'b', 'a'])
+
+    def test_priority(self, *patches):
+        self.assertEqual(self.order('priority'), ['a', 'b', 'd_long'])
+        self.options['a']['priority'] = -1
+        self.assertEqual(self.order('priority'), ['b', 'd_long', 'a'])
+
+    def test_most_dependents(self, *patches):
+        # d_long unlocks e and f through the barrier, b unlocks c
+        self.assertEqual(self.order('most-dependents'), ['d_long', 'b', 'a'])
+
+    def test_shortest_first(self, *patches):
+        self.assertEqual(self.order('shortest-first'), ['a', 'b', 'd_long'])
+
+    def test_critical_path(self, *patches):
+        # d_long -> e/f weighs 4.0, b -> c weighs 3.0, a 0.5
+        self.assertEqual(self.order('critical-path'), ['d_long', 'b', 'a'])
+
+    def test_failed_first(self, *patches):
+        self.history.failed.return_value = ['c', 'gone']
+        # c waits for b, which goes first; the others keep the base order
+        self.assertEqual(self.order(FailedFirstPolicy()), ['b', 'a', 'd_long'])
+        self.assertEqual(self.order(FailedFirstPolicy('critical-path')), ['b', 'd_long', 'a'])
+        self.history.failed.return_value = ['e']
+        self.assertEqual(self.order(FailedFirstPolicy('fifo')), ['d_long', 'b', 'a'])
+
+    def test_get_policy_When_Object(self, *patches):
+        policy = NamePolicy()
+        self.assertIs(get_policy(policy), policy)
+        self.assertEqual(set(policies), {
+            'name', 'fifo', 'priority', 'most-dependents', 'shortest-first', 'critical-path'})
+
+    def test_get_policy_ValueError(self, *patches):
+        with self.assertRaises(ValueError):
+            get_policy('random')
+        with self.assertRaises(ValueError):
+            get_policy(object())
@@ -0,0 +1,102 @@
+import os
+import sys
+import pickle
+import tempfile
+import unittest
+import functools
+from unittest.mock import patch
+from threaded_order import process
+from threaded_order.process import Outcome, merge, preload, run, snapshot, task_modules
+from threaded_order.scheduler import Scheduler
+
+def square(state):
+    state['squared'] = state['results']['seed'] ** 2
+    state['log'].append('square')
+    return state['squared']
+
+def seed():
+    return 7
+
+def fail():
+    raise ValueError('error')
+
+class TestProcess(unittest.TestCase):
+
+    def test_default_start_method(self, *patches):
+        with patch('threaded_order.process.multiprocessing.get_all_start_methods') as methods_patch:
+            methods_patch.return_value = ['fork', 'spawn', 'forkserver']
+            self.assertEqual(process.default_start_method(), 'forkserver')
+            methods_patch.return_value = ['spawn']
+            self.assertEqual(process.default_start_method(), 'spawn')
+
+    def test_task_modules(self, *patches):
+        modules = task_modules([square, seed, len, lambda: None])
+        self.assertEqual(modules, [(__name__, sys.modules[__name__].__file__)])
+
+    def test_preload_When_NotImportable(self, *patches):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'preloaded_tasks.py')
+            with open(path, 'w') as handle:
+                handle.write('VALUE = 1\n')
+            try:
+                preload([('preloaded_tasks', path), (__name__, __file__)])
+                self.assertEqual(sys.modules['preloaded_tasks'].VALUE, 1)
+            finally:
+                sys.modules.pop('preloaded_tasks', None)
+
+    def test_snapshot(self, *patches):
+        state = {'_state_lock': object(), 'results': {'seed': 7}, 'env': 'dev'}
+        copied = snapshot(state)
+        self.assertEqual(copied, {'results': {'seed': 7}, 'env': 'dev'})
+        state['results']['seed'] = 8
+        self.assertEqual(copied['results'], {'seed': 7})
+
+    def test_run_When_WithState(self, *patches):
+        state = snapshot({'results': {'seed': 7}, 'log': [], 'stale': 1, 'env': 'dev'})
+        outcome = run('square', square, True, state, True)
+        self.assertTrue(outcome.ok)
+        self.assertEqual(outcome.result, 49)
+        self.assertEqual(outcome.updates, {'squared': 49, 'log': ['square']})
+        self.assertEqual(outcome.removed, [])
+
+    def test_run_When_Exception(self, *patches):
+        outcome = run('fail', fail, False, None, True)
+        self.assertEqual(outcome[:4], ('fail', False, 'ValueError', 'error'))
+        self.assertIsNone(outcome.result)
+
+    def test_run_When_NoStoreResult(self, *patches):
+        self.assertIsNone(run('seed', seed, False, None, False).result)
+
+    def test_merge(self, *patches):
+        state = {'a': 1, 'b': 2}
+        merge(state, {'a': 3, 'c': 4}, ['b'])
+        self.assertEqual(state, {'a': 3, 'c': 4})
+
+    def test_start_When_ProcessBackend(self, *patches):
+        s = Scheduler(workers=2, backend='process', state={'log': []})
+        s.register(seed, 'seed')
+        s.register(square, 'square', after=['seed'], with_state=True)
+        s.register(fail, 'fail', after=['seed'])
+        summary = s.start()
+        self.assertEqual(sorted(summary['passed']), ['seed', 'square'])
+        self.assertEqual(summary['failures'], {'fail': {'error_type': 'ValueError', 'error': 'error'}})
+        self.assertEqual(s.state['results'], {'seed': 7, 'square': 49})
+        self.assertEqual(s.state['squared'], 49)
+        self.assertEqual(s.state['log'], ['square'])
+
+    def test_start_When_Unpicklable(self, *patches):
+        s = Scheduler(workers=1, backend='process')
+        s.register(lambda: None, 'task1')
+        summary = s.start()
+        self.assertEqual(summary['failed'], ['task1'])
+        self.assertIn(summary['failures']['task1']['error_type'], ('PicklingError', 'AttributeError'))
+
+    def test_start_When_PartialFails(self, *patches):
+        s = Scheduler(workers=1, backend='process')
+        s.register(functools.partial(fail), 'task1')
+        summary = s.start()
+        self.assertEqual(summary['failures'], {'task1': {'error_type': 'ValueError', 'error': 'error'}})
+
+    def test_outcome(self, *patches):
+        outcome = Outcome('task1', True, None, None, 1, {}, [], 0.1, 'worker')
+        self.assertEqual(pickle.loads(pickle.dumps(outcome)), outcome)
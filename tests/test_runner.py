@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from mock import Mock, patch
+from threaded_order import Scheduler
+from threaded_order.policy import FailedFirstPolicy
+from threaded_order.runner import (_build_scheduler_kwargs, _register_functions,
+                                   _select_last_failed, get_parser)
+
+def function():
+    pass
+
+def marked(name, **meta):
+    return (name, function, dict({'with_state': False}, **meta))
+
+class TestRunner(unittest.TestCase):
+
+    def registered(self, marked_functions, tags_filter=None):
+        scheduler = Mock()
+        _register_functions(scheduler, marked_functions, tags_filter, False)
+        (records,), _ = scheduler.register_many.call_args
+        return {name: (after, options['after_tags']) for name, _, after, _, options in records}
+
+    def test_register_functions_When_UnknownAfterTags(self, *patches):
+        # left for the scheduler to reject, not silently dropped
+        records = self.registered([marked('task1', after_tags=['setpu'])])
+        self.assertEqual(records['task1'], (None, ['setpu']))
+
+    def test_register_functions_When_TagsFilter(self, *patches):
+        records = self.registered([
+            marked('setup', tags=['smoke', 'init']),
+            marked('task1', tags=['smoke'], after=['setup', 'slow'], after_tags=['init', 'db'])],
+            tags_filter=['smoke'])
+        self.assertEqual(records['task1'], (['setup'], ['init']))
+
+    @patch('threaded_order.runner.History')
+    def test_select_last_failed(self, history_patch, *patches):
+        history_patch.return_value.failed.return_value = ['report', 'renamed']
+        marked_functions = [
+            marked('setup', tags=['db']),
+            marked('seed', tags=['db']),
+            marked('fetch', after=['setup']),
+            marked('report', after=['fetch'], after_tags=['db']),
+            marked('other')]
+        selected = _select_last_failed(marked_functions)
+        self.assertEqual([name for name, _, _ in selected], ['setup', 'seed', 'fetch', 'report'])
+
+    @patch('threaded_order.runner.History')
+    def test_select_last_failed_When_NoneFailed(self, history_patch, *patches):
+        marked_functions = [marked('setup'), marked('report', after=['setup'])]
+        # a missing or empty history, or one naming only functions that no longer exist
+        for failed in ([], ['renamed']):
+            history_patch.return_value.failed.return_value = failed
+            self.assertEqual(_select_last_failed(marked_functions), marked_functions)
+
+    def test_build_scheduler_kwargs_When_FailedFirst(self, *patches):
+        args = get_parser().parse_args(['module.py', '--failed-first', '--policy', 'fifo'])
+        kwargs = _build_scheduler_kwargs(args, {}, True, Mock())
+        self.assertIsInstance(kwargs['policy'], FailedFirstPolicy)
+        self.assertEqual(type(kwargs['policy'].policy).__name__, 'FifoPolicy')
+        args = get_parser().parse_args(['module.py'])
+        self.assertEqual(_build_scheduler_kwargs(args, {}, True, Mock())['policy'], 'name')
+
+    def test_failed_first(self, *patches):
+        with tempfile.TemporaryDirectory() as directory:
+            history_file = os.path.join(directory, 'history.json')
+
+            def flaky():
+                raise ValueError('broken')
+
+            for policy in (None, FailedFirstPolicy()):
+                started = []
+                s = Scheduler(workers=1, policy=policy, history_file=history_file)
+                s.on_task_start(started.append)
+                s.register(Mock(), 'a_first')
+                s.register(Mock(), 'b_setup')
+                s.register(flaky, 'c_flaky', after=['b_setup'])
+                s.start()
+                if policy is None:
+                    self.assertEqual(started, ['a_first', 'b_setup', 'c_flaky'])
+                else:
+                    # c_flaky failed last time, so it and b_setup go first
+                    self.assertEqual(started, ['b_setup', 'c_flaky', 'a_first'])
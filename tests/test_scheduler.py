@@ -1,12 +1,22 @@
 import os
 import sys
 import queue
+import shutil
+import tempfile
 import unittest
+import asyncio
 import argparse
+import threading
+import time
 from unittest.mock import patch
 from unittest.mock import call
 from unittest.mock import Mock
-from threaded_order.scheduler import Scheduler, dmark, mark
+from concurrent.futures import ThreadPoolExecutor
+from threaded_order.autoscale import Autoscaler
+from threaded_order.breaker import CircuitBreaker
+from threaded_order.cache import ResultCache
+from threaded_order.process import Outcome
+from threaded_order.scheduler import Scheduler, dmark, mark, gil_enabled, _default_workers
 
 class TestScheduler(unittest.TestCase):
 
@@ -15,6 +25,21 @@ class TestScheduler(unittest.TestCase):
         Scheduler(setup_logging=True)
         configure_logging_patch.assert_called_once()
 
+    def test_gil_enabled(self, *patches):
+        with patch.object(sys, '_is_gil_enabled', Mock(return_value=False), create=True):
+            self.assertFalse(gil_enabled())
+        with patch.object(sys, '_is_gil_enabled', None, create=True):
+            self.assertTrue(gil_enabled())
+
+    @patch('threaded_order.scheduler.available_cpus')
+    @patch('threaded_order.scheduler.gil_enabled')
+    def test_default_workers(self, gil_enabled_patch, available_cpus_patch, *patches):
+        for gil, cpus, expected in ((True, 64, 8), (True, 4, 4), (False, 16, 16),
+                                    (False, 64, 32), (True, 1, 1)):
+            gil_enabled_patch.return_value = gil
+            available_cpus_patch.return_value = cpus
+            self.assertEqual(_default_workers(), expected)
+
     def test_register_ValueError(self, *patches):
         s = Scheduler(workers=2)
         with self.assertRaises(ValueError):
@@ -30,13 +55,89 @@ class TestScheduler(unittest.TestCase):
         self.assertIn('task1', s._callables)
         self.assertIn('task1', s.graph.nodes())
 
+    def test_init_compact_graph(self, *patches):
+        s = Scheduler(compact_graph=True)
+        self.assertEqual(type(s.graph).__name__, 'CompactDAGraph')
+
+    def test_register_many(self, *patches):
+        s = Scheduler(workers=2)
+        task1, task2 = Mock(), Mock()
+        s.register_many([('task2', task2, ['task1'], True), ('task1', task1, None, False)])
+        self.assertEqual(s._callables, {'task1': (task1, False), 'task2': (task2, True)})
+        self.assertEqual(s.graph.original_parents_of('task2'), ['task1'])
+
+    def test_register_many_ValueError(self, *patches):
+        s = Scheduler(workers=2)
+        with self.assertRaises(ValueError) as error:
+            s.register_many([
+                ('task1', 'not_callable', None, False),
+                ('task2', Mock(), ['x'], False),
+                ('task3', Mock(), None, False, {'executor': 'gpu', 'after_tags': 'setup'})])
+        self.assertEqual(
+            str(error.exception),
+            "objects must be callable: ['task1']; task3 uses unknown executor gpu; "
+            "task3 depends on unknown tag setup; task2 depends on unknown ['x']")
+        self.assertEqual(len(s.graph), 0)
+        self.assertEqual(s._callables, {})
+
+    def test_register_When_AfterTags(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'setup1', tags='setup')
+        s.register(Mock(), 'setup2', tags=['setup', 'db'])
+        s.register(Mock(), 'task1', after_tags='setup')
+        s.register(Mock(), 'task2', after=['task1'], after_tags=['setup'])
+        self.assertEqual(s.graph.barriers(), ['tag:setup'])
+        self.assertEqual(s.graph.original_parents_of('tag:setup'), ['setup1', 'setup2'])
+        self.assertEqual(s.graph.original_parents_of('task2'), ['task1', 'tag:setup'])
+        self.assertEqual(s._tags, {'setup': ['setup1', 'setup2'], 'db': ['setup2']})
+
+    def test_register_many_When_AfterTagsForwardReference(self, *patches):
+        s = Scheduler(workers=2)
+        s.register_many([
+            ('task1', Mock(), None, False, {'after_tags': 'setup'}),
+            ('setup1', Mock(), None, False, {'tags': 'setup'})])
+        self.assertEqual(s.graph.original_parents_of('task1'), ['tag:setup'])
+
+    def test_register_ValueError_When_TagSealedOrUnknown(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'setup1', tags='setup')
+        with self.assertRaises(ValueError) as error:
+            s.register(Mock(), 'task1', after_tags='teardown')
+        self.assertEqual(str(error.exception), 'task1 depends on unknown tag teardown')
+        s.register(Mock(), 'task1', after_tags='setup')
+        with self.assertRaises(ValueError) as error:
+            s.register(Mock(), 'setup2', tags='setup')
+        self.assertEqual(
+            str(error.exception),
+            'setup2 cannot be tagged setup after tasks depending on tag setup were registered')
+        with self.assertRaises(ValueError):
+            s.register_many([('task2', Mock(), None, False, {'weight': 1})])
+
+    def test_register_ValueError_When_PriorityNotNumber(self, *patches):
+        s = Scheduler(workers=2)
+        with self.assertRaises(ValueError):
+            s.register(Mock(), 'task1', priority='high')
+        s.register(Mock(), 'task1', priority=2.5)
+        self.assertEqual(s._options['task1']['priority'], 2.5)
+
+    @patch('threaded_order.scheduler.Scheduler._submit')
+    def test_maybe_schedule_next_When_Barrier(self, submit_patch, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'setup1', tags='setup')
+        s.register(Mock(), 'task1', after_tags='setup')
+        s._graph.get_candidates([], 1)
+        s._graph.remove('setup1')
+        s._maybe_schedule_next(Mock())
+        submit_patch.assert_called_once_with('task1')
+        self.assertNotIn('tag:setup', s.graph.nodes())
+
     @patch('threaded_order.scheduler.Scheduler.register')
     def test_dregister_with_state(self, register_patch, *patches):
         mock_function = Mock(__name__='mock_function')
         s = Scheduler()
         decorated_function = s.dregister(with_state=True)(mock_function)
         result = decorated_function()
-        register_patch.assert_called_once_with(decorated_function, 'mock_function', after=None, with_state=True)
+        register_patch.assert_called_once_with(decorated_function, 'mock_function', after=None, with_state=True, tags=None, after_tags=None, priority=None, executor=None, resources=None, timeout=None, idempotent=False, retries=0, backoff=1.0, cache=False)
         self.assertEqual(decorated_function.__original__, mock_function)
         self.assertEqual(result, mock_function.return_value)
 
@@ -45,7 +146,7 @@ class TestScheduler(unittest.TestCase):
         mock_function = Mock(__name__ = 'mock_function2')
         s = Scheduler()
         decorated_function = s.dregister()(mock_function)
-        register_patch.assert_called_once_with(decorated_function, 'mock_function2', after=None, with_state=False)
+        register_patch.assert_called_once_with(decorated_function, 'mock_function2', after=None, with_state=False, tags=None, after_tags=None, priority=None, executor=None, resources=None, timeout=None, idempotent=False, retries=0, backoff=1.0, cache=False)
         self.assertEqual(decorated_function.__original__, mock_function)
 
     @patch('threaded_order.scheduler.Scheduler.register')
@@ -53,7 +154,7 @@ class TestScheduler(unittest.TestCase):
         mock_function = Mock(__name__ = 'mock_function3')
         s = Scheduler()
         decorated_function = s.dregister(after=['dep1'], with_state=True)(mock_function)
-        register_patch.assert_called_once_with(decorated_function, 'mock_function3', after=['dep1'], with_state=True)
+        register_patch.assert_called_once_with(decorated_function, 'mock_function3', after=['dep1'], with_state=True, tags=None, after_tags=None, priority=None, executor=None, resources=None, timeout=None, idempotent=False, retries=0, backoff=1.0, cache=False)
         self.assertEqual(decorated_function.__original__, mock_function)
 
     @patch('threaded_order.scheduler.Scheduler._submit')
@@ -68,30 +169,48 @@ class TestScheduler(unittest.TestCase):
     def test_maybe_schedule_next_When_NoSkip(self, submit_patch, *patches):
         s = Scheduler(workers=2)
         graph_mock = Mock()
+        graph_mock.is_barrier.return_value = False
         graph_mock.get_candidates.return_value = ['task1', 'task2']
         s._graph = graph_mock
         s._maybe_schedule_next(Mock())
         submit_patch.assert_has_calls([call('task1'), call('task2')])
 
     @patch('threaded_order.scheduler.Scheduler._submit')
-    def test_maybe_schedule_next_WhenSkip(self, submit_patch,*patches):
+    def test_handle_done_When_FailedAndSkipDependents(self, submit_patch, *patches):
         s = Scheduler(workers=2, skip_dependents=True)
-        s._failed.append('task1')
-        graph_mock = Mock()
-        graph_mock.get_candidates.return_value = ['task3', 'task4']
-        # original parent of task3 and task4 are task1 and task2 respectively
-        # task1 failed, so task3 should be skipped
-        # task4 should be scheduled
-        graph_mock.original_parents_of.side_effect = [['task1'], ['task2']]
-        s._graph = graph_mock
-        s._maybe_schedule_next(Mock())
-        s._submit.assert_has_calls([call('task4')])
+        callback_mock = Mock()
+        s.on_task_done(callback_mock)
+        s.register(Mock(), 'task1')
+        s.register(Mock(), 'task2')
+        s.register(Mock(), 'task3', after=['task1'], tags='mid')
+        s.register(Mock(), 'task4', after=['task2'])
+        s.register(Mock(), 'task5', after=['task3', 'task4'])
+        s.register(Mock(), 'task6', after_tags='mid')
+        s._active.update(s._graph.get_candidates([], 2))
+        s._handle_done(('task1', False, 'Exception', 'error'), Mock())
+        self.assertEqual(s._failed, ['task1'])
+        self.assertEqual(s._skipped, ['task3', 'task5', 'task6'])
+        self.assertEqual(s._ran, ['task1', 'task3', 'task5', 'task6'])
+        self.assertEqual(s._results['task5']['error_type'], 'DependencyError')
+        self.assertEqual(
+            s._results['task5']['error'], "skipped due to failed dependency: {'task3'}")
+        self.assertEqual(
+            s._results['task6']['error'], "skipped due to failed dependency: {'task3'}")
+        callback_mock.assert_has_calls([
+            call('task1', False), call('task3', False), call('task5', False),
+            call('task6', False)])
+        self.assertEqual(sorted(s.graph.nodes()), ['task2', 'task4'])
+        self.assertTrue(s._events.empty())
+        submit_patch.assert_not_called()
+        s._handle_done(('task2', True, None, None), Mock())
+        submit_patch.assert_called_once_with('task4')
 
     @patch('threaded_order.scheduler.Scheduler._maybe_schedule_next')
     @patch('threaded_order.scheduler.Scheduler._callback')
     def test_handle_done_When_Ok(self, callback_patch, *patches):
         s = Scheduler()
         graph_mock = Mock()
+        graph_mock.is_barrier.return_value = False
         graph_mock.is_empty.return_value = False
         s._graph = graph_mock
         function_mock = Mock()
@@ -105,6 +224,7 @@ class TestScheduler(unittest.TestCase):
     def test_handle_done_When_NotOkDependencyError(self, callback_patch, *patches):
         s = Scheduler()
         graph_mock = Mock()
+        graph_mock.is_barrier.return_value = False
         graph_mock.is_empty.return_value = True
         s._graph = graph_mock
         function_mock = Mock()
@@ -134,7 +254,7 @@ class TestScheduler(unittest.TestCase):
             s._handle_event()
             callback_patch.assert_called_once_with((function_mock, (), {}), 'task1', 'thread1')
 
-    @patch('threaded_order.scheduler.logging.getLogger')
+    @patch('threaded_order.scheduler.get_thread_logger')
     @patch('threaded_order.scheduler.Scheduler._handle_done')
     def test_handle_event_When_Done(self, handle_done_patch, get_logger_patch, *patches):
         s = Scheduler()
@@ -143,7 +263,678 @@ class TestScheduler(unittest.TestCase):
         with patch.object(s, '_events') as events_patch:
             events_patch.get_nowait.side_effect = [('done', ('task1', True, '', '')), queue.Empty()]
             s._handle_event()
-            handle_done_patch.assert_called_once_with(('task1', True, '', ''), get_logger_patch.return_value)
+            handle_done_patch.assert_called_once_with(('task1', True, '', ''), get_logger_patch.return_value, schedule=False)
+
+    @patch('threaded_order.scheduler.Scheduler._callback')
+    def test_handle_event_When_Block(self, callback_patch, *patches):
+        s = Scheduler()
+        with patch.object(s, '_events') as events_patch:
+            events_patch.get.side_effect = [('start', 'task1')]
+            events_patch.get_nowait.side_effect = [('start', 'task2'), queue.Empty()]
+            s._handle_event(block=True)
+            events_patch.get.assert_called_once_with(timeout=1.0)
+            self.assertEqual(callback_patch.call_count, 2)
+
+    def test_handle_event_When_BlockTimesOut(self, *patches):
+        s = Scheduler()
+        with patch.object(s, '_events') as events_patch:
+            events_patch.get.side_effect = queue.Empty()
+            s._handle_event(block=True)
+            events_patch.get_nowait.assert_not_called()
+
+    def test_start_When_NoTasks(self, *patches):
+        s = Scheduler(workers=2)
+        summary = s.start()
+        self.assertEqual(summary['ran'], [])
+
+    def test_start_When_Chain(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'task1')
+        s.register(Mock(), 'task2', after=['task1'])
+        s.register(Mock(), 'task3', after=['task2'])
+        summary = s.start()
+        self.assertEqual(summary['ran'], ['task1', 'task2', 'task3'])
+        self.assertLess(summary['duration'], 0.1)
+
+    def test_start_When_WorkerDispatch(self, *patches):
+        results = {}
+        for worker_dispatch in (False, True):
+            s = Scheduler(workers=2, skip_dependents=True, worker_dispatch=worker_dispatch)
+            done_mock = Mock()
+            s.on_task_done(done_mock)
+            s.register(Mock(), 'task1')
+            s.register(Mock(side_effect=Exception('error'), __name__='task2'), 'task2')
+            s.register(Mock(), 'task3', after=['task1'], tags='group')
+            s.register(Mock(), 'task4', after=['task2'])
+            s.register(Mock(), 'task5', after_tags='group')
+            summary = s.start()
+            self.assertEqual(done_mock.call_count, 5)
+            results[worker_dispatch] = {key: sorted(summary[key])
+                                        for key in ('ran', 'passed', 'failed', 'skipped')}
+        self.assertEqual(results[True], results[False])
+        self.assertEqual(results[True]['skipped'], ['task4'])
+
+    def test_settle_When_Stopping(self, *patches):
+        s = Scheduler(workers=2, worker_dispatch=True)
+        s.register(Mock(), 'task1')
+        s.register(Mock(), 'task2', after=['task1'])
+        s._graph.get_candidates([], 1)
+        s._active.add('task1')
+        s._stopping.set()
+        with patch.object(s, '_events') as events_patch:
+            self.assertIsNone(s._settle(('task1', True, None, None)))
+            events_patch.put.assert_called_once_with(('done', ('task1', True, None, None)))
+        self.assertEqual(s._active, set())
+
+    @patch('threaded_order.scheduler.Scheduler._submit')
+    def test_settle_When_Inline(self, submit_patch, *patches):
+        s = Scheduler(workers=2, worker_dispatch=True)
+        s.on_task_start(Mock())
+        s.register(Mock(), 'task1')
+        s.register(Mock(), 'task2', after=['task1'])
+        s.register(Mock(), 'task3', after=['task1'])
+        s._graph.get_candidates([], 1)
+        s._active.add('task1')
+        with patch.object(s, '_events') as events_patch:
+            self.assertEqual(s._settle(('task1', True, None, None)), 'task2')
+            events_patch.put.assert_has_calls([
+                call(('done', ('task1', True, None, None))), call(('start', 'task2'))])
+        submit_patch.assert_called_once_with('task3')
+        self.assertEqual(s._active, {'task2'})
+
+    @patch('threaded_order.scheduler.Scheduler._settle')
+    def test_done_When_WorkerDispatch(self, settle_patch, *patches):
+        s = Scheduler(worker_dispatch=True)
+        with patch.object(s, '_events') as events_patch, \
+            patch.object(s, '_futures') as futures_patch:
+            futures_patch.pop.return_value = 'task1'
+            future_mock = Mock()
+            future_mock.result.return_value = None
+            s._done(future_mock)
+            future_mock.result.side_effect = Exception('error')
+            s._done(future_mock)
+            events_patch.put.assert_not_called()
+            settle_patch.assert_called_once_with(('task1', False, 'Exception', 'error'), inline=False)
+
+    def test_register_When_Coroutine(self, *patches):
+        s = Scheduler(workers=2)
+
+        async def fetch():
+            pass
+
+        s.register(fetch, 'task1')
+        s.register(Mock(), 'task2')
+        s.dregister()(fetch)
+        self.assertEqual(s._coroutines, {'task1', 'fetch'})
+        self.assertTrue(asyncio.iscoroutinefunction(mark()(fetch)))
+        self.assertTrue(asyncio.iscoroutinefunction(dmark()(fetch)))
+
+    def test_start_When_Coroutines(self, *patches):
+        for worker_dispatch in (False, True):
+            running = []
+            peak = []
+
+            async def fetch(state):
+                running.append(None)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+                return state['results']['setup'] + 1
+
+            async def broken():
+                raise ValueError('error')
+
+            s = Scheduler(workers=2, async_workers=3, skip_dependents=True,
+                          worker_dispatch=worker_dispatch)
+            run_mock = Mock()
+            s.on_task_run(run_mock)
+            s.register(Mock(return_value=1), 'setup')
+            for index in range(6):
+                s.register(fetch, f'fetch{index}', after=['setup'], with_state=True, tags='io')
+            s.register(broken, 'broken')
+            s.register(Mock(), 'after_broken', after=['broken'])
+            s.register(Mock(return_value='done'), 'report', after_tags='io')
+            summary = s.start()
+            self.assertEqual(len(summary['passed']), 8)
+            self.assertEqual(summary['failed'], ['broken'])
+            self.assertEqual(summary['skipped'], ['after_broken'])
+            self.assertEqual(s.state['results']['fetch5'], 2)
+            self.assertEqual(max(peak), 3)
+            self.assertEqual(run_mock.call_count, 9)
+            self.assertIsNone(s._loop)
+
+    def test_init_When_Executors(self, *patches):
+        pool = ThreadPoolExecutor(max_workers=3)
+        s = Scheduler(workers=4, executors={'io': 'thread:16', 'cpu': 'process', 'mine': pool})
+        self.assertEqual(s._executor_specs, {
+            'io': ('thread', 16, None), 'cpu': ('process', 4, None), 'mine': ('thread', 3, pool)})
+        pool.shutdown()
+        for executors in ({'io': 'fiber:2'}, {'io': 'thread:x'}, {'io': 'thread:0'},
+                          {'async': 'thread'}, {'io': 4}):
+            with self.assertRaises(ValueError):
+                Scheduler(executors=executors)
+
+    def test_register_When_UnknownExecutor(self, *patches):
+        s = Scheduler(executors={'io': 'thread'})
+
+        async def fetch():
+            pass
+
+        with self.assertRaisesRegex(ValueError, 'task1 uses unknown executor cpu'):
+            s.register(Mock(), 'task1', executor='cpu')
+        with self.assertRaisesRegex(ValueError, 'fetch is a coroutine function'):
+            s.register(fetch, 'fetch', executor='io')
+        with self.assertRaises(ValueError):
+            s.register(Mock(), 'task2', executor=1)
+        s.register(Mock(), 'task3', executor='io')
+        self.assertEqual(s._options['task3']['executor'], 'io')
+        self.assertEqual(s._lane_of('task3'), 'io')
+
+    def test_start_When_Executors(self, *patches):
+        for worker_dispatch in (False, True):
+            lock = threading.Lock()
+            running = []
+            peak = []
+
+            def call_io():
+                with lock:
+                    running.append(None)
+                    peak.append(len(running))
+                time.sleep(0.01)
+                with lock:
+                    running.pop()
+
+            pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mine')
+            s = Scheduler(workers=1, executors={'io': 'thread:3', 'mine': pool},
+                          worker_dispatch=worker_dispatch)
+            threads = {}
+            s.on_task_run(lambda name, thread: threads.__setitem__(name, thread))
+            s.register(Mock(), 'setup')
+            for index in range(8):
+                s.register(call_io, f'io{index}', after=['setup'], tags='io', executor='io')
+            s.register(Mock(), 'report', after_tags='io', executor='mine')
+            s.register(Mock(), 'last', after=['report'])
+            summary = s.start()
+            self.assertEqual(len(summary['passed']), 11)
+            self.assertEqual(max(peak), 3)
+            self.assertTrue(threads['setup'].startswith('thread_'))
+            self.assertTrue(threads['io7'].startswith('io_'))
+            self.assertTrue(threads['report'].startswith('mine_'))
+            self.assertTrue(threads['last'].startswith('thread_'))
+            self.assertEqual(s._running, {'io': 0, 'mine': 0})
+            # a user-supplied executor is left running
+            self.assertIsNotNone(pool.submit(int).result())
+            pool.shutdown()
+
+    def test_register_When_Resources(self, *patches):
+        s = Scheduler(resources={'db': 2})
+        s.register(Mock(), 'task1', resources={'db': 2})
+        self.assertEqual(s._options['task1']['resources'], {'db': 2})
+        with self.assertRaisesRegex(ValueError, 'task2 needs 3 db tokens but only 2 exist'):
+            s.register(Mock(), 'task2', resources={'db': 3})
+        with self.assertRaisesRegex(ValueError, 'task3 needs unknown resource gpu'):
+            s.register(Mock(), 'task3', resources={'gpu': 1})
+        with self.assertRaises(ValueError):
+            s.register(Mock(), 'task4', resources={'db': 0})
+        with self.assertRaises(ValueError):
+            Scheduler(resources={'db': True})
+
+    def test_start_When_Resources(self, *patches):
+        for worker_dispatch in (False, True):
+            lock = threading.Lock()
+            holders = []
+            peak = []
+
+            def query(tokens):
+                def run():
+                    with lock:
+                        holders.extend([None] * tokens)
+                        peak.append(len(holders))
+                    time.sleep(0.01)
+                    with lock:
+                        del holders[:tokens]
+                return run
+
+            s = Scheduler(workers=4, resources={'db': 2}, worker_dispatch=worker_dispatch)
+            started = []
+            s.on_task_start(started.append)
+            for index in range(6):
+                s.register(query(1), f'query{index}', resources={'db': 1})
+            s.register(query(2), 'migrate', resources={'db': 2})
+            s.register(Mock(), 'other', after=['query0'])
+            summary = s.start()
+            self.assertEqual(len(summary['passed']), 8)
+            self.assertEqual(max(peak), 2)
+            # a task needing no tokens is not held up behind parked ones
+            self.assertLess(started.index('other'), started.index('query5'))
+            self.assertEqual(s._tokens, {'db': 2})
+            self.assertEqual(s._parked, {})
+
+    def test_init_When_Autoscale(self, *patches):
+        s = Scheduler(workers=40, autoscale=(2, 16))
+        self.assertEqual((s._workers, s._pool_size), (16, 16))
+        autoscaler = Autoscaler(1, 8)
+        s = Scheduler(workers=2, autoscale=autoscaler)
+        self.assertIs(s._autoscaler, autoscaler)
+        self.assertEqual((s._workers, s._pool_size), (2, 8))
+
+    def test_autoscale(self, *patches):
+        s = Scheduler(workers=2, autoscale=(1, 8))
+        s.register(Mock(), 'task1')
+        logger_mock = Mock()
+        with patch.object(s, '_autoscaler') as autoscaler_patch:
+            autoscaler_patch.update.return_value = (2, None)
+            s._autoscale(logger_mock)
+            autoscaler_patch.update.assert_called_once_with(2, 1)
+            logger_mock.info.assert_not_called()
+            autoscaler_patch.update.return_value = (4, 'busy')
+            s._autoscale(logger_mock)
+            logger_mock.info.assert_called_once_with('autoscale: 2 -> 4 workers: busy')
+        self.assertEqual(s._workers, 4)
+
+    def test_start_When_Autoscale(self, *patches):
+        autoscaler = Autoscaler(1, 8, interval=0.01)
+        s = Scheduler(workers=1, autoscale=autoscaler)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def call_io():
+            with lock:
+                running.append(None)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.pop()
+
+        s.register_many((f'io{index:02}', call_io, [], False) for index in range(40))
+        summary = s.start()
+        self.assertEqual(len(summary['passed']), 40)
+        self.assertEqual(summary['autoscale'], autoscaler.decisions)
+        self.assertGreater(max(peak), 1)
+        self.assertLessEqual(max(peak), 8)
+        s._workers = 5
+        s._prep_start()
+        self.assertEqual(s._workers, 1)
+        self.assertEqual(autoscaler.decisions, [])
+
+    def test_register_ValueError_When_Timeout(self, *patches):
+        s = Scheduler(workers=2)
+        for timeout in (0, -1, 'slow', True):
+            with self.assertRaises(ValueError):
+                s.register(Mock(), 'task1', timeout=timeout)
+            with self.assertRaises(ValueError):
+                Scheduler(timeout=timeout)
+        s.register(Mock(), 'task1', timeout=2.5, idempotent=1)
+        self.assertEqual((s._options['task1']['timeout'], s._options['task1']['idempotent']),
+                         (2.5, True))
+
+    def test_start_When_Timeout(self, *patches):
+        release = threading.Event()
+        for worker_dispatch in (False, True):
+            s = Scheduler(workers=2, skip_dependents=True, worker_dispatch=worker_dispatch,
+                          timeout=5)
+            s.register(release.wait, 'hang', timeout=0.1)
+            s.register(Mock(), 'child', after=['hang'])
+            s.register(Mock(), 'other')
+
+            async def stuck():
+                await asyncio.sleep(10)
+
+            s.register(stuck, 'stuck', timeout=0.1)
+            started = time.perf_counter()
+            summary = s.start()
+            self.assertLess(time.perf_counter() - started, 2)
+            self.assertEqual(summary['failures'], {
+                'hang': {'error_type': 'TimeoutError', 'error': 'timed out after 0.1s'},
+                'stuck': {'error_type': 'TimeoutError', 'error': 'timed out after 0.1s'}})
+            self.assertEqual(summary['skipped'], ['child'])
+            self.assertEqual(summary['passed'], ['other'])
+            self.assertNotIn('hedged', summary)
+            # the abandoned thread returning later changes nothing
+            release.set()
+            time.sleep(0.05)
+            self.assertEqual(s._events.qsize(), 0)
+            release.clear()
+
+    def test_start_When_Hedged(self, *patches):
+        for worker_dispatch in (False, True):
+            calls = []
+            release = threading.Event()
+
+            def fetch():
+                calls.append(threading.current_thread().name)
+                if len(calls) == 1:
+                    release.wait(5)
+                return len(calls)
+
+            s = Scheduler(workers=2, worker_dispatch=worker_dispatch, history_file=os.devnull)
+            s.register(fetch, 'fetch', idempotent=True)
+            s.register(Mock(), 'report', after=['fetch'])
+            with patch.object(s, '_history') as history_patch, \
+                    patch.object(s, '_save_history'):
+                history_patch.percentile.return_value = 0.05
+                summary = s.start()
+            history_patch.percentile.assert_called_with('fetch', 0.95, minimum=5)
+            self.assertEqual(summary['passed'], ['fetch', 'report'])
+            self.assertEqual(summary['hedged'], ['fetch'])
+            self.assertEqual(len(calls), 2)
+            # the slow copy finishing later does not replace the result
+            release.set()
+            time.sleep(0.05)
+            self.assertEqual(s.state['results']['fetch'], 2)
+
+    def test_register_ValueError_When_Retries(self, *patches):
+        s = Scheduler(workers=2)
+        for options in ({'retries': -1}, {'retries': 1.5}, {'retries': True},
+                        {'backoff': -1}, {'backoff': 'slow'}):
+            with self.assertRaises(ValueError):
+                s.register_many([('task1', Mock(), None, False, options)])
+        s.register(Mock(), 'task1', retries=2, backoff=0)
+        self.assertEqual((s._options['task1']['retries'], s._options['task1']['backoff']), (2, 0))
+
+    def test_start_When_Retries(self, *patches):
+        for worker_dispatch in (False, True):
+            attempts = []
+
+            def flaky():
+                attempts.append(time.perf_counter())
+                if len(attempts) < 3:
+                    raise ConnectionError(f'attempt {len(attempts)}')
+
+            def broken():
+                raise ValueError('bad')
+
+            s = Scheduler(workers=1, worker_dispatch=worker_dispatch)
+            s.register(flaky, 'flaky', retries=3, backoff=0.05)
+            s.register(broken, 'broken', retries=1, backoff=0)
+            s.register(Mock(), 'child', after=['flaky'])
+            s.register(Mock(), 'other')
+            summary = s.start()
+            self.assertEqual(summary['passed'], ['other', 'flaky', 'child'])
+            self.assertEqual(summary['retried'], {'flaky': 3})
+            # backoff doubles after each failure
+            self.assertGreaterEqual(attempts[1] - attempts[0], 0.05)
+            self.assertGreaterEqual(attempts[2] - attempts[1], 0.1)
+            self.assertEqual(summary['failures'], {'broken': {
+                'error_type': 'ValueError', 'error': 'bad', 'attempts': 2,
+                'errors': [{'error_type': 'ValueError', 'error': 'bad'}] * 2}})
+            self.assertEqual(s._waiting, set())
+
+    def test_init_ValueError_When_MaxFailures(self, *patches):
+        for max_failures in (0, -1, 1.5, True):
+            with self.assertRaises(ValueError):
+                Scheduler(workers=2, max_failures=max_failures)
+
+    def test_init_ValueError_When_AsyncWorkers(self, *patches):
+        for async_workers in (0, -1, 1.5, True):
+            with self.assertRaises(ValueError):
+                Scheduler(workers=2, async_workers=async_workers)
+
+    def test_start_When_MaxFailures(self, *patches):
+        for worker_dispatch in (False, True):
+
+            def broken():
+                raise ValueError('bad')
+
+            s = Scheduler(workers=2, worker_dispatch=worker_dispatch, max_failures=1)
+            s.register(broken, 'a_broken')
+            s.register(lambda: time.sleep(0.2), 'b_slow')
+            for index in range(10):
+                s.register(Mock(), f'c{index}')
+            summary = s.start()
+            # the running task drains, none of the others starts
+            self.assertEqual(summary['passed'], ['b_slow'])
+            self.assertEqual(summary['failed'], ['a_broken'])
+            self.assertEqual(sorted(summary['skipped']), [f'c{index}' for index in range(10)])
+            self.assertEqual(summary['failure_counts'], {'ValueError': 1, 'MaxFailuresError': 10})
+            self.assertEqual(summary['failures'], {'a_broken': {'error_type': 'ValueError',
+                                                                'error': 'bad'}})
+
+    def test_start_When_Cache(self, *patches):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        calls = []
+
+        def load(state):
+            calls.append('load')
+            return state['size'] * [0]
+
+        def count(state):
+            calls.append('count')
+            return len(state['results']['load'])
+
+        for worker_dispatch, size, expected in ((False, 2, ['load', 'count']), (True, 2, []),
+                                                (False, 3, ['load', 'count'])):
+            calls.clear()
+            cache = ResultCache(directory, key_file=os.path.join(directory, 'cache.key'))
+            s = Scheduler(workers=2, state={'size': size}, worker_dispatch=worker_dispatch,
+                          cache=cache)
+            s.register(load, 'load', with_state=True, cache=['size'])
+            s.register(count, 'count', after=['load'], with_state=True, cache=['size'])
+            s.register(Mock(return_value=None), 'other')
+            summary = s.start()
+            self.assertEqual(calls, expected)
+            self.assertEqual(s.state['results']['count'], size)
+            hits = 0 if expected else 2
+            self.assertEqual(summary['cache'], {'hits': hits, 'misses': 2 - hits})
+            self.assertIn(f'{hits} cache hits, {2 - hits} misses', summary['text'])
+
+    def test_register_ValueError_When_Cache(self, *patches):
+        s = Scheduler(workers=2)
+        for cache in ('size', [1]):
+            with self.assertRaises(ValueError):
+                s.register(Mock(), 'task1', cache=cache)
+
+    def test_open_cache(self, *patches):
+        s = Scheduler(workers=2, store_results=False)
+        s.register(Mock(), 'task1', cache=True)
+        s._open_cache(Mock())
+        self.assertFalse(s._caching)
+        s = Scheduler(workers=2, cache=False)
+        s.register(Mock(), 'task1', cache=True)
+        s._open_cache(Mock())
+        self.assertFalse(s._caching)
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'task1')
+        s._open_cache(Mock())
+        self.assertFalse(s._caching)
+        self.assertIsNone(s._cache)
+
+    def test_start_When_Breaker(self, *patches):
+        for worker_dispatch in (False, True):
+            calls = []
+
+            def down():
+                calls.append(None)
+                raise ConnectionError('connection refused')
+
+            s = Scheduler(workers=1, worker_dispatch=worker_dispatch, breaker=(2, 60))
+            for index in range(10):
+                s.register(down, f'db{index}', tags='db')
+            s.register(Mock(), 'other')
+            s.register(Mock(), 'child', after=['db9'])
+            summary = s.start()
+            self.assertEqual(len(calls), 2)
+            self.assertEqual(summary['failed'], ['db0', 'db1'])
+            self.assertEqual(summary['skipped'], [f'db{index}' for index in range(2, 10)])
+            self.assertEqual(summary['passed'], ['other', 'child'])
+            self.assertEqual(summary['failure_counts'],
+                             {'ConnectionError': 2, 'CircuitOpenError': 8})
+            self.assertEqual(summary['tripped'], {'db': 1})
+
+    def test_short_circuit(self, *patches):
+        breaker = CircuitBreaker(1)
+        s = Scheduler(workers=2, breaker=breaker)
+        self.assertIs(s._breaker, breaker)
+        s.register(Mock(), 'task1', tags='db')
+        self.assertFalse(s._short_circuit('task1', Mock()))
+        breaker.record('task0', ['db'], False, 'ConnectionError')
+        self.assertTrue(s._short_circuit('task1', Mock()))
+        self.assertEqual(s._events.get_nowait(), ('done', (
+            'task1', False, 'CircuitOpenError', "circuit open for tag 'db'")))
+        self.assertFalse(s._retry(('task1', False, 'CircuitOpenError', ''), Mock()))
+
+    def test_halt(self, *patches):
+        s = Scheduler(workers=2, max_failures=2)
+        s.register(Mock(), 'task1')
+        s.register(Mock(), 'task2', after=['task1'])
+        s.register(Mock(), 'task3')
+        s._active.add('task1')
+        s._waiting.add('task3')
+        self.assertFalse(s._limit_reached(False, 'ValueError'))
+        self.assertFalse(s._limit_reached(False, 'DependencyError'))
+        self.assertTrue(s._limit_reached(False, 'ValueError'))
+        s._halt(Mock())
+        self.assertTrue(s._halted)
+        self.assertEqual(s._skipped, ['task2', 'task3'])
+        self.assertEqual(s._results['task2']['error_type'], 'MaxFailuresError')
+        self.assertEqual(s._waiting, set())
+        self.assertFalse(s._completed.is_set())
+        self.assertIsNone(s._maybe_schedule_next(Mock()))
+        self.assertFalse(s._limit_reached(False, 'ValueError'))
+
+    def test_retry_When_TimeoutNotIdempotent(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'task1', retries=2)
+        payload = ('task1', False, 'TimeoutError', 'timed out after 1s')
+        self.assertFalse(s._retry(payload, Mock()))
+        self.assertEqual(s._errors['task1'], [{'error_type': 'TimeoutError',
+                                                'error': 'timed out after 1s'}])
+        s.register(Mock(), 'task2', retries=2, idempotent=True)
+        with patch.object(s, '_add_timer') as add_timer_patch:
+            self.assertTrue(s._retry(('task2',) + payload[1:], Mock()))
+        add_timer_patch.assert_called_once_with(1.0, 'retry', 'task2', 1)
+        self.assertEqual(s._waiting, {'task2'})
+
+    def test_handle_interrupt_When_WaitingForRetry(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'task1', retries=1)
+        s._waiting.add('task1')
+        s._handle_interrupt(Mock())
+        self.assertEqual(s._failed, ['task1'])
+        self.assertEqual(s._results['task1']['error_type'], 'CancelledError')
+        s._resume('task1', Mock())
+        self.assertEqual(s._active, set())
+
+    def test_set_timers_When_Resources(self, *patches):
+        s = Scheduler(workers=2, resources={'db': 1})
+        s.register(Mock(), 'task1', idempotent=True, resources={'db': 1})
+        s.register(Mock(), 'task2', idempotent=True)
+        s._history = Mock(**{'percentile.return_value': 0.5})
+        with patch.object(s, '_add_timer') as add_timer_patch:
+            s._set_timers('task1', 1)
+            s._set_timers('task2', 1)
+        add_timer_patch.assert_called_once_with(0.5, 'hedge', 'task2', 1)
+
+    def test_arm(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(__name__='task1'), 'task1', timeout=1)
+        s._watched = True
+        with patch.object(s, '_add_timer') as add_timer_patch:
+            s._arm('task1')
+            # the timeout starts when the run begins, not while it waits for a thread
+            add_timer_patch.assert_not_called()
+            s._run('task1')
+            s._run('task1')
+        add_timer_patch.assert_called_once_with(1, 'timeout', 'task1', 1)
+        self.assertEqual(s._armed, {})
+
+    def test_abandon(self, *patches):
+        s = Scheduler(workers=2)
+        s._executor = ThreadPoolExecutor(max_workers=2)
+        running, queued = Mock(), Mock()
+        running.cancel.return_value = False
+        running.done.return_value = False
+        queued.cancel.return_value = True
+        s._abandon('task1', [running, queued])
+        self.assertEqual(s._executor._max_workers, 3)
+        # a run kept inline by its worker has no future but holds a thread
+        s._abandon('task1', [])
+        self.assertEqual(s._executor._max_workers, 4)
+        s._executor.shutdown()
+
+    def test_start_When_TimeoutsExceedWorkers(self, *patches):
+        for worker_dispatch in (False, True):
+            release = threading.Event()
+            s = Scheduler(workers=1, timeout=0.2, worker_dispatch=worker_dispatch)
+            s.register(release.wait, 'hung1')
+            s.register(release.wait, 'hung2')
+            for index in range(3):
+                s.register(Mock(), f'task{index}', after=['hung1', 'hung2'])
+            try:
+                summary = s.start()
+            finally:
+                release.set()
+            self.assertEqual(sorted(summary['failed']), ['hung1', 'hung2'])
+            self.assertEqual(sorted(summary['passed']), ['task0', 'task1', 'task2'])
+
+    def test_fire_timers_When_Stale(self, *patches):
+        s = Scheduler(workers=2)
+        s.register(Mock(), 'task1', timeout=1)
+        s._starts['task1'] = 2
+        s._timers = [(0.0, 0, 'timeout', 'task1', 1), (0.0, 1, 'timeout', 'task2', 0)]
+        s._settled.add('task2')
+        with patch.object(s, '_expire') as expire_patch:
+            s._fire_timers(Mock())
+        expire_patch.assert_not_called()
+        self.assertEqual(s._timers, [])
+
+    def test_shutdown(self, *patches):
+        s = Scheduler(workers=2)
+        executor = Mock()
+        s._shutdown(executor)
+        executor.shutdown.assert_called_once_with(wait=True)
+        s._settled.add('task1')
+        s._runs['task1'] = 1
+        executor = Mock()
+        s._shutdown(executor)
+        executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+
+    @patch('threaded_order.scheduler.worker_limit', return_value=12)
+    @patch('threaded_order.scheduler.auto_workers', return_value=(3, 'reason'))
+    def test_size_workers(self, auto_workers_patch, *patches):
+        s = Scheduler(workers='auto')
+        self.assertEqual((s._workers, s._pool_size), (12, 12))
+        s.register_many((f'task{index}', Mock(), [], False) for index in range(3))
+        s.register(Mock(), 'last', after=['task0', 'task1', 'task2'])
+        self.assertEqual(s.size_workers(), (3, 'reason'))
+        auto_workers_patch.assert_called_once_with(3, 'thread')
+        self.assertEqual((s._workers, s._pool_size, s._initial_workers), (3, 3, 3))
+        s = Scheduler(workers='auto', autoscale=(4, 16))
+        s.size_workers()
+        self.assertEqual((s._workers, s._pool_size, s._initial_workers), (4, 16, 4))
+
+    @patch('threaded_order.scheduler.auto_workers', return_value=(2, 'reason'))
+    def test_start_When_AutoWorkers(self, *patches):
+        s = Scheduler(workers='auto', pin_workers=True)
+        s.register_many((f'task{index}', Mock(), [], False) for index in range(4))
+        with patch('threaded_order.scheduler.CpuPinner') as pinner_patch:
+            summary = s.start()
+        self.assertEqual(len(summary['passed']), 4)
+        self.assertEqual(s._pool_size, 2)
+        self.assertEqual(pinner_patch.return_value.call_count, 2)
+
+    @patch('threaded_order.scheduler.auto_workers', return_value=(2, 'reason'))
+    def test_start_When_AutoWorkersSized(self, auto_workers_patch, *patches):
+        s = Scheduler(workers='auto')
+        s.register_many((f'task{index}', Mock(), [], False) for index in range(4))
+        s.size_workers()
+        s.start()
+        auto_workers_patch.assert_called_once()
+        # registering more tasks sizes the pool again
+        s.register(Mock(), 'task4')
+        s.start()
+        self.assertEqual(auto_workers_patch.call_count, 2)
+
+    def test_stop_loop_When_Pending(self, *patches):
+        s = Scheduler()
+        s._start_loop(Mock())
+        future = asyncio.run_coroutine_threadsafe(asyncio.sleep(10), s._loop)
+        s._stop_loop()
+        self.assertTrue(future.cancelled())
+        self.assertIsNone(s._loop)
+        s._stop_loop()
 
     def test_build_summary(self, *patches):
         s = Scheduler()
@@ -182,14 +973,16 @@ class TestScheduler(unittest.TestCase):
         s.on_scheduler_start(scheduler_start_mock)
         s.on_scheduler_done(scheduler_done_mock)
         graph_mock = Mock()
+        graph_mock.is_barrier.return_value = False
         graph_mock.get_candidates.return_value = ['task1', 'task2']
         s._graph = graph_mock
         with patch.object(s, '_completed') as completed_patch:
-            completed_patch.wait.side_effect = [False, False, False, True]
+            completed_patch.is_set.side_effect = [False, False, False, True]
             s.start()
         prep_start_patch.assert_called_once()
+        graph_mock.reduce.assert_not_called()
         submit_patch.assert_has_calls([call('task1'), call('task2')])
-        handle_event_patch.assert_called()
+        handle_event_patch.assert_has_calls([call(block=True)] * 3 + [call()])
         build_summary_patch.assert_called_once()
         callback_patch.assert_called()
 
@@ -200,17 +993,83 @@ class TestScheduler(unittest.TestCase):
     @patch('threaded_order.scheduler.Scheduler._prep_start')
     @patch('threaded_order.scheduler.Scheduler._callback')
     def test_start_When_KeyboardInterrupt(self, callback_patch, prep_start_patch, submit_patch, handle_event_patch, build_summary_patch, *patches):
-        s = Scheduler()
+        s = Scheduler(reduce_graph=True)
         graph_mock = Mock()
+        graph_mock.is_barrier.return_value = False
         graph_mock.get_candidates.return_value = ['task1', 'task2']
         s._graph = graph_mock
         with patch.object(s, '_completed') as completed_patch:
-            completed_patch.wait.side_effect = [False, False, False, KeyboardInterrupt]
+            completed_patch.is_set.side_effect = [False, False, False, KeyboardInterrupt]
             result = s.start()
+        graph_mock.reduce.assert_called_once_with()
         self.assertEqual(result, build_summary_patch.return_value)
 
+    def test_init_Should_RaiseValueError_When_UnknownPolicy(self, *patches):
+        with self.assertRaises(ValueError):
+            Scheduler(policy='fastest')
+
+    @patch('threaded_order.scheduler.History')
+    def test_init_When_CriticalPathPolicy(self, history_patch, *patches):
+        s = Scheduler(policy='critical-path')
+        history_patch.assert_called_once_with(None)
+        self.assertEqual(s._history, history_patch.return_value)
+        self.assertIsNone(Scheduler()._history)
+
+    def test_apply_policy(self, *patches):
+        policy_mock = Mock(uses_history=False)
+        policy_mock.key.side_effect = lambda name: {'task2': -1}.get(name, 0)
+        s = Scheduler(workers=2, policy=policy_mock)
+        s.register(Mock(), 'task1')
+        s.register(Mock(), 'task2', priority=5)
+        s._apply_policy(Mock())
+        policy_mock.prepare.assert_called_once_with(s.graph, s._options, None)
+        self.assertEqual(s.graph.get_candidates([], 2), ['task2', 'task1'])
+
+    @patch('threaded_order.scheduler.History')
+    def test_save_history(self, history_patch, *patches):
+        s = Scheduler(history_file='history.json')
+        s._durations = {'task1': 1.5}
+        history_patch.return_value.save.side_effect = OSError('read-only')
+        logger_mock = Mock()
+        s._save_history(logger_mock)
+        history_patch.return_value.record.assert_called_once_with('task1', 1.5)
+        logger_mock.warning.assert_called_once()
+
+    @patch('threaded_order.scheduler.History')
+    def test_save_history_When_Outcomes(self, history_patch, *patches):
+        s = Scheduler(history_file='history.json')
+        s._results = {'task1': {'ok': True}, 'task2': {'ok': False}, 'task3': {'ok': False}}
+        s._failed = ['task2']
+        s._save_history(Mock())
+        self.assertEqual(history_patch.return_value.record_outcome.call_args_list, [
+            call('task1', 'passed'), call('task2', 'failed'), call('task3', 'skipped')])
+
+    def test_save_history_When_NoHistory(self, *patches):
+        s = Scheduler()
+        s._durations = {'task1': 1.5}
+        s._save_history(Mock())
+
+    @patch('threaded_order.scheduler.ThreadPoolExecutor')
+    @patch('threaded_order.scheduler.Scheduler._save_history')
+    @patch('threaded_order.scheduler.Scheduler._apply_policy')
+    @patch('threaded_order.scheduler.Scheduler._build_summary')
+    @patch('threaded_order.scheduler.Scheduler._handle_event')
+    @patch('threaded_order.scheduler.Scheduler._prep_start')
+    @patch('threaded_order.scheduler.History')
+    def test_start_When_CriticalPathPolicy(self, history_patch, prep_start_patch, handle_event_patch, build_summary_patch, prioritize_patch, save_history_patch, *patches):
+        s = Scheduler(policy='critical-path')
+        graph_mock = Mock()
+        graph_mock.get_candidates.return_value = []
+        s._graph = graph_mock
+        with patch.object(s, '_completed') as completed_patch:
+            completed_patch.is_set.side_effect = [True]
+            s.start()
+        prioritize_patch.assert_called_once()
+        save_history_patch.assert_called_once()
+
     def test_submit(self, *patches):
         s = Scheduler()
+        s.on_task_start(Mock())
         with patch.object(s, '_events') as events_patch, \
             patch.object(s, '_executor') as executor_patch:
             future_mock = Mock()
@@ -220,6 +1079,88 @@ class TestScheduler(unittest.TestCase):
             self.assertEqual(s._futures[future_mock], 'task1')
             future_mock.add_done_callback.assert_called_once_with(s._done)
 
+    def test_submit_When_NoStartCallback(self, *patches):
+        s = Scheduler()
+        with patch.object(s, '_events') as events_patch, \
+            patch.object(s, '_executor') as executor_patch:
+            s._submit('task1')
+            events_patch.put.assert_not_called()
+            self.assertEqual(s._active, {'task1'})
+
+    def test_init_When_UnknownBackend(self, *patches):
+        with self.assertRaises(ValueError):
+            Scheduler(backend='fiber')
+
+    @patch('threaded_order.scheduler.create_executor')
+    def test_create_executor_When_ProcessBackend(self, create_executor_patch, *patches):
+        s = Scheduler(workers=3, backend='process', start_method='spawn')
+        s.register(sys.exit, 'task1')
+        executor = s._create_executor(Mock())
+        self.assertEqual(executor, create_executor_patch.return_value)
+        create_executor_patch.assert_called_once_with(3, [], 'spawn')
+
+    @patch('threaded_order.scheduler.run_in_process')
+    def test_submit_When_ProcessBackend(self, run_in_process_patch, *patches):
+        s = Scheduler(backend='process', state={'env': 'dev'})
+        function_mock = Mock()
+        s._callables = {'task1': (function_mock, True), 'task2': (function_mock, False)}
+        with patch.object(s, '_executor') as executor_patch:
+            s._submit('task1')
+            s._submit('task2')
+            first, second = executor_patch.submit.call_args_list
+            self.assertEqual(first.args[:4], (run_in_process_patch, 'task1', function_mock, True))
+            self.assertEqual(first.args[5], True)
+            self.assertEqual(first.args[4]['env'], 'dev')
+            self.assertEqual(second.args[3:5], (False, None))
+            self.assertEqual(s._active, {'task1', 'task2'})
+
+    def test_submit_When_PoolBroken(self, *patches):
+        s = Scheduler()
+        with patch.object(s, '_executor') as executor_patch, \
+            patch.object(s, '_events') as events_patch:
+            executor_patch.submit.side_effect = RuntimeError('broken')
+            s._submit('task1')
+            events_patch.put.assert_called_once_with(('done', ('task1', False, 'RuntimeError', 'broken')))
+            self.assertEqual(s._futures, {})
+
+    def test_done_When_Outcome(self, *patches):
+        s = Scheduler(state={'stale': 1})
+        s.on_task_run(Mock())
+        s._callables = {'task1': (Mock(__name__='task1'), True)}
+        outcome = Outcome('task1', True, None, None, 5, {'env': 'dev'}, ['stale'], 0.5, 'worker-1')
+        with patch.object(s, '_events') as events_patch:
+            future_mock = Mock()
+            future_mock.result.return_value = outcome
+            s._done(future_mock)
+            events_patch.put.assert_has_calls([
+                call(('run', ('task1', 'worker-1'))),
+                call(('done', ('task1', True, None, None)))])
+        self.assertEqual(s.state['results'], {'task1': 5})
+        self.assertEqual(s.state['env'], 'dev')
+        self.assertNotIn('stale', s.state)
+        self.assertEqual(s._durations, {'task1': 0.5})
+
+    def test_absorb_When_Failed(self, *patches):
+        s = Scheduler()
+        s._callables = {'task1': (Mock(__name__='task1'), False)}
+        outcome = Outcome('task1', False, 'ValueError', 'error', None, {}, [], 0.5, 'worker-1')
+        self.assertEqual(s._absorb(outcome), ('task1', False, 'ValueError', 'error'))
+        self.assertEqual(s.state['results'], {})
+
+    def test_run_When_NoName(self, *patches):
+        s = Scheduler()
+        s._callables = {'task1': (Mock(spec=[], side_effect=ValueError('error')), False)}
+        self.assertEqual(s._run('task1'), ('task1', False, 'ValueError', 'error'))
+
+    def test_run_When_RunCallback(self, *patches):
+        s = Scheduler(store_results=False)
+        s.on_task_run(Mock())
+        s._callables = {'task1': (Mock(__name__='task1'), False)}
+        with patch.object(s, '_events') as events_patch:
+            s._run('task1')
+            events_patch.put.assert_called_once_with(
+                ('run', ('task1', threading.current_thread().name)))
+
     def test_done(self, *patches):
         s = Scheduler()
         with patch.object(s, '_events') as events_patch, \
@@ -233,7 +1174,7 @@ class TestScheduler(unittest.TestCase):
         s = Scheduler()
         with patch.object(s, '_events') as events_patch, \
             patch.object(s, '_futures') as futures_patch:
-            futures_patch.get.return_value = 'task1'
+            futures_patch.pop.return_value = 'task1'
             future_mock = Mock()
             future_mock.result.side_effect = Exception('error')
             s._done(future_mock)
@@ -257,6 +1198,7 @@ class TestScheduler(unittest.TestCase):
             result = s._run('task1')
             function_mock.assert_called_once_with()
             self.assertEqual(result, ('task1', True, None, None))
+            self.assertIn('task1', s._durations)
 
     def test_run_When_Exception(self, *patches):
         s = Scheduler(store_results=True)
@@ -296,7 +1238,16 @@ class TestScheduler(unittest.TestCase):
             'after': [],
             'with_state': True,
             'orig_name': 'task1',
-            'tags': ['t1', 't2']
+            'tags': ['t1', 't2'],
+            'after_tags': [],
+            'priority': None,
+            'executor': None,
+            'resources': {},
+            'timeout': None,
+            'idempotent': False,
+            'retries': 0,
+            'backoff': 1.0,
+            'cache': False
         }
         self.assertEqual(decorated_function.__threaded_order__, threaded_order)
         decorated_function()
@@ -308,7 +1259,16 @@ class TestScheduler(unittest.TestCase):
             'after': [],
             'with_state': True,
             'orig_name': 'task1',
-            'tags': ['t1', 't2']
+            'tags': ['t1', 't2'],
+            'after_tags': [],
+            'priority': None,
+            'executor': None,
+            'resources': {},
+            'timeout': None,
+            'idempotent': False,
+            'retries': 0,
+            'backoff': 1.0,
+            'cache': False
         }
         self.assertEqual(decorated_function.__threaded_order__, threaded_order)
         decorated_function()
\ No newline at end of file
@@ -5,6 +5,7 @@ from os import getenv
 __all__ = [
     'Scheduler',
     'DAGraph',
+    'CompactDAGraph',
     'configure_logging',
     'ThreadProxyLogger',
     'dmark',
@@ -19,6 +20,9 @@ def __getattr__(name):
     if name == 'DAGraph':
         from .graph import DAGraph
         return DAGraph
+    if name == 'CompactDAGraph':
+        from .graph import CompactDAGraph
+        return CompactDAGraph
     if name == 'configure_logging':
         from .logger import configure_logging
         return configure_logging
@@ -0,0 +1,113 @@
+""" adaptive sizing of the number of tasks a Scheduler runs at once
+
+    With Scheduler(autoscale=(minimum, maximum)) the default pool is created with
+    `maximum` workers and an Autoscaler decides how many of them may run tasks.
+    At most once per `interval` seconds, and only once a task has finished since
+    the last decision, it compares the last window with the one before:
+
+    * process CPU time above `saturation` of the available CPUs: shrink by a
+      quarter (at least one), and never grow
+    * mean task duration up by more than `slowdown` times: shrink by a quarter
+    * the last step grew the slots but throughput did not improve: step back
+      and hold for `hold` windows before growing again
+    * ready tasks waiting: double the slots until the first step down, then grow
+      by a quarter (at least one)
+
+    Every change is recorded in `decisions` as (seconds since start, slots, reason).
+"""
+import time
+from .cpus import available_cpus
+
+class Autoscaler:
+    """ hill-climbing controller for the number of concurrent task slots
+    """
+    def __init__(self, minimum, maximum, interval=0.5, saturation=0.9, slowdown=1.5, hold=4,
+                 cpus=None, clock=time.monotonic, cpu_clock=time.process_time):
+        """ bound the slots to [minimum, maximum], deciding at most every `interval` seconds
+        """
+        if minimum < 1 or maximum < minimum:
+            raise ValueError('autoscale bounds must satisfy 1 <= minimum <= maximum')
+        self.minimum = minimum
+        self.maximum = maximum
+        self._interval = interval
+        self._saturation = saturation
+        self._slowdown = slowdown
+        self._hold = hold
+        # the CPUs this process may use (affinity and cgroup quota), not the host's
+        self._cpus = cpus if cpus else available_cpus()
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+        self.decisions = []
+        self.start()
+
+    def start(self):
+        """ forget previous windows and decisions for a fresh run
+        """
+        self._started = self._sampled = self._clock()
+        self._cpu_sampled = self._cpu_clock()
+        # tasks finished and their total duration in the current window
+        self._done = 0
+        self._busy = 0.0
+        # throughput and mean duration of the previous window
+        self._throughput = None
+        self._latency = None
+        # slots added by the last decision, taken back if they did not pay off
+        self._grew = 0
+        self._holding = 0
+        # slots double on every step up until the first step down
+        self._doubling = True
+        self.decisions.clear()
+
+    def clamp(self, slots):
+        """ return `slots` within the bounds
+        """
+        return max(self.minimum, min(self.maximum, slots))
+
+    def task_done(self, duration):
+        """ count a finished task that ran for `duration` seconds
+        """
+        self._done += 1
+        self._busy += duration
+
+    def update(self, slots, backlog):
+        """ return the new number of slots given the current `slots` and the number
+            of ready tasks waiting (`backlog`), and the reason for a change or None
+        """
+        now = self._clock()
+        elapsed = now - self._sampled
+        if elapsed < self._interval or not self._done:
+            return slots, None
+        cpu_now = self._cpu_clock()
+        cpu = (cpu_now - self._cpu_sampled) / (elapsed * self._cpus)
+        throughput = self._done / elapsed
+        latency = self._busy / self._done
+        previous_throughput, previous_latency = self._throughput, self._latency
+        self._sampled, self._cpu_sampled = now, cpu_now
+        self._done, self._busy = 0, 0.0
+        self._throughput, self._latency = throughput, latency
+        grew, self._grew = self._grew, 0
+        self._holding = max(0, self._holding - 1)
+
+        new, reason = slots, None
+        smaller = self.clamp(slots - max(1, slots // 4))
+        if cpu >= self._saturation:
+            if slots > self.minimum:
+                new, reason = smaller, f'CPU saturated at {cpu:.0%}'
+        elif (previous_latency and latency > previous_latency * self._slowdown
+              and slots > self.minimum):
+            new = smaller
+            reason = f'mean task time up from {previous_latency:.3f}s to {latency:.3f}s'
+        elif grew and previous_throughput and throughput <= previous_throughput * 1.05:
+            new = self.clamp(slots - grew)
+            reason = (f'throughput {throughput:.1f}/s did not improve on '
+                      f'{previous_throughput:.1f}/s')
+            self._holding = self._hold
+        elif backlog and slots < self.maximum and not self._holding:
+            new = self.clamp(slots * 2 if self._doubling else slots + max(1, slots // 4))
+            reason = f'{backlog} ready tasks waiting at {throughput:.1f} tasks/s'
+            self._grew = new - slots
+        if new < slots:
+            self._doubling = False
+        if new != slots:
+            self.decisions.append((round(now - self._started, 3), new, reason))
+        return new, reason
@@ -0,0 +1,103 @@
+""" tag-scoped circuit breaking for correlated failure storms
+
+    With Scheduler(breaker=(threshold, window)) every task tag has a circuit. It
+    opens once `threshold` tasks carrying the tag failed within `window` seconds,
+    and from then on the tasks of that tag are not started: they are skipped with
+    CircuitOpenError. Skipped tasks do not count as failures of the circuit.
+
+    With `probe_after` an open circuit turns half-open after that many seconds:
+    the next task of the tag is started as a probe while the others are still
+    skipped. The circuit closes if the probe passes and opens again if it fails.
+    Without `probe_after` an open circuit stays open for the rest of the run.
+
+    `error_types` restricts the failures that count to those error types (say
+    ConnectionError and TimeoutError, for a shared service going down). Untagged
+    tasks are never skipped.
+
+    The scheduler consults and feeds the breaker from one thread at a time (its
+    own thread, or under the dispatch lock with worker dispatch), so the breaker
+    keeps no lock of its own.
+"""
+import time
+from collections import Counter, deque
+
+class CircuitBreaker:
+    """ per-tag circuits that skip the remaining tasks of a tag failing repeatedly
+    """
+    def __init__(self, threshold=5, window=60.0, probe_after=None, error_types=None,
+                 clock=time.monotonic):
+        """ open the circuit of a tag after `threshold` failures within `window` seconds
+        """
+        if threshold < 1 or window <= 0 or (probe_after is not None and probe_after < 0):
+            raise ValueError('breaker needs threshold >= 1, window > 0 and probe_after >= 0')
+        self.threshold = threshold
+        self.window = window
+        self.probe_after = probe_after
+        self.error_types = set(error_types) if error_types else None
+        self._clock = clock
+        # number of times the circuit of each tag opened
+        self.trips = Counter()
+        self.start()
+
+    def start(self):
+        """ close every circuit for a fresh run
+        """
+        # tag → times of its recent failures while closed
+        self._failures = {}
+        # tag → time its circuit opened
+        self._opened = {}
+        # tag → task probing its half-open circuit
+        self._probes = {}
+        self.trips.clear()
+
+    def blocked_by(self, name, tags):
+        """ return the open tag that keeps task `name` from starting, or None; a task
+            allowed through a half-open circuit becomes its probe
+        """
+        now = self._clock()
+        probing = []
+        for tag in tags or ():
+            if tag not in self._opened or self._probes.get(tag) == name:
+                continue
+            if (tag in self._probes or self.probe_after is None
+                    or now - self._opened[tag] < self.probe_after):
+                return tag
+            probing.append(tag)
+        for tag in probing:
+            self._probes[tag] = name
+        return None
+
+    def record(self, name, tags, ok, error_type=None):
+        """ feed the final outcome of task `name` to the circuits of its tags and
+            return the tags whose circuit opened
+        """
+        now = self._clock()
+        opened = []
+        counted = not ok and (self.error_types is None or error_type in self.error_types)
+        for tag in tags or ():
+            if self._probes.get(tag) == name:
+                # the probe decides: a pass closes the circuit, any failure reopens it
+                del self._probes[tag]
+                if ok:
+                    del self._opened[tag]
+                else:
+                    self._opened[tag] = now
+                    opened.append(tag)
+                continue
+            if tag in self._opened or not counted:
+                continue
+            failures = self._failures.setdefault(tag, deque())
+            failures.append(now)
+            while failures[0] <= now - self.window:
+                failures.popleft()
+            if len(failures) >= self.threshold:
+                del self._failures[tag]
+                self._opened[tag] = now
+                opened.append(tag)
+        self.trips.update(opened)
+        return opened
+
+    def is_open(self, tag):
+        """ return whether the circuit of `tag` is open or half-open
+        """
+        return tag in self._opened
@@ -0,0 +1,187 @@
+""" content-addressed cache of task results persisted on disk between runs
+
+    A task marked cache=True is keyed on a digest of its code (its source, or
+    its bytecode when the source is unavailable), the shared state it reads and
+    the results of the tasks it depends on. When the key is in the cache the
+    stored result is restored into state['results'] and the task does not run;
+    otherwise it runs and a result it returns is stored under the key.
+
+    Every entry is a pickle file named after its key. Reading an entry touches
+    it, and evict() removes the least recently used entries once the cache holds
+    more than `max_bytes`. Results that cannot be pickled are not cached.
+
+    Unpickling runs code, so an entry is only loaded when it was written by this
+    cache: each entry starts with an HMAC of its key and contents under a secret
+    kept outside the cache directory (`key_file`, by default
+    ~/.threaded_order/cache.key, readable by its owner only). Entries that do not
+    verify, say files dropped into a cache directory committed to a repository
+    or written by another user, are misses. Whoever can read the key file can
+    still forge entries.
+"""
+import os
+import hmac
+# entries are only unpickled once their HMAC verifies
+import pickle  # nosec B403
+import hashlib
+import secrets
+import inspect
+import logging
+import marshal
+import functools
+
+logger = logging.getLogger(__name__)
+
+default_cache_dir = os.path.join('.threaded_order', 'cache')
+default_key_file = os.path.join('~', '.threaded_order', 'cache.key')
+
+# bumped whenever the way keys are computed changes, so old entries are never hit
+key_version = '1'
+
+class ResultCache:
+    """ on-disk store of pickled task results keyed by content digests
+    """
+    def __init__(self, directory=None, max_bytes=512 * 2**20, key_file=None):
+        """ keep entries under `directory`, evicting beyond `max_bytes`, signed with
+            the secret in `key_file`
+        """
+        self.directory = directory if directory else default_cache_dir
+        self.max_bytes = max_bytes
+        self.key_file = os.path.expanduser(key_file if key_file else default_key_file)
+        self._secret = None
+
+    def _signature(self, key, data):
+        """ return the HMAC of entry `key` holding `data`
+        """
+        if self._secret is None:
+            self._secret = _load_secret(self.key_file)
+        return hmac.new(self._secret, key.encode() + b'\0' + data, hashlib.sha256).digest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.pickle')
+
+    def get(self, key):
+        """ return (True, result) for a stored key and (False, None) otherwise; an
+            unreadable entry is a miss
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                signature, data = handle.read(32), handle.read()
+            if not hmac.compare_digest(signature, self._signature(key, data)):
+                logger.warning(f'ignoring cache entry {path!r}: not written by this cache')
+                return False, None
+            # written by this cache: its HMAC verified
+            result = pickle.loads(data)  # nosec B301
+        except FileNotFoundError:
+            return False, None
+        except Exception as exception:
+            logger.warning(f'ignoring unreadable cache entry {path!r}: {exception}')
+            return False, None
+        try:
+            # the entry is now the most recently used
+            os.utime(path)
+        except OSError:
+            pass
+        return True, result
+
+    def put(self, key, result):
+        """ atomically store `result` under `key` and return whether it was stored
+        """
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exception:
+            logger.debug(f'not caching an unpicklable result: {exception}')
+            return False
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as handle:
+            handle.write(self._signature(key, data))
+            handle.write(data)
+        os.replace(temporary, path)
+        return True
+
+    def evict(self):
+        """ remove the least recently used entries until at most `max_bytes` are
+            stored; return the number of entries removed
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+def _load_secret(path):
+    """ return the secret in `path`, creating it readable by its owner only if missing
+    """
+    try:
+        with open(path, 'rb') as handle:
+            secret = handle.read()
+        if secret:
+            return secret
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    secret = secrets.token_bytes(32)
+    try:
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        # another process created it meanwhile
+        return _load_secret(path)
+    with os.fdopen(descriptor, 'wb') as handle:
+        handle.write(secret)
+    return secret
+
+def code_digest(function):
+    """ return a digest of the code of `function`: its source when available, else
+        its bytecode; wrappers and partials are looked through
+    """
+    digest = hashlib.sha256()
+    function = inspect.unwrap(function)
+    while isinstance(function, functools.partial):
+        digest.update(value_digest((function.args, function.keywords)).encode())
+        function = inspect.unwrap(function.func)
+    digest.update(f'{function.__module__}.{function.__qualname__}'.encode())
+    try:
+        digest.update(inspect.getsource(function).encode())
+    except (OSError, TypeError):
+        code = getattr(function, '__code__', None)
+        if code is not None:
+            digest.update(marshal.dumps(code))
+    return digest.hexdigest()
+
+def value_digest(value):
+    """ return a digest of `value`, pickled or else by its repr
+    """
+    try:
+        data = pickle.dumps(value, protocol=4)
+    except Exception:
+        data = repr(value).encode()
+    return hashlib.sha256(data).hexdigest()
+
+def task_key(code, inputs, parents):
+    """ return the cache key of a task from its `code` digest, its state `inputs`
+        ({key: value}) and the results of its `parents` ({name: result})
+    """
+    digest = hashlib.sha256(f'{key_version}:{code}'.encode())
+    for key in sorted(inputs):
+        digest.update(f'\0state:{key}:{value_digest(inputs[key])}'.encode())
+    for name in sorted(parents):
+        digest.update(f'\0parent:{name}:{value_digest(parents[name])}'.encode())
+    return digest.hexdigest()
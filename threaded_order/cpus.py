@@ -0,0 +1,124 @@
+""" how many CPUs this process may really use, and worker sizing built on it
+
+    os.cpu_count() reports the CPUs of the host. A process may be restricted to
+    fewer by its CPU affinity (taskset, cpusets) or by a cgroup CPU quota (a
+    container started with --cpus=2, say), and a pool sized from the host count
+    then oversubscribes what it gets.
+"""
+import os
+import math
+import threading
+
+cgroup_root = '/sys/fs/cgroup'
+
+def affinity_cpus():
+    """ return the CPUs this process may be scheduled on
+    """
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return list(range(os.cpu_count() or 1))
+
+def cpu_quota(root=cgroup_root, cgroup_file='/proc/self/cgroup'):
+    """ return the CPU limit of this process's cgroups in CPUs (1.5 for a quota of
+        150ms every 100ms), the tightest along the hierarchy, or None if unlimited
+    """
+    quotas = []
+    for directory in _cgroup_dirs(root, cgroup_file):
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, _, period = (_read(os.path.join(directory, 'cpu.max')) or '').partition(' ')
+        if quota.isdigit() and period.isdigit() and int(period):
+            quotas.append(int(quota) / int(period))
+            continue
+        # cgroup v1: a quota of -1 means unlimited
+        quota = _read(os.path.join(directory, 'cpu.cfs_quota_us'))
+        period = _read(os.path.join(directory, 'cpu.cfs_period_us'))
+        if quota and quota.isdigit() and period and period.isdigit() and int(period):
+            quotas.append(int(quota) / int(period))
+    return min(quotas) if quotas else None
+
+def available_cpus():
+    """ return the number of CPUs this process can keep busy: its affinity, capped
+        by its cgroup CPU quota rounded up
+    """
+    cpus = len(affinity_cpus())
+    quota = cpu_quota()
+    if quota:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+def worker_limit(backend='thread', cpus=None):
+    """ return the most workers worth starting on `cpus` usable CPUs: threads get the
+        CPUs plus 4 (at most 32), the stdlib's headroom for tasks that block on I/O;
+        processes get one per CPU
+    """
+    cpus = cpus if cpus else available_cpus()
+    return cpus if backend == 'process' else min(32, cpus + 4)
+
+def auto_workers(width, backend='thread'):
+    """ return (workers, reason) for a DAG at most `width` tasks wide: the worker
+        limit of the usable CPUs, but no more workers than tasks can ever run at once
+    """
+    affinity = len(affinity_cpus())
+    quota = cpu_quota()
+    cpus = available_cpus()
+    limit = worker_limit(backend, cpus)
+    workers = max(1, min(limit, width))
+    quota_text = f'{quota:g} CPU quota' if quota else 'no CPU quota'
+    reason = (f'{cpus} usable CPUs ({affinity} in affinity, {quota_text}), '
+              f'{backend} limit {limit}, DAG at most {width} tasks wide')
+    return workers, reason
+
+class CpuPinner:
+    """ thread pool initializer pinning each new worker thread to the next CPU in
+        `cpus`, round robin (Linux; elsewhere it does nothing)
+    """
+    def __init__(self, cpus=None):
+        self.cpus = list(cpus) if cpus else affinity_cpus()
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            cpu = self.cpus[self._next % len(self.cpus)]
+            self._next += 1
+        try:
+            # pid 0 is the calling thread on Linux
+            os.sched_setaffinity(0, {cpu})
+        except (AttributeError, OSError):
+            pass
+
+def _cgroup_dirs(root, cgroup_file):
+    """ return the cgroup directories of this process that may hold a CPU limit,
+        innermost first
+    """
+    relatives = []
+    for line in (_read(cgroup_file) or '').splitlines():
+        _, controllers, path = line.split(':', 2)
+        if controllers == '':
+            # cgroup v2: a single unified hierarchy
+            relatives.append(path)
+        elif 'cpu' in controllers.split(','):
+            # cgroup v1: mounted as cpu,cpuacct with a cpu symlink on most systems
+            for mount in (controllers, 'cpu'):
+                relatives.append(os.path.join(mount, path.lstrip('/')))
+    directories = []
+    for relative in relatives or ['/']:
+        path = relative.strip('/')
+        while True:
+            directory = os.path.join(root, path) if path else root
+            if directory not in directories:
+                directories.append(directory)
+            if not path:
+                break
+            path = os.path.dirname(path)
+    return directories
+
+def _read(path):
+    """ return the stripped contents of a small file, or None if it cannot be read
+    """
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return handle.read().strip()
+    except OSError:
+        return None
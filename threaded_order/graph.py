@@ -1,6 +1,10 @@
+import sys
+import heapq
 import threading
 import logging
-from collections import defaultdict
+from array import array
+from collections import defaultdict, deque
+from .logger import get_thread_logger
 
 def log_candidates(candidates, number):
     """ log a debug message describing how many candidate nodes were found
@@ -14,122 +18,527 @@ def log_candidates(candidates, number):
         message = f"{base} {', '.join(candidates)}"
     logger.debug(f'requested {number} {message}')
 
+def _topological_order(batch):
+    """ order a `{name: after}` mapping so every node follows its in-batch dependencies
+
+        Uses Kahn's algorithm, linear in nodes plus edges. Returns the order and a
+        sorted list of the nodes that lie on (or between) cycles, if any.
+    """
+    indegree = {name: 0 for name in batch}
+    children = defaultdict(list)
+    for name, after in batch.items():
+        for dep in after:
+            if dep in batch:
+                indegree[name] += 1
+                children[dep].append(name)
+    order = [name for name, count in indegree.items() if not count]
+    for name in order:
+        for child in children[name]:
+            indegree[child] -= 1
+            if not indegree[child]:
+                order.append(child)
+    if len(order) == len(batch):
+        return order, []
+
+    # peel off nodes that are merely downstream of a cycle
+    leftover = {name for name, count in indegree.items() if count}
+    outdegree = {name: sum(child in leftover for child in children[name]) for name in leftover}
+    sinks = [name for name, count in outdegree.items() if not count]
+    for name in sinks:
+        leftover.discard(name)
+        for dep in batch[name]:
+            if dep in leftover:
+                outdegree[dep] -= 1
+                if not outdegree[dep]:
+                    sinks.append(dep)
+    return order, sorted(leftover)
+
+def _augment(start, reach, match):
+    """ find an augmenting path from left vertex `start` in the bipartite graph whose
+        edges are the bits of `reach`, updating `match` (right vertex → left vertex);
+        iterative so deep paths do not hit the recursion limit
+    """
+    seen = 0
+    stack = [[start, reach[start]]]
+    via = []
+    while stack:
+        left, candidates = stack[-1]
+        candidates &= ~seen
+        if not candidates:
+            stack.pop()
+            if via:
+                via.pop()
+            continue
+        right = (candidates & -candidates).bit_length() - 1
+        seen |= 1 << right
+        stack[-1][1] = candidates & ~(1 << right)
+        if match[right] < 0:
+            match[right] = left
+            for level in range(len(via) - 1, -1, -1):
+                match[via[level]] = stack[level][0]
+            return True
+        via.append(right)
+        stack.append([match[right], reach[match[right]]])
+    return False
+
 class DAGraph:
+    """ dependency graph and ready queue of a run
 
+        Not thread-safe: callers serialize access (the Scheduler mutates it from
+        its scheduler thread, or under its dispatch lock with worker dispatch).
+    """
     def __init__(self):
-        """ initialize an empty DAG with parent and child adjacency mappings
+        """ initialize an empty DAG with dependency, child and ready-queue bookkeeping
         """
-        self._parents = defaultdict(list)
-        self._children = defaultdict(set)
+        # nodes whose dependencies are all satisfied, in the order they became ready
+        self._ready_nodes = {}
+        # lane → min-heap of (priority, name) for ready nodes not yet handed out by
+        # get_candidates; every node is in the None lane unless set_lanes() was called
+        self._ready = {None: []}
+        # optional name → priority function; lower priorities are handed out first
+        self._key = None
+        # optional name → lane function
+        self._lane = None
+        # internal synchronization nodes that stand in for a group of dependencies
+        self._barriers = set()
+        self._init_storage()
+
+    def _init_storage(self):
+        """ initialize the name-keyed adjacency storage
+        """
+        # node → dependencies exactly as declared (the only copy of each edge's parent side)
         self._original_parents = {}
+        # node → dependents
+        self._children = defaultdict(set)
+        # node → number of dependencies that have not been removed yet
+        self._indegree = {}
+        # node → declared dependencies dropped by reduce() as implied by other ones
+        self._redundant = {}
 
-    def add(self, name, after=None):
+    def add(self, name, after=None, barrier=False):
         """ add a new node with optional dependencies
 
             All items in `after` must already exist in the DAG.
             Raises ValueError if the node already exists, dependencies are unknown,
-            or the addition would introduce a cycle.
+            or the addition would introduce a cycle. A `barrier` node is an internal
+            synchronization point with nothing to run (see is_barrier).
         """
         logger = logging.getLogger(threading.current_thread().name)
-        after = after or []
+        after = list(dict.fromkeys(after or []))
         logger.debug(f'add {name} dependent on {after}')
-        if name in self._parents:
+        if name in self:
             raise ValueError(f'{name} has already been added')
-        unknowns = [dep for dep in after if dep not in self._parents]
+        unknowns = [dep for dep in after if dep not in self]
         if unknowns:
             raise ValueError(f'{name} depends on unknown {unknowns}')
-        self._parents[name] = []
-        self._original_parents[name] = list(after) if after else []
+        # defensive: future refactor may allow updating deps
+        if self._creates_cycle(name, after):
+            raise ValueError(f'adding {name} will create a cycle')
+        self._insert(name, after)
+        if barrier:
+            self._barriers.add(name)
+        if not after:
+            self._mark_ready(name)
+
+    def add_many(self, records, barriers=(), problems=()):
+        """ add a batch of `(name, after)` records with a single validation pass
+
+            Records may be given in any order; dependencies may refer to nodes already
+            in the DAG or to other nodes of the batch. Duplicate names, unknown
+            dependencies and cycles are detected for the whole batch in linear time
+            and reported together in one ValueError, after the `problems` the caller
+            found in the same batch; nothing is added in that case. Names listed in
+            `barriers` are added as barrier nodes.
+        """
+        logger = logging.getLogger(threading.current_thread().name)
+        known = self.__contains__
+        batch = {}
+        problems = list(problems)
+        duplicates = []
+        for name, after in records:
+            if known(name) or name in batch:
+                duplicates.append(name)
+                continue
+            batch[name] = list(dict.fromkeys(after or []))
+        if duplicates:
+            problems.append(f'{duplicates} have already been added')
+
+        # records already listed after their dependencies need no reordering
+        seen = set()
+        forward = False
+        for name, after in batch.items():
+            unknowns = []
+            for dep in after:
+                if dep in seen or known(dep):
+                    continue
+                if dep in batch:
+                    forward = True
+                else:
+                    unknowns.append(dep)
+            if unknowns:
+                problems.append(f'{name} depends on unknown {unknowns}')
+            seen.add(name)
+
+        order, cyclic = _topological_order(batch) if forward else (list(batch), [])
+        if cyclic:
+            problems.append(f'adding {cyclic} will create a cycle')
+        if problems:
+            raise ValueError('; '.join(problems))
+
+        logger.debug(f'add {len(order)} nodes')
+        self._barriers.update(name for name in barriers if name in batch)
+        for name in order:
+            after = batch[name]
+            self._insert(name, after)
+            if not after:
+                self._mark_ready(name)
+
+    def _insert(self, name, after):
+        """ store a new node, its declared dependencies and its dependency counter
+        """
+        self._original_parents[name] = after
         for dep in after:
-            self._parents[name].append(dep)
             self._children[dep].add(name)
-        # defensive: future refactor may allow updating deps
-        if self._has_cycle():
-            # rollback this node to keep DAG consistent
+        self._indegree[name] = len(after)
+
+    def reduce(self):
+        """ drop dependencies that are implied by other dependencies (transitive reduction)
+
+            An edge a → c is redundant when c also depends on some b that itself
+            (transitively) depends on a. Redundant edges are removed from the
+            execution graph only; original_parents_of still reports every declared
+            dependency. Ancestor sets are kept as integer bitsets over a topological
+            numbering and released once all dependents of a node were visited.
+            Returns the number of edges removed.
+        """
+        logger = logging.getLogger(threading.current_thread().name)
+        parents = {name: self.parents_of(name) for name in self.nodes()}
+        order, _ = _topological_order(parents)
+        index = {name: position for position, name in enumerate(order)}
+        pending = {name: 0 for name in order}
+        for after in parents.values():
             for dep in after:
-                self._children[dep].discard(name)
-            self._parents.pop(name, None)
-            raise ValueError(f'adding {name} will create a cycle')
+                pending[dep] += 1
+
+        ancestors = {}
+        redundant = []
+        for name in order:
+            after = parents[name]
+            reach = 0
+            for dep in after:
+                reach |= ancestors[dep]
+            bits = reach
+            for dep in after:
+                if reach >> index[dep] & 1:
+                    redundant.append((dep, name))
+                bits |= 1 << index[dep]
+                pending[dep] -= 1
+                if not pending[dep]:
+                    del ancestors[dep]
+            if pending[name]:
+                ancestors[name] = bits
+
+        self._drop_edges(redundant)
+        logger.debug(f'transitive reduction removed {len(redundant)} redundant edges')
+        return len(redundant)
+
+    def _drop_edges(self, edges):
+        """ remove `(parent, child)` edges from the execution graph
+        """
+        for dep, name in edges:
+            self._children[dep].discard(name)
+            self._redundant.setdefault(name, set()).add(dep)
+            if self._release(name) == 0:
+                self._mark_ready(name)
+
+    def _mark_ready(self, name):
+        """ record that all dependencies of `name` are satisfied and queue it
+        """
+        self._ready_nodes[name] = None
+        heap = self._ready[self._lane(name)] if self._lane else self._ready[None]
+        heapq.heappush(heap, (self._key(name) if self._key else 0, name))
+
+    def queued(self, lane=None):
+        """ return about how many ready nodes of `lane` wait to be handed out (entries
+            of nodes removed before they were handed out are counted until skipped)
+        """
+        return len(self._ready.get(lane, ()))
+
+    def requeue(self, name):
+        """ put a ready node back on the ready queue after get_candidates handed it out,
+            for a caller that could not run it yet; nodes no longer ready are ignored
+        """
+        if name in self._ready_nodes:
+            self._mark_ready(name)
+
+    def set_priority(self, key=None):
+        """ order ready nodes by `key(name)` (lowest first), ties broken by name
+
+            With no key, ready nodes are handed out in name order. Nodes already
+            queued are re-prioritized.
+        """
+        self._key = key
+        self._requeue()
+
+    def set_lanes(self, lane=None):
+        """ queue ready nodes separately by `lane(name)`, one heap per lane
+
+            get_candidates(..., lane=x) then only hands out nodes of lane x, so a
+            caller with separate capacity per lane never scans nodes of a lane it
+            cannot serve. Nodes already queued are moved to their lane.
+        """
+        self._lane = lane
+        self._requeue()
+
+    def _requeue(self):
+        """ rebuild the ready heaps after the priority or lane function changed
+        """
+        queued = [name for heap in self._ready.values() for _, name in heap]
+        self._ready = defaultdict(list) if self._lane else {None: []}
+        for name in queued:
+            heap = self._ready[self._lane(name)] if self._lane else self._ready[None]
+            heap.append((self._key(name) if self._key else 0, name))
+        for heap in self._ready.values():
+            heapq.heapify(heap)
+
+    def longest_paths(self, weight):
+        """ return {node: heaviest path from the node to a leaf}, node included
+
+            `weight(name)` gives the cost of each node; edges are free. Computed
+            over the remaining nodes in reverse topological order, O(nodes + edges).
+        """
+        order, _ = _topological_order({name: self.parents_of(name) for name in self.nodes()})
+        paths = {}
+        for name in reversed(order):
+            tail = max((paths[child] for child in self._iter_children(name) if child in paths),
+                       default=0)
+            paths[name] = weight(name) + tail
+        return paths
+
+    def max_width(self, exact_limit=1000):
+        """ return the most remaining nodes that can ever be ready at once: the size of
+            the largest set of nodes none of which depends on another (the maximum
+            antichain)
+
+            Exact up to `exact_limit` nodes by Dilworth's theorem: the width is the
+            number of nodes minus a maximum matching between each node and the nodes
+            it reaches, with reachability kept as integer bitsets. Larger graphs get
+            the linear upper bound of nodes minus the longest chain plus one.
+        """
+        order, _ = _topological_order({name: self.parents_of(name) for name in self.nodes()})
+        if not order:
+            return 0
+        if len(order) > exact_limit:
+            return len(order) - max(self.longest_paths(lambda name: 1).values()) + 1
+        index = {name: position for position, name in enumerate(order)}
+        reach = [0] * len(order)
+        for name in reversed(order):
+            bits = 0
+            for child in self._iter_children(name):
+                if child in index:
+                    bits |= reach[index[child]] | 1 << index[child]
+            reach[index[name]] = bits
+        match = [-1] * len(order)
+        matched = sum(_augment(start, reach, match) for start in range(len(order)))
+        return len(order) - matched
 
     def remove(self, name):
         """ remove a completed node and detach it from all dependent children
 
-            Cleans up parent and child relationships and drops the node completely
-            once it has no remaining edges.
+            Decrements the remaining-dependency counter of each child and queues
+            the children whose counter drops to zero. The node is dropped
+            completely once it has no remaining dependencies.
         """
-        logger = logging.getLogger(threading.current_thread().name)
-        for child in self._children.pop(name, ()):
-            logger.debug(f'removing {name} as a dependency from {child}')
-            try:
-                self._parents[child].remove(name)
-            except ValueError:
-                # defensive: graph might already be partially cleaned
-                pass
-
-        if name in self._parents and not self._parents[name]:
-            logger.debug(f'removing {name} from dependency graph')
-            self._parents.pop(name, None)
+        logger = get_thread_logger()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for child in self._pop_children(name):
+            if debug:
+                logger.debug(f'removing {name} as a dependency from {child}')
+            if self._release(child) == 0:
+                self._mark_ready(child)
+
+        if name in self and not self._remaining(name):
+            if debug:
+                logger.debug(f'removing {name} from dependency graph')
+            self._discard(name)
+
+    def _pop_children(self, name):
+        """ detach and return the dependents of `name`
+        """
+        return self._children.pop(name, ())
+
+    def _release(self, name):
+        """ decrement and return the remaining-dependency counter of `name`
+
+            Returns None if the node is unknown or has no remaining dependencies.
+        """
+        remaining = self._indegree.get(name)
+        if not remaining:
+            # defensive: graph might already be partially cleaned
+            return None
+        self._indegree[name] = remaining - 1
+        return remaining - 1
+
+    def _remaining(self, name):
+        """ return the number of dependencies of `name` not yet removed
+        """
+        return self._indegree[name]
+
+    def _discard(self, name):
+        """ drop a node from the graph; its declared dependencies are kept
+        """
+        del self._indegree[name]
+        self._ready_nodes.pop(name, None)
+
+    def _iter_children(self, name):
+        """ iterate over the dependents of `name`
+        """
+        return iter(self._children.get(name, ()))
+
+    def descendants_of(self, name):
+        """ return every node reachable from `name` through its dependents
+
+            Iterative breadth-first walk, O(descendants + their edges); children
+            are visited in name order so the result is deterministic.
+        """
+        visited = {name}
+        order = []
+        queue = deque([name])
+        while queue:
+            for child in sorted(self._iter_children(queue.popleft())):
+                if child not in visited and child in self:
+                    visited.add(child)
+                    order.append(child)
+                    queue.append(child)
+        return order
+
+    def prune(self, names):
+        """ drop nodes that will never run, whatever dependencies they still have
+
+            Their dependents are detached too; callers prune whole descendant sets.
+        """
+        for name in names:
+            if name in self:
+                self._pop_children(name)
+                self._discard(name)
 
     def ready(self, active=None):
         """ return a list of nodes whose dependencies are satisfied and not active
         """
         if active is None:
             active = set()
-        return [name for name, deps in self._parents.items() if not deps and name not in active]
+        return [name for name in self._ready_nodes if name not in active]
 
-    def get_candidates(self, active, number, sort=True):
-        """ return up to `number` ready nodes, optionally sorted for stable scheduling
+    def get_candidates(self, active, number, sort=True, lane=None):
+        """ return up to `number` ready nodes in priority order, skipping active ones
 
+            Candidates are popped off the ready queue, so the caller is expected to
+            run (or otherwise account for) every node returned; each node is handed
+            out once. Costs O(k log n) for k candidates. `sort` is accepted for
+            backward compatibility; the ready queue always yields nodes by priority
+            (see set_priority) and then by name. Only nodes of `lane` are handed out
+            (see set_lanes).
             Also logs the candidate list for visibility.
         """
-        candidates = self.ready(active)
-        if sort:
-            candidates = sorted(candidates)
-        log_candidates(candidates, number)
-        return candidates[:number]
-
-    def _has_cycle(self):
-        """ return True if DAGraph contains a cycle
-        """
-        visited = set()
-        stack = set()
-
-        def visit(node):
-            if node in stack:
-                return True
-            if node in visited:
-                return False
-            visited.add(node)
-            stack.add(node)
-            for neighbor in self._parents[node]:
-                if visit(neighbor):
-                    return True
-            stack.remove(node)
+        candidates = []
+        held = []
+        ready = self._ready.get(lane, ())
+        while ready and len(candidates) < number:
+            entry = heapq.heappop(ready)
+            name = entry[1]
+            if name not in self._ready_nodes:
+                # stale entry for a node removed before it was handed out
+                continue
+            if name in active:
+                held.append(entry)
+                continue
+            candidates.append(name)
+        for entry in held:
+            heapq.heappush(ready, entry)
+        if get_thread_logger().isEnabledFor(logging.DEBUG):
+            log_candidates(candidates, number)
+        return candidates
+
+    def _creates_cycle(self, name, after):
+        """ return True if making `name` depend on `after` would introduce a cycle
+
+            Only the descendants of `name` are explored, iteratively, so the check
+            is constant time for a brand new node (it has no descendants yet) and
+            never recurses regardless of how deep the graph is.
+        """
+        targets = set(after)
+        if name in targets:
+            return True
+        if name not in self:
             return False
-        return any(visit(node) for node in self._parents)
+        visited = {name}
+        stack = [name]
+        while stack:
+            for child in self._iter_children(stack.pop()):
+                if child in targets:
+                    return True
+                if child not in visited:
+                    visited.add(child)
+                    stack.append(child)
+        return False
+
+    def is_barrier(self, name):
+        """ return True if `name` is a barrier node
+
+            Barrier nodes let a group of nodes depend on another group with N + M
+            edges instead of N × M; they have nothing to run and are not reported
+            as tasks.
+        """
+        return name in self._barriers
+
+    def barriers(self):
+        """ return a sorted list of the barrier nodes still in the graph
+        """
+        return sorted(name for name in self._barriers if name in self)
 
     def is_empty(self):
         """ return True if the DAGraph has no nodes
         """
-        return not self._parents and not self._children
+        return not len(self)
+
+    def __contains__(self, name):
+        """ return True if `name` is a node of the graph
+        """
+        return name in self._indegree
+
+    def __len__(self):
+        """ return the number of nodes in the graph
+        """
+        return len(self._indegree)
 
     def __repr__(self):
         """ return a human-readable representation of the dependency graph
         """
-        parents = '\n'.join(f'{n}: {self._parents[n]}' for n in sorted(self._parents))
+        nodes = sorted(self.nodes())
+        parents = '\n'.join(f'{n}: {self.parents_of(n)}' for n in nodes)
         children = '\n'.join(
-            f'{n}: {sorted(list(self._children[n]))}' for n in sorted(self._children))
+            f'{n}: {sorted(self.children_of(n))}' for n in nodes if self.children_of(n))
         return f'Parents:\n{parents}\nChildren:\n{children}'
 
     def nodes(self):
         """ return an iterable of node names in the graph
         """
-        return self._parents.keys()
+        return self._indegree.keys()
 
     def parents_of(self, name):
-        """ return a list of parent nodes (dependencies) for a given node
+        """ return a list of parent nodes (dependencies) not yet removed for a given node
+        """
+        if name not in self:
+            return []
+        return [dep for dep in self.dependencies_of(name) if dep in self]
+
+    def dependencies_of(self, name):
+        """ return a list of the dependencies enforced for a given node, removed or not
+
+            Same as original_parents_of unless reduce() dropped redundant edges.
         """
-        return list(self._parents.get(name, []))
+        redundant = self._redundant.get(name, ())
+        return [dep for dep in self._original_parents.get(name, []) if dep not in redundant]
 
     def children_of(self, name):
         """ return a list of child nodes (dependents) for a given node
@@ -140,3 +549,172 @@ class DAGraph:
         """ return a list of original parent nodes (dependencies) for a given node
         """
         return list(self._original_parents.get(name, []))
+
+
+class CompactDAGraph(DAGraph):
+    """ memory-compact DAGraph for very large graphs
+
+        Node names are interned and mapped to dense integer ids. Declared
+        dependencies are stored once, CSR style, in a flat `array('i')` of
+        parent ids indexed by per-node offsets; dependents are kept as linked
+        edge lists in parallel `array('i')` buffers. Only ready nodes are held
+        in Python containers. Behaves exactly like DAGraph.
+    """
+    def _init_storage(self):
+        """ initialize the integer-indexed adjacency storage
+        """
+        # name → dense id, and id → interned name
+        self._ids = {}
+        self._names = []
+        # declared parents of node i are _parent_ids[_parent_start[i]:_parent_start[i + 1]];
+        # an id stored bit-inverted (negative) marks an edge dropped by reduce()
+        self._parent_start = array('q', [0])
+        self._parent_ids = array('i')
+        # first child edge of each node (-1 when none); edges link through _edge_next
+        self._child_head = array('i')
+        self._edge_next = array('i')
+        self._edge_child = array('i')
+        # remaining-dependency counter per node, -1 once the node is removed
+        self._indegree = array('i')
+        self._size = 0
+
+    def _insert(self, name, after):
+        """ intern a new node and append its edges to the adjacency arrays
+        """
+        name = sys.intern(name)
+        node = len(self._names)
+        parents = [self._ids[dep] for dep in after]
+        self._ids[name] = node
+        self._names.append(name)
+        self._parent_ids.extend(parents)
+        self._parent_start.append(len(self._parent_ids))
+        self._child_head.append(-1)
+        for parent in parents:
+            self._edge_child.append(node)
+            self._edge_next.append(self._child_head[parent])
+            self._child_head[parent] = len(self._edge_child) - 1
+        self._indegree.append(len(parents))
+        self._size += 1
+
+    def _drop_edges(self, edges):
+        """ remove `(parent, child)` edges from the execution graph
+        """
+        dropped = defaultdict(set)
+        for dep, name in edges:
+            dropped[self._ids[dep]].add(self._ids[name])
+        for parent, children in dropped.items():
+            # relink the parent's child list without the dropped edges
+            edge = self._child_head[parent]
+            self._child_head[parent] = -1
+            while edge != -1:
+                following = self._edge_next[edge]
+                if self._edge_child[edge] not in children:
+                    self._edge_next[edge] = self._child_head[parent]
+                    self._child_head[parent] = edge
+                edge = following
+            for child in children:
+                start, end = self._parent_start[child], self._parent_start[child + 1]
+                # array.index() takes no bounds before Python 3.10
+                position = start + self._parent_ids[start:end].index(parent)
+                self._parent_ids[position] = ~parent
+                if self._release(self._names[child]) == 0:
+                    self._mark_ready(self._names[child])
+
+    def _child_ids(self, node):
+        """ iterate over the ids of the dependents of node id `node`
+        """
+        edge = self._child_head[node]
+        while edge != -1:
+            yield self._edge_child[edge]
+            edge = self._edge_next[edge]
+
+    def _pop_children(self, name):
+        """ detach and return the dependents of `name`
+        """
+        node = self._ids.get(name)
+        if node is None:
+            return []
+        children = [self._names[child] for child in self._child_ids(node)]
+        self._child_head[node] = -1
+        return children
+
+    def _release(self, name):
+        """ decrement and return the remaining-dependency counter of `name`
+
+            Returns None if the node is unknown or has no remaining dependencies.
+        """
+        node = self._ids.get(name)
+        if node is None or self._indegree[node] <= 0:
+            # defensive: graph might already be partially cleaned
+            return None
+        self._indegree[node] -= 1
+        return self._indegree[node]
+
+    def _remaining(self, name):
+        """ return the number of dependencies of `name` not yet removed
+        """
+        return self._indegree[self._ids[name]]
+
+    def _discard(self, name):
+        """ drop a node from the graph; its declared dependencies are kept
+        """
+        self._indegree[self._ids[name]] = -1
+        self._size -= 1
+        self._ready_nodes.pop(name, None)
+
+    def _iter_children(self, name):
+        """ iterate over the dependents of `name`
+        """
+        node = self._ids.get(name)
+        if node is None:
+            return iter(())
+        return (self._names[child] for child in self._child_ids(node))
+
+    def __contains__(self, name):
+        """ return True if `name` is a node of the graph
+        """
+        node = self._ids.get(name)
+        return node is not None and self._indegree[node] >= 0
+
+    def __len__(self):
+        """ return the number of nodes in the graph
+        """
+        return self._size
+
+    def nodes(self):
+        """ return an iterable of node names in the graph
+        """
+        return [name for name, remaining in zip(self._names, self._indegree) if remaining >= 0]
+
+    def parents_of(self, name):
+        """ return a list of parent nodes (dependencies) not yet removed for a given node
+        """
+        if name not in self:
+            return []
+        return [dep for dep in self.dependencies_of(name) if dep in self]
+
+    def _parent_slice(self, name):
+        """ return the stored (possibly bit-inverted) parent ids of `name`
+        """
+        node = self._ids.get(name)
+        if node is None:
+            return []
+        return self._parent_ids[self._parent_start[node]:self._parent_start[node + 1]]
+
+    def dependencies_of(self, name):
+        """ return a list of the dependencies enforced for a given node, removed or not
+
+            Same as original_parents_of unless reduce() dropped redundant edges.
+        """
+        return [self._names[parent] for parent in self._parent_slice(name) if parent >= 0]
+
+    def children_of(self, name):
+        """ return a list of child nodes (dependents) for a given node
+        """
+        return list(self._iter_children(name))
+
+    def original_parents_of(self, name):
+        """ return a list of original parent nodes (dependencies) for a given node
+        """
+        return [self._names[parent if parent >= 0 else ~parent]
+                for parent in self._parent_slice(name)]
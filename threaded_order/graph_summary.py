@@ -8,17 +8,23 @@ by the CLI to display the dependency graph.
 def _graph_get_nodes_and_ids(dag):
     """ return a sorted list of node names and a stable numeric ID mapping.
 
-        IDs are deterministic based on sorted node order.
+        IDs are deterministic based on sorted node order; barrier nodes sort
+        after all task nodes.
         Returns:
             nodes: [name, ...]
             ids: {name: numeric_id}
     """
-    nodes = sorted(dag.nodes())
+    nodes = sorted(dag.nodes(), key=lambda n: (dag.is_barrier(n), n))
     ids = {}
     for idx, name in enumerate(nodes):
         ids[name] = idx
     return nodes, ids
 
+def _graph_label(name, ids, barriers):
+    """ return the display label of a node: [id] for tasks, <name> for barrier groups
+    """
+    return f'<{name}>' if name in barriers else f'[{ids[name]}]'
+
 def _graph_build_indegree_and_adj(dag, nodes):
     """ build indegree table and adjacency (outgoing edges) table.
 
@@ -126,6 +132,17 @@ def _graph_format_header(num_nodes, num_edges, roots, leaves, levels_count, ids)
     lines.append(f'Levels: {levels_count}')
     return lines
 
+def _graph_format_groups(barriers, indegree_parents, adj, ids):
+    """ format the Groups: section:
+            <tag:name> [member_id], ... -> [dependent_id], ...
+    """
+    lines = ['Groups:']
+    for name in barriers:
+        members = ', '.join(_graph_label(m, ids, barriers) for m in indegree_parents[name])
+        dependents = ', '.join(_graph_label(c, ids, barriers) for c in adj[name]) or '(none)'
+        lines.append(f'  <{name}> {members} -> {dependents}')
+    return lines
+
 def _graph_format_nodes(nodes, ids):
     """ format the Nodes: section:
             [id] node_name
@@ -135,9 +152,9 @@ def _graph_format_nodes(nodes, ids):
         lines.append(f'  [{ids[name]}] {name}')
     return lines
 
-def _graph_format_edges(nodes, adj, ids):
+def _graph_format_edges(nodes, adj, ids, barriers=()):
     """ format the Edges: section:
-            [src_id] -> [child_id], ...
+            [src_id] -> [child_id], <group>, ...
             or
             [src_id] -> (none)
     """
@@ -145,17 +162,18 @@ def _graph_format_edges(nodes, adj, ids):
     for name in nodes:
         children = adj[name]
         if children:
-            targets = ', '.join(f'[{ids[c]}]' for c in children)
+            targets = ', '.join(_graph_label(c, ids, barriers) for c in children)
         else:
             targets = '(none)'
         lines.append(f'  [{ids[name]}] -> {targets}')
     return lines
 
-def _graph_compute_longest_chains(nodes, levels, adj):
+def _graph_compute_longest_chains(nodes, levels, adj, barriers=()):
     """ compute the longest dependency chains in the DAG.
 
     Uses the topological levels to derive a topo order, then computes the
-    longest distance (in edges) from any root to each node.
+    longest distance (in edges) from any root to each node. Edges into a
+    barrier node do not count, and barrier nodes are left out of the chains.
 
     Returns:
         max_len: int, length in edges of the longest chain
@@ -174,8 +192,8 @@ def _graph_compute_longest_chains(nodes, levels, adj):
 
     for src in topo_order:
         for dst in adj[src]:
-            cand = dist[src] + 1
-            if cand > dist[dst]:
+            cand = dist[src] + (0 if dst in barriers else 1)
+            if cand > dist[dst] or (dst in barriers and prev[dst] is None):
                 dist[dst] = cand
                 prev[dst] = src
 
@@ -194,7 +212,8 @@ def _graph_compute_longest_chains(nodes, levels, adj):
         chain = []
         cur = end
         while cur is not None:
-            chain.append(cur)
+            if cur not in barriers:
+                chain.append(cur)
             cur = prev[cur]
         chains.append(list(reversed(chain)))
 
@@ -256,8 +275,12 @@ def format_graph_summary(dag):
 
             Edges:
             [0] -> [2]
+            [1] -> <tag:setup>
             ...
 
+            Groups:
+            <tag:setup> [1] -> [3], [4]
+
             Stats:
             Longest chain length (edges): 3
             Longest chains:
@@ -270,15 +293,22 @@ def format_graph_summary(dag):
         Returns:
             A single string containing the formatted summary.
     """
-    nodes, ids = _graph_get_nodes_and_ids(dag)
+    all_nodes, ids = _graph_get_nodes_and_ids(dag)
+    barriers = set(dag.barriers())
+    # barrier nodes are internal; they appear as groups rather than as nodes
+    nodes = [name for name in all_nodes if name not in barriers]
 
     if not nodes:
         return 'Graph: 0 nodes, 0 edges'
 
-    indegree, adj, num_edges = _graph_build_indegree_and_adj(dag, nodes)
+    indegree, adj, num_edges = _graph_build_indegree_and_adj(dag, all_nodes)
+    for name in adj:
+        adj[name].sort(key=lambda n: ids[n])
     roots, leaves = _graph_find_roots_and_leaves(nodes, indegree, adj)
-    levels = _graph_compute_levels(nodes, roots, indegree, adj, ids)
-    max_chain_len, chains = _graph_compute_longest_chains(nodes, levels, adj)
+    all_levels = _graph_compute_levels(all_nodes, roots, indegree, adj, ids)
+    max_chain_len, chains = _graph_compute_longest_chains(all_nodes, all_levels, adj, barriers)
+    levels = [[n for n in level if n not in barriers] for level in all_levels]
+    levels = [level for level in levels if level]
     high_in, high_out = _graph_find_hotspots(nodes, indegree, adj)
 
     lines = []
@@ -297,9 +327,14 @@ def format_graph_summary(dag):
     lines.extend(_graph_format_nodes(nodes, ids))
     lines.append('')
 
-    lines.extend(_graph_format_edges(nodes, adj, ids))
+    lines.extend(_graph_format_edges(nodes, adj, ids, barriers))
     lines.append('')
 
+    if barriers:
+        parents = {name: sorted(dag.parents_of(name), key=lambda n: ids[n]) for name in barriers}
+        lines.extend(_graph_format_groups(sorted(barriers), parents, adj, ids))
+        lines.append('')
+
     stats_lines = _graph_format_stats(
         max_chain_len=max_chain_len,
         chains=chains,
@@ -0,0 +1,107 @@
+import os
+import json
+import math
+import logging
+
+logger = logging.getLogger(__name__)
+
+default_history_file = os.path.join('.threaded_order', 'history.json')
+
+class History:
+    """ per-task run history (recent durations and last outcome) persisted as JSON
+        between runs
+    """
+    def __init__(self, path=None, samples=20):
+        """ load history from `path`, keeping at most `samples` durations per task
+        """
+        self.path = path if path else default_history_file
+        self._samples = samples
+        # task name → most recent durations in seconds, oldest first
+        self._durations = {}
+        # task name → 'passed', 'failed' or 'skipped' the last time it was run
+        self._outcomes = {}
+        self.load()
+
+    def load(self):
+        """ read the history file; a missing or unreadable file yields an empty history
+        """
+        try:
+            with open(self.path, encoding='utf-8') as handle:
+                data = json.load(handle)
+            durations = data.get('durations', {})
+            outcomes = data.get('outcomes', {})
+        except FileNotFoundError:
+            durations = outcomes = {}
+        except (OSError, ValueError, AttributeError) as exception:
+            logger.warning(f'ignoring unreadable history file {self.path!r}: {exception}')
+            durations = outcomes = {}
+        self._durations = {name: list(samples)[-self._samples:]
+                           for name, samples in durations.items() if samples}
+        self._outcomes = dict(outcomes) if isinstance(outcomes, dict) else {}
+
+    def save(self):
+        """ atomically write the history file, creating its directory if needed
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump({'durations': self._durations, 'outcomes': self._outcomes}, handle,
+                      indent=1, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def record(self, name, duration):
+        """ add a duration sample for task `name`, dropping the oldest beyond the limit
+        """
+        samples = self._durations.setdefault(name, [])
+        samples.append(round(duration, 6))
+        del samples[:-self._samples]
+
+    def record_outcome(self, name, outcome):
+        """ remember the outcome of the latest run of task `name`: 'passed', 'failed'
+            or 'skipped'
+        """
+        self._outcomes[name] = outcome
+
+    def outcome(self, name, default=None):
+        """ return the outcome of the latest run of `name`, or `default` if never run
+        """
+        return self._outcomes.get(name, default)
+
+    def failed(self):
+        """ return the sorted names of the tasks that failed or were skipped the last
+            time they were run
+        """
+        return sorted(name for name, outcome in self._outcomes.items() if outcome != 'passed')
+
+    def duration(self, name, default=None):
+        """ return the mean of the recent durations of `name`, or `default` if never run
+        """
+        samples = self._durations.get(name)
+        if not samples:
+            return default
+        return sum(samples) / len(samples)
+
+    def percentile(self, name, fraction, default=None, minimum=1):
+        """ return the `fraction` percentile (nearest rank) of the recent durations of
+            `name`, or `default` with fewer than `minimum` samples
+        """
+        samples = sorted(self._durations.get(name, ()))
+        if not samples or len(samples) < minimum:
+            return default
+        return samples[max(0, math.ceil(fraction * len(samples)) - 1)]
+
+    def mean(self, default=None):
+        """ return the mean duration across all known tasks, or `default` if empty
+        """
+        means = [sum(samples) / len(samples) for samples in self._durations.values()]
+        if not means:
+            return default
+        return sum(means) / len(means)
+
+    def __contains__(self, name):
+        return name in self._durations
+
+    def __len__(self):
+        return len(self._durations)
@@ -68,6 +68,17 @@ if HAS_COLOR:
 
             return msg
 
+_thread_loggers = threading.local()
+
+def get_thread_logger():
+    """ return the logger named after the current thread, looked up once per thread
+    """
+    try:
+        return _thread_loggers.logger
+    except AttributeError:
+        _thread_loggers.logger = logging.getLogger(threading.current_thread().name)
+        return _thread_loggers.logger
+
 class ThreadProxyLogger:
     def __getattr__(self, name):
         return getattr(logging.getLogger(threading.current_thread().name), name)
@@ -0,0 +1,145 @@
+""" ready-queue policies: the order in which ready tasks are handed to workers
+
+    A policy is any object with two methods:
+
+        prepare(graph, options, history)
+            called once by Scheduler.start() before any task is handed out;
+            `options` maps every task name, in registration order, to its
+            register() options (tags, after_tags, priority) and `history` is a
+            History of previous runs, or None when the scheduler keeps none
+
+        key(name)
+            return a sortable priority for a ready task; lower keys are handed
+            out first and ties are broken by name
+
+    key() is called once per task as it becomes ready and the ready queue is a
+    heap, so every pick costs O(log n) whatever the policy. Barrier nodes never
+    run; their key only affects when the barrier is cleared.
+"""
+
+class NamePolicy:
+    """ hand out ready tasks in name order (the default)
+    """
+    uses_history = False
+
+    def prepare(self, graph, options, history):
+        pass
+
+    def key(self, name):
+        return 0
+
+
+class FifoPolicy(NamePolicy):
+    """ hand out ready tasks in registration order
+    """
+    def prepare(self, graph, options, history):
+        self._order = {name: index for index, name in enumerate(options)}
+
+    def key(self, name):
+        return self._order.get(name, -1)
+
+
+class PriorityPolicy(NamePolicy):
+    """ hand out ready tasks by their `priority` option, highest first
+    """
+    def prepare(self, graph, options, history):
+        self._priorities = {name: option.get('priority') or 0 for name, option in options.items()}
+
+    def key(self, name):
+        return -self._priorities.get(name, 0)
+
+
+class MostDependentsPolicy(NamePolicy):
+    """ hand out first the ready tasks that gate the most direct dependents
+        (dependents reached through a tag barrier count individually)
+    """
+    def prepare(self, graph, options, history):
+        self._graph = graph
+
+    def key(self, name):
+        count = 0
+        for child in self._graph.children_of(name):
+            count += len(self._graph.children_of(child)) if self._graph.is_barrier(child) else 1
+        return -count
+
+
+class ShortestFirstPolicy(NamePolicy):
+    """ hand out the ready tasks with the shortest mean recorded duration first;
+        tasks never seen get the overall mean
+    """
+    uses_history = True
+
+    def prepare(self, graph, options, history):
+        self._history = history
+        self._unknown = history.mean(default=1.0)
+
+    def key(self, name):
+        return self._history.duration(name, default=self._unknown)
+
+
+class CriticalPathPolicy(NamePolicy):
+    """ hand out first the ready tasks heading the longest remaining chain, each
+        task weighted by its mean recorded duration (unknown tasks by the overall mean)
+    """
+    uses_history = True
+
+    def prepare(self, graph, options, history):
+        unknown = history.mean(default=1.0)
+
+        def weight(name):
+            if graph.is_barrier(name):
+                return 0
+            return history.duration(name, default=unknown)
+
+        self._paths = graph.longest_paths(weight)
+
+    def key(self, name):
+        return -self._paths.get(name, 0)
+
+
+class FailedFirstPolicy(NamePolicy):
+    """ hand out first the tasks that failed or were skipped in the previous run, and
+        the tasks they depend on, so failures show up early; ties, and every other
+        task, are ordered by `policy` (a policy name or object, default name)
+    """
+    uses_history = True
+
+    def __init__(self, policy=None):
+        self.policy = get_policy(policy)
+
+    def prepare(self, graph, options, history):
+        self.policy.prepare(graph, options, history)
+        failed = [name for name in history.failed() if name in graph]
+        # the failed tasks can only run once everything upstream of them ran
+        self._first = set()
+        while failed:
+            name = failed.pop()
+            if name not in self._first:
+                self._first.add(name)
+                failed.extend(graph.dependencies_of(name))
+
+    def key(self, name):
+        return (name not in self._first, self.policy.key(name))
+
+
+policies = {
+    'name': NamePolicy,
+    'fifo': FifoPolicy,
+    'priority': PriorityPolicy,
+    'most-dependents': MostDependentsPolicy,
+    'shortest-first': ShortestFirstPolicy,
+    'critical-path': CriticalPathPolicy,
+}
+
+def get_policy(policy):
+    """ return a policy object for a policy name, or `policy` itself if it is one
+    """
+    if policy is None:
+        return NamePolicy()
+    if isinstance(policy, str):
+        if policy not in policies:
+            raise ValueError(f'unknown policy {policy!r}; expected one of {list(policies)}')
+        return policies[policy]()
+    if not (callable(getattr(policy, 'prepare', None)) and callable(getattr(policy, 'key', None))):
+        raise ValueError('policy must provide prepare(graph, options, history) and key(name)')
+    return policy
@@ -0,0 +1,150 @@
+""" process-pool backend: run tasks in worker processes instead of threads
+
+    CPU-bound tasks holding the GIL do not scale across threads; with
+    Scheduler(backend='process') every task runs in a pool of worker processes
+    while scheduling stays on the parent's threads. Tasks and their return values
+    must be picklable: task functions have to be importable module-level
+    functions, and their modules are imported once per worker process when the
+    pool starts (by the forkserver itself where available, so forked workers
+    inherit them).
+
+    A `with_state` task gets a snapshot of the scheduler state taken when it is
+    submitted, so it sees the results of every task it depends on. When it
+    finishes, every top-level key it added, deleted or changed (in place or by
+    reassignment) is merged back into the shared state as a whole value, last
+    writer wins. The `results` key is owned by the scheduler and is never merged
+    back; a task's return value is stored there as with the thread backend.
+"""
+import sys
+import copy
+import time
+import threading
+import multiprocessing
+from typing import Any, NamedTuple
+from importlib import import_module
+from importlib.util import spec_from_file_location, module_from_spec
+from concurrent.futures import ProcessPoolExecutor
+
+# state keys that are never copied to or merged back from a worker process
+private_keys = ('_state_lock', 'results')
+
+class Outcome(NamedTuple):
+    """ what a worker process sends back for one task
+    """
+    name: str
+    ok: bool
+    error_type: Any
+    error: Any
+    result: Any
+    updates: dict
+    removed: list
+    duration: float
+    worker: str
+
+def default_start_method():
+    """ return 'forkserver' where the platform has it, else 'spawn'
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return 'forkserver'
+    return 'spawn'
+
+def task_modules(functions):
+    """ return the sorted (name, file) pairs of the modules defining `functions`
+    """
+    modules = set()
+    for function in functions:
+        name = getattr(function, '__module__', None)
+        module = sys.modules.get(name)
+        path = getattr(module, '__file__', None)
+        if name and name != '__main__' and path:
+            modules.add((name, path))
+    return sorted(modules)
+
+def create_executor(workers, modules, start_method=None):
+    """ return a ProcessPoolExecutor whose workers have `modules` imported up front
+    """
+    method = start_method or default_start_method()
+    context = multiprocessing.get_context(method)
+    if method == 'forkserver':
+        # modules the forkserver fails to import are loaded by preload() instead
+        context.set_forkserver_preload([name for name, _ in modules])
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=preload, initargs=(modules,))
+
+def preload(modules):
+    """ import every (name, file) module in this worker process, by name when it is
+        importable and from its file otherwise
+    """
+    for name, path in modules:
+        if name in sys.modules:
+            continue
+        try:
+            import_module(name)
+        except ImportError:
+            spec = spec_from_file_location(name, path)
+            module = module_from_spec(spec)
+            sys.modules[name] = module
+            spec.loader.exec_module(module)
+
+def snapshot(state):
+    """ return the deep copy of `state` handed to a with_state task; the pool pickles
+        it later, so later changes to the shared state must not reach it
+    """
+    return copy.deepcopy({key: value for key, value in state.items() if key != '_state_lock'})
+
+def run(name, function, with_state, state, store_result):
+    """ run a task in a worker process and return its Outcome
+
+        `state` is the snapshot() taken for a with_state task, or None.
+    """
+    ok = False
+    error_type = None
+    error = None
+    result = None
+    updates = {}
+    removed = []
+    started = time.perf_counter()
+    try:
+        if with_state:
+            local = copy.deepcopy(state)
+            local['_state_lock'] = threading.RLock()
+            result = function(local)
+            updates, removed = _changes(state, local)
+        else:
+            result = function()
+        ok = True
+    except Exception as exception:
+        error_type = type(exception).__name__
+        error = str(exception)
+    return Outcome(name, ok, error_type, error, result if store_result else None,
+                   updates, removed, time.perf_counter() - started,
+                   multiprocessing.current_process().name)
+
+def merge(state, updates, removed):
+    """ apply the top-level changes a worker made to its snapshot to `state`
+    """
+    state.update(updates)
+    for key in removed:
+        state.pop(key, None)
+
+def _changes(before, after):
+    """ return the top-level keys of `after` added or changed since `before`, and
+        the keys it dropped
+    """
+    updates = {}
+    for key, value in after.items():
+        if key in private_keys:
+            continue
+        if key not in before or not _equal(before[key], value):
+            updates[key] = value
+    removed = [key for key in before if key not in after and key not in private_keys]
+    return updates, removed
+
+def _equal(before, after):
+    """ return whether two values compare equal, treating values that cannot be
+        compared (arrays, say) as changed
+    """
+    try:
+        return bool(before == after)
+    except Exception:
+        return False
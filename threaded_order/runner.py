@@ -8,6 +8,9 @@ import inspect
 from pathlib import Path
 from threaded_order import Scheduler, ThreadProxyLogger, default_workers
 from threaded_order.graph_summary import format_graph_summary
+from threaded_order.policy import FailedFirstPolicy, policies
+from threaded_order.history import History, default_history_file
+from threaded_order.cpus import worker_limit
 
 
 logger = ThreadProxyLogger()
@@ -23,9 +26,44 @@ def get_parser():
         help='Python file containing @mark functions')
     parser.add_argument(
         '--workers',
-        type=int,
+        type=parse_workers,
         default=default_workers,
-        help='Number of worker threads (default: Scheduler default)')
+        help='Number of worker threads, or auto to size the pool from the CPUs the process '
+             'may use and the width of the dependency graph (default: Scheduler default)')
+    parser.add_argument(
+        '--async-workers',
+        type=int,
+        default=1000,
+        help='Maximum number of async def functions awaited at once (default: 1000)')
+    parser.add_argument(
+        '--autoscale',
+        type=parse_autoscale,
+        default=None,
+        metavar='MIN:MAX',
+        help='resize the number of workers between MIN and MAX as functions run, starting '
+             'at --workers; decisions are logged')
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='fail functions still running after SECONDS with TimeoutError, unless they set '
+             'their own @mark(timeout=...)')
+    parser.add_argument(
+        '--maxfail',
+        type=int,
+        default=None,
+        metavar='N',
+        help='stop starting functions once N functions failed; the functions not started '
+             'are skipped with MaxFailuresError')
+    parser.add_argument(
+        '--breaker',
+        type=parse_breaker,
+        default=None,
+        metavar='K:WINDOW[:PROBE]',
+        help='skip the remaining functions of a tag once K functions with that tag failed '
+             'within WINDOW seconds; with PROBE, run one of them again after PROBE seconds '
+             'and resume the tag if it passes')
     parser.add_argument(
         '--tags',
         type=str,
@@ -47,8 +85,144 @@ def get_parser():
         '--skip-deps',
         action='store_true',
         help='skip functions whose dependencies failed')
+    parser.add_argument(
+        '--reduce',
+        action='store_true',
+        help='drop dependencies implied by other dependencies before running')
+    parser.add_argument(
+        '--worker-dispatch',
+        action='store_true',
+        help='let worker threads launch the functions they unblock (faster for many short '
+             'functions)')
+    parser.add_argument(
+        '--pin-workers',
+        action='store_true',
+        help='pin each worker thread to its own CPU, round robin (Linux)')
+    parser.add_argument(
+        '--backend',
+        choices=['thread', 'process'],
+        default='thread',
+        help='run functions on worker threads or in worker processes; process suits '
+             'CPU-bound functions, which must return picklable values (default: thread)')
+    parser.add_argument(
+        '--executor',
+        action='append',
+        type=parse_executor,
+        default=[],
+        metavar='NAME=KIND[:SIZE]',
+        help='pool for functions marked executor=NAME: KIND is thread or process, SIZE defaults '
+             'to --workers; repeatable (default: a thread pool for every name used)')
+    parser.add_argument(
+        '--resource',
+        action='append',
+        type=parse_resource,
+        default=[],
+        metavar='NAME=TOKENS',
+        help='number of tokens of a resource named in @mark(resources=...); at most that '
+             'many tokens are held by running functions at once; repeatable (default: the '
+             'largest number any one function needs)')
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='run functions marked @mark(cache=True) instead of restoring their cached results')
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        metavar='DIR',
+        help='directory of the result cache (default: .threaded_order/cache)')
+    parser.add_argument(
+        '--policy',
+        choices=list(policies),
+        default='name',
+        help='order in which ready functions start; shortest-first and critical-path use '
+             'durations recorded in .threaded_order/history.json, priority uses '
+             '@mark(priority=N), highest first (default: name)')
+    parser.add_argument(
+        '--last-failed',
+        action='store_true',
+        help='run only the functions that failed or were skipped in the previous run, and '
+             'the functions they depend on (outcomes are recorded in '
+             '.threaded_order/history.json)')
+    parser.add_argument(
+        '--failed-first',
+        action='store_true',
+        help='start the functions that failed or were skipped in the previous run, and the '
+             'functions they depend on, before the others')
     return parser
 
+def parse_workers(value):
+    """ parse a --workers value: a number or auto
+    """
+    if value == 'auto':
+        return value
+    if not value.isdigit():
+        raise argparse.ArgumentTypeError(f'expected a number or auto, not {value!r}')
+    return int(value)
+
+def parse_executor(value):
+    """ parse a NAME=KIND[:SIZE] --executor value into (name, spec)
+    """
+    name, _, spec = value.partition('=')
+    kind, _, size = spec.partition(':')
+    if not name or kind not in ('thread', 'process') or (size and not size.isdigit()):
+        raise argparse.ArgumentTypeError(
+            f'expected NAME=thread[:SIZE] or NAME=process[:SIZE], not {value!r}')
+    return name.strip(), spec
+
+def parse_autoscale(value):
+    """ parse a MIN:MAX --autoscale value into (minimum, maximum)
+    """
+    minimum, _, maximum = value.partition(':')
+    if not (minimum.isdigit() and maximum.isdigit()) or not 1 <= int(minimum) <= int(maximum):
+        raise argparse.ArgumentTypeError(f'expected MIN:MAX with 1 <= MIN <= MAX, not {value!r}')
+    return int(minimum), int(maximum)
+
+def parse_breaker(value):
+    """ parse a K:WINDOW[:PROBE] --breaker value into (threshold, window[, probe_after])
+    """
+    try:
+        threshold, window, *probe = value.split(':')
+        parsed = (int(threshold), float(window), *map(float, probe))
+    except ValueError:
+        parsed = ()
+    if (not 2 <= len(parsed) <= 3 or parsed[0] < 1 or parsed[1] <= 0
+            or (len(parsed) == 3 and parsed[2] < 0)):
+        raise argparse.ArgumentTypeError(
+            f'expected K:WINDOW[:PROBE] with K >= 1 and WINDOW > 0 seconds, not {value!r}')
+    return parsed
+
+def parse_resource(value):
+    """ parse a NAME=TOKENS --resource value into (name, tokens)
+    """
+    name, _, tokens = value.partition('=')
+    if not name or not tokens.isdigit() or int(tokens) < 1:
+        raise argparse.ArgumentTypeError(f'expected NAME=TOKENS with TOKENS >= 1, not {value!r}')
+    return name.strip(), int(tokens)
+
+def _build_resources(args, marked_functions):
+    """ return the resources for Scheduler: those given with --resource, plus every
+        other resource the marked functions need, sized to its largest single need
+    """
+    resources = dict(args.resource)
+    needs = {}
+    for _, _, meta in marked_functions:
+        for name, tokens in (meta.get('resources') or {}).items():
+            needs[name] = max(needs.get(name, 0), tokens)
+    for name, tokens in needs.items():
+        resources.setdefault(name, tokens)
+    return resources
+
+def _build_executors(args, marked_functions):
+    """ return the executors for Scheduler: those given with --executor, plus a thread
+        pool for every other executor name used by the marked functions
+    """
+    executors = dict(args.executor)
+    for _, _, meta in marked_functions:
+        name = meta.get('executor')
+        if name and name not in executors:
+            executors[name] = 'thread'
+    return executors
+
 def get_initial_state(unknown_args):
     """ parse arbitrary --key=value pairs from the unknown args list
         Example:
@@ -87,6 +261,8 @@ def load_module(path):
         raise FileNotFoundError(f"Module file '{path}' not found")
     spec = importlib.util.spec_from_file_location(path.stem, path)
     module = importlib.util.module_from_spec(spec)
+    # registered so its functions can be pickled by reference for worker processes
+    sys.modules.setdefault(spec.name, module)
     spec.loader.exec_module(module)
     return module
 
@@ -96,7 +272,8 @@ def get_functions(module):
     module_path = inspect.getsourcefile(module)
     with open(module_path, 'r') as f:
         tree = ast.parse(f.read(), filename=module_path)
-    function_names = [node.name for node in tree.body if isinstance(node, ast.FunctionDef)]
+    function_names = [node.name for node in tree.body
+                      if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
     for function_name in function_names:
         function = getattr(module, function_name)
         if inspect.isfunction(function):
@@ -133,27 +310,42 @@ def _maybe_setup_minimal_progress_output(scheduler, args):
     scheduler.on_scheduler_done(lambda s: print('', flush=True))
 
 def _register_functions(scheduler, marked_functions, tags_filter, single_function_mode):
-    """ register collected functions with the scheduler
+    """ register collected functions with the scheduler in a single batch
 
         handles dependency stripping for single-function mode and
         dependency pruning when tag filtering is active.
     """
     allowed_names = ({name for name, _, _ in marked_functions} if tags_filter else None)
+    allowed_tags = ({tag for _, _, meta in marked_functions for tag in meta.get('tags') or []}
+                    if tags_filter else None)
 
+    records = []
     for name, function, meta in marked_functions:
         after = meta.get('after') or None
+        after_tags = meta.get('after_tags') or []
         with_state = bool(meta.get('with_state'))
 
         # break dependency edges when running a single function
-        if single_function_mode and after:
-            after = []
+        if single_function_mode:
+            after = None
+            after_tags = []
 
         # remove dependencies filtered out by tags
         if after and allowed_names is not None:
             # exclude dependencies that are missing due to tag filtering
             after = [d for d in after if d in allowed_names]
+        if allowed_tags is not None:
+            # exclude tag dependencies whose tasks were all filtered out
+            after_tags = [t for t in after_tags if t in allowed_tags]
 
-        scheduler.register(function, name=name, after=after, with_state=with_state)
+        options = {'tags': meta.get('tags'), 'after_tags': after_tags,
+                   'priority': meta.get('priority'), 'executor': meta.get('executor'),
+                   'resources': meta.get('resources'), 'timeout': meta.get('timeout'),
+                   'idempotent': meta.get('idempotent'), 'retries': meta.get('retries'),
+                   'backoff': meta.get('backoff', 1.0), 'cache': meta.get('cache')}
+        records.append((name, function, after, with_state, options))
+
+    scheduler.register_many(records)
 
 def _collect_and_filter_functions(module, module_path, tags_filter, function_name):
     """ collect @mark functions and apply tag and name filtering
@@ -177,6 +369,35 @@ def _collect_and_filter_functions(module, module_path, tags_filter, function_nam
 
     return marked_functions, single_function_mode
 
+def _select_last_failed(marked_functions):
+    """ return the marked functions that failed or were skipped in the previous run
+        together with the functions they depend on, or all of them if none did
+    """
+    failed = History().failed()
+    metas = {name: meta for name, _, meta in marked_functions}
+    tagged = {}
+    for name, _, meta in marked_functions:
+        for tag in meta.get('tags') or []:
+            tagged.setdefault(tag, []).append(name)
+    pending = [name for name in failed if name in metas]
+    if not pending:
+        print('no functions failed in the previous run; running all')
+        return marked_functions
+    selected = set()
+    while pending:
+        name = pending.pop()
+        if name in selected:
+            continue
+        selected.add(name)
+        meta = metas[name]
+        pending.extend(dependency for dependency in meta.get('after') or []
+                       if dependency in metas)
+        for tag in meta.get('after_tags') or []:
+            pending.extend(tagged.get(tag, []))
+    print(f'running {len(selected)} functions: the ones that failed or were skipped '
+          'in the previous run and their dependencies')
+    return [function for function in marked_functions if function[0] in selected]
+
 def _parse_tags_filter(tags):
     """ parse comma-separated tag list into a normalized filter list
     """
@@ -199,6 +420,20 @@ def _build_scheduler_kwargs(args, initial_state, clear_results_on_start, module)
         'state': initial_state,
         'clear_results_on_start': clear_results_on_start,
         'skip_dependents': args.skip_deps,
+        'reduce_graph': args.reduce,
+        'policy': FailedFirstPolicy(args.policy) if args.failed_first else args.policy,
+        # outcomes are recorded for --last-failed and --failed-first
+        'history_file': default_history_file,
+        'worker_dispatch': args.worker_dispatch,
+        'async_workers': args.async_workers,
+        'backend': args.backend,
+        'autoscale': args.autoscale,
+        'pin_workers': args.pin_workers,
+        'timeout': args.timeout,
+        'max_failures': args.maxfail,
+        'breaker': args.breaker,
+        'cache': not args.no_cache,
+        'cache_dir': args.cache_dir,
     }
 
     if not args.log:
@@ -207,7 +442,8 @@ def _build_scheduler_kwargs(args, initial_state, clear_results_on_start, module)
     # prefer module-provided logging hook if available
     setup_logging_function = getattr(module, 'setup_logging', None)
     if callable(setup_logging_function):
-        setup_logging_function(args.workers, args.verbose)
+        workers = worker_limit(args.backend) if args.workers == 'auto' else args.workers
+        setup_logging_function(workers, args.verbose)
     else:
         scheduler_kwargs['setup_logging'] = True
         scheduler_kwargs['verbose'] = args.verbose
@@ -233,20 +469,31 @@ def _main(argv=None):
     # allow module to mutate initial state if supported
     _maybe_call_setup_state(module, initial_state)
 
-    scheduler = Scheduler(**scheduler_kwargs)
-
     # collect and optionally filter marked functions
     tags_filter = _parse_tags_filter(args.tags)
     marked_functions, single_function_mode = _collect_and_filter_functions(
         module, module_path, tags_filter, function_name)
+    if args.last_failed and not single_function_mode:
+        marked_functions = _select_last_failed(marked_functions)
+
+    scheduler_kwargs['executors'] = _build_executors(args, marked_functions)
+    scheduler_kwargs['resources'] = _build_resources(args, marked_functions)
+    scheduler = Scheduler(**scheduler_kwargs)
 
     logger.info(f'collected {len(marked_functions)} marked functions')
     _register_functions(scheduler, marked_functions, tags_filter, single_function_mode)
 
     if args.graph:
+        removed = scheduler.graph.reduce() if args.reduce else None
         print(format_graph_summary(scheduler.graph))
+        if removed is not None:
+            print(f'\nTransitive reduction removed {removed} redundant edges')
         return
 
+    if args.workers == 'auto':
+        workers, reason = scheduler.size_workers()
+        print(f'workers: {workers} ({reason})')
+
     _maybe_setup_minimal_progress_output(scheduler, args)
 
     summary = scheduler.start()
@@ -255,6 +502,12 @@ def _main(argv=None):
     logger.debug('Scheduler::State: ' + json.dumps(scheduler.state, indent=2, default=str))
     print(summary['text'])
 
+    if summary['failure_counts'].get('TimeoutError'):
+        # threads of timed-out functions may still run and would keep the interpreter
+        # from exiting
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
     if summary.get('failed'):
         sys.exit(1)
 
@@ -1,32 +1,96 @@
-import os
+import sys
+import time
+import heapq
 import queue
+import itertools
+import asyncio
+import inspect
 import threading
 import logging
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, CancelledError
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures import CancelledError, Future
+from contextlib import contextmanager, ExitStack
 from functools import wraps
-from .graph import DAGraph
+from .graph import DAGraph, CompactDAGraph
+from .autoscale import Autoscaler
+from .breaker import CircuitBreaker
+from .cpus import CpuPinner, auto_workers, available_cpus, worker_limit
+from .history import History
+from .cache import ResultCache, code_digest, task_key
+from .policy import get_policy
+from .process import Outcome, create_executor, merge, private_keys, snapshot, task_modules
+from .process import run as run_in_process
 from .timer import Timer
-from .logger import configure_logging
+from .logger import configure_logging, get_thread_logger
 from colorama import Fore, Style
 
-default_workers = min(8, os.cpu_count())
+def gil_enabled():
+    """ return False when running on a free-threaded build with the GIL disabled
+    """
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled() if is_gil_enabled else True
+
+def _default_workers():
+    """ return the default pool size: with the GIL, more than 8 threads rarely help;
+        without it CPU-bound tasks scale with the cores, so use them all (up to 32).
+        Cores are those the process may use (affinity and cgroup quota), not the host's
+    """
+    cpus = available_cpus()
+    return min(8, cpus) if gil_enabled() else min(32, cpus)
+
+default_workers = _default_workers()
+
+# recorded durations an idempotent task needs before it may be hedged
+hedge_samples = 5
 
 class Scheduler:
     """ run functions concurrently across multiple threads while maintaining a defined
         execution order
+
+        Threading model (nothing here relies on the GIL, so free-threaded builds are
+        supported): the graph, _active and _running are only touched by the scheduler
+        thread, or under _dispatch_lock with worker dispatch; the result lists only
+        by the scheduler thread, from queued events; _futures only under _lock;
+        state['results'] only under state_lock. Worker threads record their own
+        _durations entry and otherwise talk to the scheduler through _events.
     """
     def __init__(self, workers=None, setup_logging=False, add_stream_handler=True,
                  state=None, store_results=True, clear_results_on_start=True, verbose=False,
-                 skip_dependents=False):
+                 skip_dependents=False, compact_graph=False, reduce_graph=False,
+                 policy=None, history_file=None, worker_dispatch=False, async_workers=1000,
+                 backend='thread', start_method=None, executors=None, resources=None,
+                 autoscale=None, pin_workers=False, timeout=None, max_failures=None,
+                 breaker=None, cache=True, cache_dir=None):
         """ initialize scheduler with thread pool size, logging, and callback placeholders
         """
+        # with workers='auto' the pool is sized at start() from the usable CPUs and
+        # the width of the graph (see size_workers); until then it is at its limit
+        self._auto_workers = workers == 'auto'
+        # (workers, reason) of the last sizing; registering tasks invalidates it
+        self._sized = None
+        if self._auto_workers:
+            workers = worker_limit(backend)
         # number of concurrent worker threads in the pool
         self._workers = workers if workers else default_workers
+        # with autoscale, (minimum, maximum) or an Autoscaler: the pool holds the
+        # maximum number of workers and _workers, the slots in use, changes as tasks run
+        self._autoscaler = None
+        self._pool_size = self._workers
+        if autoscale:
+            self._autoscaler = (autoscale if isinstance(autoscale, Autoscaler)
+                                else Autoscaler(*autoscale))
+            self._workers = self._autoscaler.clamp(self._workers)
+            self._pool_size = self._autoscaler.maximum
+        self._initial_workers = self._workers
         # task name → callable object to execute
         self._callables = {}
-        # direct acyclic graph
-        self._graph = DAGraph()
+        # task name → register() options (tags, after_tags)
+        self._options = {}
+        # tag → names of the tasks carrying it
+        self._tags = {}
+        # direct acyclic graph (integer-indexed array storage when compact_graph is set)
+        self._graph = CompactDAGraph() if compact_graph else DAGraph()
         # protects access to _futures (shared by scheduler and worker threads)
         self._lock = threading.Lock()
         # currently running task names
@@ -35,10 +99,10 @@ class Scheduler:
         self._futures = {}
         # signals scheduler when all tasks have completed
         self._completed = threading.Event()
-        # ThreadPoolExecutor instance (managed inside start())
+        # ThreadPoolExecutor or ProcessPoolExecutor instance (managed inside start())
         self._executor = None
         # thread-safe queue for passing start/done events from workers to scheduler
-        self._events = queue.Queue()
+        self._events = queue.SimpleQueue()
 
         # timing info
         self._timer = Timer()
@@ -66,73 +130,455 @@ class Scheduler:
             self.state['results'] = {}
 
         self._prefix = 'thread'
+        # pin each worker thread of the default pool to its own CPU, round robin
+        self._pin_workers = pin_workers
         if setup_logging or verbose:
-            configure_logging(self._workers, prefix=self._prefix,
+            configure_logging(self._pool_size, prefix=self._prefix,
                               add_stream_handler=add_stream_handler, verbose=verbose)
 
         self._skip_dependents = skip_dependents
+        # drop transitively implied dependency edges before running
+        self._reduce_graph = reduce_graph
+
+        # orders ready tasks (a name from policy.policies or a policy object)
+        self._policy = get_policy(policy)
+        # durations of previous runs; loaded when asked for or needed by the policy
+        self._history = None
+        self._history_file = history_file
+        if history_file or getattr(self._policy, 'uses_history', False):
+            self._history = History(history_file)
+        # task name → wall time of its run in this start()
+        self._durations = {}
+        # results of tasks registered with cache=True are kept in a ResultCache
+        # (under cache_dir, by default .threaded_order/cache) unless cache is False;
+        # cache may also be a ResultCache
+        self._use_cache = bool(cache)
+        self._cache = cache if isinstance(cache, ResultCache) else None
+        self._cache_dir = cache_dir
+        self._caching = False
+        # cached task name → digest of its code, and names of its direct dependencies
+        self._codes = {}
+        self._parents = {}
+        # cached tasks whose result was restored / that ran in this start()
+        self._cache_hits = set()
+        self._cache_misses = set()
+        # process task name → cache key its result is stored under
+        self._keys = {}
+
+        # workers release dependents and run one of them inline instead of
+        # routing every completion through the scheduler thread
+        self._worker_dispatch = worker_dispatch
+        # serializes graph and _active updates made by worker threads
+        self._dispatch_lock = threading.Lock()
+        # per-thread list of tasks settled while that thread held the dispatch lock
+        self._deferred = threading.local()
+        # set on interrupt so workers stop launching dependents
+        self._stopping = threading.Event()
 
-    def register(self, obj, name, after=None, with_state=False):
+        # coroutine tasks run on an event loop thread, up to async_workers at once,
+        # without taking a worker thread
+        if (isinstance(async_workers, bool) or not isinstance(async_workers, int)
+                or async_workers < 1):
+            raise ValueError('async_workers must be a positive number of coroutines')
+        self._async_workers = async_workers
+        # names of the tasks registered with coroutine functions
+        self._coroutines = set()
+        # lane → number of running tasks, for every lane but the default one
+        # ('async' for coroutine tasks, else the name of their executor)
+        self._running = Counter()
+        # event loop and its thread (managed inside start() when coroutines are registered)
+        self._loop = None
+        self._loop_thread = None
+
+        # 'thread' runs tasks on the worker threads, 'process' in a pool of worker
+        # processes started with `start_method` (see process.py)
+        if backend not in ('thread', 'process'):
+            raise ValueError(f"unknown backend {backend!r}; expected 'thread' or 'process'")
+        self._backend = backend
+        self._start_method = start_method
+
+        # executor name → (kind, size, Executor or None) for tasks registered with
+        # executor=name; pools given as specs are created and shut down by start()
+        self._executor_specs = {name: _executor_spec(name, executor, self._workers)
+                                for name, executor in (executors or {}).items()}
+        # executor name → Executor in use, and lane → number of slots, during start()
+        self._pools = {}
+        self._capacity = {}
+        # lanes whose tasks run in worker processes
+        self._process_lanes = {None} if backend == 'process' else set()
+
+        # resource → number of tokens; a task registered with resources={name: n}
+        # only starts while n tokens of every resource it names are free
+        self._resources = _resource_counts('scheduler', resources)
+        # resource → tokens free during start()
+        self._tokens = Counter()
+        # resource → ready tasks handed out but waiting for its tokens
+        self._parked = {}
+
+        # seconds a task may run before it fails with TimeoutError, unless it sets
+        # its own timeout=; idempotent tasks running past the 95th percentile of
+        # their recorded durations get a hedged copy and the first to finish wins
+        self._timeout = _timeout_seconds('scheduler', timeout)
+        # set during start() when a task has a timeout or may be hedged: such a task
+        # can complete more than once and only its first completion settles it
+        self._watched = False
+        # heap of (deadline, sequence, action, name, attempt) fired by the scheduler
+        # thread; guarded by _timer_lock since workers add timers with worker dispatch
+        self._timers = []
+        self._timer_lock = threading.Lock()
+        self._timer_sequence = itertools.count()
+        # task name → times started this run; timers of an earlier attempt are ignored
+        self._starts = Counter()
+        # task name → attempt whose timers are set once its run begins on a worker
+        # (under _lock); time spent waiting in the pool's queue does not count
+        self._armed = {}
+        # names of the tasks settled this run, and futures running each watched task
+        # (both only under _lock)
+        self._settled = set()
+        self._copies = {}
+        # names of the tasks that got a hedged copy
+        self._hedged = set()
+        # task name → runs of a watched task in flight (under _lock); runs of a settled
+        # task still in flight timed out or lost to their hedged copy
+        self._runs = Counter()
+        # set during start() when a task has retries: a failed attempt of such a task
+        # goes back on the ready queue through a 'retry' timer instead of settling
+        self._retrying = False
+        # task name → errors of its failed attempts, and names waiting for a retry
+        # (touched like the graph: by the scheduler thread or under _dispatch_lock)
+        self._errors = {}
+        self._waiting = set()
+
+        # once max_failures tasks failed no task starts anymore: the tasks not started
+        # are skipped with MaxFailuresError and the run ends when the running drain
+        if max_failures is not None and (isinstance(max_failures, bool)
+                                         or not isinstance(max_failures, int)
+                                         or max_failures < 1):
+            raise ValueError('max_failures must be a positive number of failures')
+        self._max_failures = max_failures
+        self._failures = 0
+        self._halted = False
+        # with breaker, (threshold, window[, probe_after]) or a CircuitBreaker: the
+        # tasks of a tag failing repeatedly are skipped with CircuitOpenError
+        self._breaker = None
+        if breaker:
+            self._breaker = (breaker if isinstance(breaker, CircuitBreaker)
+                             else CircuitBreaker(*breaker))
+
+    def register(self, obj, name, after=None, with_state=False, tags=None, after_tags=None,
+                 priority=None, executor=None, resources=None, timeout=None, idempotent=False,
+                 retries=0, backoff=1.0, cache=False):
         """ register a callable for execution, optionally dependent on other tasks
+
+            `after_tags` makes the task depend on every task carrying one of those
+            tags; all tasks with a tag must be registered before tasks depending on it.
+            `priority` is a number read by scheduling policies (see policy.py).
+            `executor` names the pool of `executors` the task runs in and
+            `resources` maps resource names to the number of tokens the task holds
+            while it runs. `timeout` overrides the scheduler's timeout and an
+            `idempotent` task may be run twice at once when it straggles. A task that
+            fails is run again up to `retries` times, `backoff` seconds after its first
+            failure and twice as long after each further one. With `cache` its result
+            is kept in the result cache (see cache.py), keyed on its code, the state
+            it reads (the whole state, or a list of state keys) and the results of its
+            dependencies, and restored instead of running it when the key is found.
         """
         if not callable(obj):
             raise ValueError('object must be callable')
-        self._graph.add(name, after=after)
-        self._callables[name] = (obj, with_state)
+        self.register_many([(name, obj, after, with_state,
+                             {'tags': tags, 'after_tags': after_tags, 'priority': priority,
+                              'executor': executor, 'resources': resources,
+                              'timeout': timeout, 'idempotent': idempotent,
+                              'retries': retries, 'backoff': backoff, 'cache': cache})])
 
-    def dregister(self, after=None, with_state=False):
+    def register_many(self, records):
+        """ register an iterable of `(name, callable, after, with_state)` records at once
+
+            A record may carry a fifth item, a dict of the extra register() keyword
+            arguments (`tags`, `after_tags`, `priority`, `executor`, `resources`,
+            `timeout`, `idempotent`, `retries`, `backoff`, `cache`). Records may
+            reference each other, and tags, in any order. Non-callables, unknown
+            executors and resources, unknown or sealed tags, duplicate names, unknown
+            dependencies and cycles are validated once for the whole batch and
+            reported together in a single ValueError; nothing is registered then.
+        """
+        tasks = [_task_record(*record) for record in records]
+        self._sized = None
+        problems = []
+        not_callable = [name for name, obj, _, _, _ in tasks if not callable(obj)]
+        if not_callable:
+            problems.append(f'objects must be callable: {not_callable}')
+        problems.extend(self._check_options(tasks))
+        barriers = self._add_barriers(tasks, problems)
+        graph_records = [(barrier, members) for barrier, members in barriers.items()]
+        for name, _, after, _, options in tasks:
+            # a group of an unknown tag is already reported by _add_barriers
+            groups = [barrier for barrier in map(_barrier_name, options['after_tags'])
+                      if barrier in barriers or barrier in self._graph]
+            graph_records.append((name, after + groups))
+        self._graph.add_many(graph_records, barriers=barriers, problems=problems)
+        for name, obj, after, with_state, options in tasks:
+            self._callables[name] = (obj, with_state)
+            self._options[name] = options
+            if options['cache']:
+                self._parents[name] = (after, options['after_tags'])
+            if inspect.iscoroutinefunction(obj):
+                self._coroutines.add(name)
+            for tag in options['tags']:
+                self._tags.setdefault(tag, []).append(name)
+
+    def _check_options(self, tasks):
+        """ return the problems of tasks naming an unknown executor, coroutine tasks
+            naming one (they always run on the event loop), and tasks needing unknown
+            resources or more tokens than a resource has
+        """
+        problems = []
+        for name, obj, _, _, options in tasks:
+            executor = options['executor']
+            if executor is None:
+                pass
+            elif executor not in self._executor_specs:
+                problems.append(f'{name} uses unknown executor {executor}')
+            elif inspect.iscoroutinefunction(obj):
+                problems.append(f'{name} is a coroutine function and cannot use executor '
+                                f'{executor}')
+            for resource, tokens in options['resources'].items():
+                if resource not in self._resources:
+                    problems.append(f'{name} needs unknown resource {resource}')
+                elif tokens > self._resources[resource]:
+                    problems.append(f'{name} needs {tokens} {resource} tokens but only '
+                                    f'{self._resources[resource]} exist')
+        return problems
+
+    def _add_barriers(self, tasks, problems):
+        """ return the `{barrier: members}` nodes needed for the tag dependencies of
+            `tasks`, adding tags that are unknown or sealed to `problems`
+
+            A tag is sealed once a barrier exists for it, since the barrier's
+            dependencies cannot change afterwards.
+        """
+        # only the tags this batch names are copied, so registering stays linear
+        members = {}
+        for name, _, _, _, options in tasks:
+            for tag in options['tags']:
+                if _barrier_name(tag) in self._graph:
+                    problems.append(f'{name} cannot be tagged {tag} after tasks depending '
+                                    f'on tag {tag} were registered')
+                if tag not in members:
+                    members[tag] = list(self._tags.get(tag, ()))
+                members[tag].append(name)
+
+        barriers = {}
+        for name, _, _, _, options in tasks:
+            for tag in options['after_tags']:
+                barrier = _barrier_name(tag)
+                if barrier in barriers or barrier in self._graph:
+                    continue
+                names = members[tag] if tag in members else list(self._tags.get(tag, ()))
+                if not names:
+                    problems.append(f'{name} depends on unknown tag {tag}')
+                    continue
+                barriers[barrier] = names
+        return barriers
+
+    def dregister(self, after=None, with_state=False, tags=None, after_tags=None,
+                  priority=None, executor=None, resources=None, timeout=None, idempotent=False,
+                  retries=0, backoff=1.0, cache=False):
         """ decorator form of register() for convenient inline task definition
         """
         def decorator(function):
-            @wraps(function)
-            def wrapper(*args, **kwargs):
-                return function(*args, **kwargs)
+            wrapper = _wrap(function)
             # register at decoration time so start() can discover it
-            self.register(wrapper, function.__name__, after=after, with_state=with_state)
+            self.register(wrapper, function.__name__, after=after, with_state=with_state,
+                          tags=tags, after_tags=after_tags, priority=priority,
+                          executor=executor, resources=resources, timeout=timeout,
+                          idempotent=idempotent, retries=retries, backoff=backoff,
+                          cache=cache)
             # keep a pointer to the original
             wrapper.__original__ = function
             return wrapper
         return decorator
 
-    def _maybe_schedule_next(self, logger):
+    def _maybe_schedule_next(self, logger, keep=False, lane=None):
         """ schedule next ready tasks if there are free worker slots
+
+            Barrier nodes handed out as candidates are completed in place, which
+            may release more candidates, so candidates are requested until no
+            barrier is among them. With `keep` the first task of `lane` is claimed
+            but not submitted; it is returned for the calling worker to run inline.
+            Coroutine tasks and the tasks of each named executor fill their own slots.
+            Candidates whose resource tokens are taken are parked, and candidates are
+            requested again to fill the slots they leave. So are candidates skipped
+            because the circuit of one of their tags is open.
         """
-        # determine number of free worker slots
-        free = max(0, self._workers - len(self._active))
-        if not free:
-            return
+        kept = None
+        if self._halted:
+            return kept
+        if self._autoscaler:
+            self._autoscale(logger)
+        while True:
+            barriers = []
+            parked = False
+            for cand_lane, free in self._free_slots():
+                for cand in self._graph.get_candidates(self._active, free, lane=cand_lane):
+                    if self._graph.is_barrier(cand):
+                        barriers.append(cand)
+                    elif self._breaker and self._short_circuit(cand, logger):
+                        parked = True
+                    elif self._resources and not self._acquire(cand):
+                        parked = True
+                    elif keep and kept is None and cand_lane == lane:
+                        kept = cand
+                        if self._on_task_start:
+                            self._events.put(('start', cand))
+                        self._active.add(cand)
+                        if lane is not None:
+                            self._running[lane] += 1
+                        if self._watched:
+                            self._arm(cand)
+                    else:
+                        self._submit(cand)
+            if not barriers and not parked:
+                return kept
+            for barrier in barriers:
+                logger.debug(f'releasing barrier {barrier}')
+                self._graph.remove(barrier)
 
-        # get ready candidates
-        cands = self._graph.get_candidates(self._active, free)
-        if not self._skip_dependents:
-            # no skipping of dependents; submit all candidates
-            for cand in cands:
-                self._submit(cand)
-            return
+    def _short_circuit(self, name, logger):
+        """ skip task `name` without running it if the circuit of one of its tags is
+            open, and return whether it was skipped
+        """
+        tag = self._breaker.blocked_by(name, self._options[name]['tags'])
+        if tag is None:
+            return False
+        logger.info(f'{name} SKIPPED: circuit open for tag {tag!r}')
+        self._deliver((name, False, 'CircuitOpenError', f'circuit open for tag {tag!r}'))
+        return True
 
-        # skipping of dependents enabled; check for failed dependencies
-        failed_or_skipped = set(self._failed) | set(self._skipped)
-        for cand in cands:
-            deps = self._graph.original_parents_of(cand)
-            failed_deps = failed_or_skipped & set(deps)
-            if failed_deps:
-                # skip this candidate due to failed dependencies
-                logger.info(f'{cand} SKIPPED')
-                logger.debug(f'{cand} skipped due to failed dependencies: {failed_deps}')
-                error = f'skipped due to failed dependency: {failed_deps}'
-                # add to active to avoid re-selection
-                self._active.add(cand)
-                self._events.put(('done', (cand, False, 'DependencyError', error)))
-            else:
-                self._submit(cand)
+    def _trip(self, name, ok, error_type, logger):
+        """ feed the final outcome of task `name` to the circuit breaker
+        """
+        for tag in self._breaker.record(name, self._options[name]['tags'], ok, error_type):
+            logger.error(f'circuit open for tag {tag!r}: {self._breaker.threshold} failures '
+                         f'within {self._breaker.window:g}s; skipping its tasks')
+
+    def _free_slots(self):
+        """ return (lane, free slots) for every lane with room for another task
+        """
+        if not self._capacity:
+            free = self._workers - len(self._active)
+            return [(None, free)] if free > 0 else []
+        # the default lane holds every active task not counted in another lane
+        free = self._workers - len(self._active) + sum(self._running.values())
+        slots = [(None, free)] if free > 0 else []
+        # barriers of a laned graph never take a slot
+        slots.append(('barrier', sys.maxsize))
+        for lane, capacity in self._capacity.items():
+            free = capacity - self._running[lane]
+            if free > 0:
+                slots.append((lane, free))
+        return slots
+
+    def _autoscale(self, logger):
+        """ let the autoscaler resize the slots of the default pool
+        """
+        slots, reason = self._autoscaler.update(self._workers, self._graph.queued())
+        if reason:
+            logger.info(f'autoscale: {self._workers} -> {slots} workers: {reason}')
+            self._workers = slots
+
+    def _deactivate(self, name):
+        """ forget a task as running, freeing its slot
+        """
+        if name in self._active:
+            self._active.remove(name)
+            lane = self._lane_of(name) if self._capacity else None
+            if lane is not None:
+                self._running[lane] -= 1
+            elif self._autoscaler:
+                self._autoscaler.task_done(self._durations.get(name, 0.0))
+            if self._resources:
+                self._release(name)
+
+    def _acquire(self, name):
+        """ take the resource tokens of task `name`, or park it under the first
+            resource short of tokens and return False
+        """
+        needs = self._options[name]['resources']
+        for resource, tokens in needs.items():
+            if self._tokens[resource] < tokens:
+                self._parked.setdefault(resource, []).append(name)
+                return False
+        for resource, tokens in needs.items():
+            self._tokens[resource] -= tokens
+        return True
+
+    def _release(self, name):
+        """ return the resource tokens of finished task `name` and put the tasks
+            parked on those resources back on the ready queue
+        """
+        for resource, tokens in self._options[name]['resources'].items():
+            self._tokens[resource] += tokens
+            for parked in self._parked.pop(resource, ()):
+                self._graph.requeue(parked)
+
+    def _skip_dependents_of(self, name, descendants, logger):
+        """ record every task in the descendant closure of failed task `name` as skipped
+
+            The closure is pruned from the graph in one pass, so none of these
+            tasks is ever offered as a candidate or travels through the event queue.
+        """
+        self._graph.prune(descendants)
+        self._record_skipped(name, descendants, logger)
 
-    def _handle_done(self, payload, logger):
+    def _record_skipped(self, name, descendants, logger):
+        """ record already pruned `descendants` of failed task `name` as skipped
+        """
+        unavailable = set(descendants)
+        unavailable.add(name)
+        for cand in descendants:
+            if self._graph.is_barrier(cand) or cand in self._results:
+                # already recorded by a max_failures halt
+                continue
+            failed_deps = set()
+            for dep in unavailable.intersection(self._graph.dependencies_of(cand)):
+                if self._graph.is_barrier(dep):
+                    # name the failed or skipped tasks of the tag, not its barrier node
+                    failed_deps.update(unavailable.intersection(self._graph.dependencies_of(dep)))
+                else:
+                    failed_deps.add(dep)
+            logger.info(f'{cand} SKIPPED')
+            logger.debug(f'{cand} skipped due to failed dependencies: {failed_deps}')
+            self._ran.append(cand)
+            self._results[cand] = {
+                'ok': False,
+                'error_type': 'DependencyError',
+                'error': f'skipped due to failed dependency: {failed_deps}'
+            }
+            self._skipped.append(cand)
+            self._callback(self._on_task_done, cand, False)
+
+    def _handle_done(self, payload, logger, schedule=True):
         """ process a completed task, record its result, and schedule next tasks
+
+            With `schedule` unset the caller schedules once for a batch of completions.
         """
         name, ok, error_type, error = payload
-        logger.debug(f'removing {name!r} from active futures')
-        self._active.discard(name)
-        self._graph.remove(name)
+        if not ok and self._retrying and not self._worker_dispatch and self._retry(payload, logger):
+            if schedule:
+                self._maybe_schedule_next(logger)
+            return
+        if self._breaker and not self._worker_dispatch and error_type != 'CircuitOpenError':
+            self._trip(name, ok, error_type, logger)
+        descendants = []
+        if not self._worker_dispatch:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'removing {name!r} from active futures')
+            self._deactivate(name)
+            if not ok and self._skip_dependents:
+                # collect before remove() detaches the task from its dependents
+                descendants = self._graph.descendants_of(name)
+            self._graph.remove(name)
         self._ran.append(name)
         self._results[name] = {
             'ok': ok,
@@ -140,23 +586,85 @@ class Scheduler:
             'error': error
         }
         if not ok:
-            (self._skipped if error_type == 'DependencyError' else self._failed).append(name)
+            skipped = error_type in ('DependencyError', 'CircuitOpenError')
+            (self._skipped if skipped else self._failed).append(name)
 
         self._callback(self._on_task_done, name, ok)
-        self._maybe_schedule_next(logger)
+        if descendants:
+            self._skip_dependents_of(name, descendants, logger)
+        if not self._worker_dispatch and self._limit_reached(ok, error_type):
+            self._halt(logger)
+        if self._worker_dispatch:
+            # the worker that ran the task already released its dependents
+            return
+        if schedule:
+            self._maybe_schedule_next(logger)
+            self._check_completed(logger)
+
+    def _limit_reached(self, ok, error_type):
+        """ count a failed task and return True when it is the one reaching max_failures
+        """
+        if ok or not self._max_failures or error_type in ('DependencyError', 'CircuitOpenError'):
+            return False
+        self._failures += 1
+        return not self._halted and self._failures >= self._max_failures
+
+    def _halt(self, logger):
+        """ stop starting tasks now that max_failures tasks failed: every task not
+            started yet is recorded as skipped with MaxFailuresError in one pass, and
+            the run ends once the running tasks drain
+        """
+        with self._dispatching():
+            self._halted = True
+            pending = [name for name in self._graph.nodes()
+                       if name not in self._active and not self._graph.is_barrier(name)]
+            # tasks waiting for a retry or for resource tokens are not started either
+            self._waiting.clear()
+            self._parked.clear()
+            running = len(self._active)
+            if not running:
+                self._completed.set()
+        logger.error(f'{len(self._failed)} tasks failed, max_failures is {self._max_failures}: '
+                     f'skipping {len(pending)} tasks not started, draining {running} running')
+        error = f'not started: {self._max_failures} tasks failed'
+        for name in pending:
+            if name in self._results:
+                continue
+            self._ran.append(name)
+            self._results[name] = {
+                'ok': False,
+                'error_type': 'MaxFailuresError',
+                'error': error
+            }
+            self._skipped.append(name)
+            self._callback(self._on_task_done, name, False)
 
-        # check for overall completion
-        if self._graph.is_empty() and not self._active:
+    def _check_completed(self, logger):
+        """ signal completion once the graph is drained (or halted) and no task is
+            running
+        """
+        if (self._halted or self._graph.is_empty()) and not self._active:
             logger.debug('nothing more to run and no active futures remain - signaling all done')
             self._completed.set()
 
-    def _handle_event(self):
+    def _handle_event(self, block=False):
         """ process queued task and scheduler events on the scheduler thread
+
+            With `block` set, waits for the first event and then drains whatever
+            else is already queued, so a burst of completions is handled in one pass.
         """
-        logger = logging.getLogger(threading.current_thread().name)
+        logger = get_thread_logger()
+        done = False
         while True:
             try:
-                kind, payload = self._events.get_nowait()
+                if block:
+                    # returns as soon as an event is queued; the timeout keeps the
+                    # wait interruptible by Ctrl-C on every platform and wakes the
+                    # thread for the next timer
+                    kind, payload = self._events.get(timeout=self._wait_time())
+                    block = False
+                else:
+                    kind, payload = self._events.get_nowait()
             except queue.Empty:
                 break
 
@@ -169,7 +677,26 @@ class Scheduler:
                 self._callback(self._on_task_run, name, thread)
 
             elif kind == 'done':
-                self._handle_done(payload, logger)
+                self._handle_done(payload, logger, schedule=False)
+                done = True
+
+            elif kind == 'skipped':
+                name, descendants = payload
+                self._record_skipped(name, descendants, logger)
+
+            elif kind == 'halted':
+                self._halt(logger)
+
+            elif kind == 'completed':
+                logger.debug('workers drained the graph - signaling all done')
+                self._completed.set()
+
+        if self._timers:
+            self._fire_timers(logger)
+        if done and not self._worker_dispatch:
+            # one scheduling pass for the whole batch of completions
+            self._maybe_schedule_next(logger)
+            self._check_completed(logger)
 
     def _build_summary(self):
         """ assemble concise run summary from collected results and timings
@@ -184,6 +711,11 @@ class Scheduler:
                 'error': self._results[name]['error']
             } for name in failed
         }
+        for name in failed:
+            if name in self._errors:
+                # every attempt of a task that had retries, the last one included
+                failures[name]['attempts'] = len(self._errors[name])
+                failures[name]['errors'] = list(self._errors[name])
         failure_counts = Counter(
             result['error_type'] for result in self._results.values() if not result['ok']
         )
@@ -198,10 +730,29 @@ class Scheduler:
             'finished_at': self._timer.finished_at,
             'duration': self._timer.duration,
         }
+        if self._autoscaler:
+            # (seconds into the run, workers, reason) for every resize
+            summary['autoscale'] = list(self._autoscaler.decisions)
+        if self._breaker:
+            # tag → times its circuit opened
+            summary['tripped'] = dict(self._breaker.trips)
+        if self._retrying:
+            # tasks that passed after failed attempts → the attempts they took
+            summary['retried'] = {name: len(self._errors[name]) + 1 for name in passed
+                                  if name in self._errors}
+        if any(options['idempotent'] for options in self._options.values()):
+            # tasks that got a hedged copy
+            summary['hedged'] = sorted(self._hedged)
         lp = len(passed)
         lf = len(failed)
         ls = len(skipped)
-        text = f"==== {lp} passed, {lf} failed, {ls} skipped in {summary['duration']:.2f}s ===="
+        cached = ''
+        if self._caching:
+            summary['cache'] = {'hits': len(self._cache_hits),
+                                'misses': len(self._cache_misses)}
+            cached = f", {len(self._cache_hits)} cache hits, {len(self._cache_misses)} misses"
+        text = (f"==== {lp} passed, {lf} failed, {ls} skipped{cached} "
+                f"in {summary['duration']:.2f}s ====")
         summary['text'] = f'{Style.BRIGHT + Fore.BLUE + text + Style.RESET_ALL}'
         return summary
 
@@ -223,11 +774,16 @@ class Scheduler:
         self._handle_event()
 
         # mark any still-active tasks as cancelled (these never emitted a 'done' event)
-        still_active = list(self._active)
-        self._active.clear()
+        with self._dispatch_lock:
+            # tasks waiting for a retry count as cancelled too
+            still_active = list(self._active) + sorted(self._waiting)
+            self._waiting.clear()
+            self._active.clear()
+            self._running.clear()
+            for name in still_active:
+                # remove from graph so completion logic won't wait on them
+                self._graph.remove(name)
         for name in still_active:
-            # remove from graph so completion logic won't wait on them
-            self._graph.remove(name)
             # record cancellation
             self._ran.append(name)
             self._results[name] = {
@@ -251,6 +807,30 @@ class Scheduler:
         self._completed.clear()
         self._futures.clear()
         self._active.clear()
+        self._running.clear()
+        self._tokens = Counter(self._resources)
+        self._parked.clear()
+        self._durations.clear()
+        self._stopping.clear()
+        self._timers.clear()
+        self._starts.clear()
+        self._armed.clear()
+        self._settled.clear()
+        self._copies.clear()
+        self._hedged.clear()
+        self._runs.clear()
+        self._errors.clear()
+        self._waiting.clear()
+        self._failures = 0
+        self._halted = False
+        self._cache_hits.clear()
+        self._cache_misses.clear()
+        self._keys.clear()
+        if self._breaker:
+            self._breaker.start()
+        if self._autoscaler:
+            self._workers = self._initial_workers
+            self._autoscaler.start()
         # clear stored results
         if self._store_results and self._clear_results_on_start and 'results' in self.state:
             with self.state_lock:
@@ -268,6 +848,16 @@ class Scheduler:
         logger = logging.getLogger(threading.current_thread().name)
 
         self._prep_start()
+        if self._reduce_graph:
+            removed = self._graph.reduce()
+            logger.info(f'transitive reduction removed {removed} redundant edges')
+        if self._auto_workers and self._sized is None:
+            # not sized yet by a caller of size_workers() (tdrun --workers auto)
+            workers, reason = self.size_workers()
+            logger.info(f'auto workers: {workers}: {reason}')
+        self._watch(logger)
+        self._open_cache(logger)
+        self._apply_policy(logger)
 
         self._timer.start()
         meta = {
@@ -278,17 +868,29 @@ class Scheduler:
         self._callback(self._on_scheduler_start, meta)
 
         try:
-            with ThreadPoolExecutor(max_workers=self._workers,
-                                    thread_name_prefix=self._prefix) as executor:
-                self._executor = executor
-                logger.info(f'starting thread pool with {self._workers} threads')
+            with ExitStack() as pools:
+                self._executor = self._create_executor(logger)
+                pools.callback(self._shutdown, self._executor)
+                self._open_executors(pools, logger)
+                if self._coroutines:
+                    self._capacity['async'] = self._async_workers
+                    self._start_loop(logger)
+                if self._capacity:
+                    # queue the ready tasks of every lane separately
+                    self._graph.set_lanes(self._lane_of)
                 # initial seeding
-                for name in self._graph.get_candidates(self._active, self._workers):
-                    self._submit(name)
+                with self._dispatching():
+                    self._maybe_schedule_next(logger)
+                    self._check_completed(logger)
 
-                # main loop of scheduler thread
-                while not self._completed.wait(timeout=0.1):
-                    self._handle_event()
+                # main loop of scheduler thread: sleeps until a worker queues an event
+                try:
+                    while not self._completed.is_set():
+                        self._handle_event(block=True)
+                except KeyboardInterrupt:
+                    # keep workers from launching dependents while the pool shuts down
+                    self._stopping.set()
+                    raise
 
                 # final drain
                 self._handle_event()
@@ -298,79 +900,689 @@ class Scheduler:
             self._handle_interrupt(logger)
 
         finally:
+            self._stop_loop()
             self._timer.stop()
             logger.debug(f'duration: {self._timer.duration:.2f}s')
+            self._save_history(logger)
+            self._evict_cache(logger)
 
             # build and return summary
             summary = self._build_summary()
             self._callback(self._on_scheduler_done, summary)
             return summary
 
+    def size_workers(self):
+        """ size the default pool from the CPUs the process may use and the width of the
+            graph, never more workers than tasks that can run at once; returns
+            (workers, reason)
+        """
+        workers, reason = auto_workers(self._graph.max_width(), self._backend)
+        if self._autoscaler:
+            self._workers = self._initial_workers = self._autoscaler.clamp(workers)
+        else:
+            self._workers = self._initial_workers = self._pool_size = workers
+        self._sized = (workers, reason)
+        return workers, reason
+
+    def _create_executor(self, logger):
+        """ return the pool the tasks run in, as chosen by the backend
+        """
+        if self._autoscaler:
+            logger.info(f'autoscaling between {self._autoscaler.minimum} and '
+                        f'{self._autoscaler.maximum} workers, starting at {self._workers}')
+        if self._backend == 'process':
+            logger.info(f'starting process pool with {self._pool_size} processes')
+            functions = [function for function, _ in self._callables.values()]
+            return create_executor(self._pool_size, task_modules(functions), self._start_method)
+        logger.info(f'starting thread pool with {self._pool_size} threads')
+        return ThreadPoolExecutor(max_workers=self._pool_size, thread_name_prefix=self._prefix,
+                                  initializer=CpuPinner() if self._pin_workers else None)
+
+    def _shutdown(self, executor):
+        """ shut down a pool created by start(), waiting for its tasks unless one timed
+            out or lost to its hedged copy and still runs: its thread or process is
+            left behind instead
+        """
+        with self._lock:
+            stragglers = any(self._runs[name] > 0 for name in self._settled)
+        if stragglers:
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown(wait=True)
+
+    def _open_executors(self, pools, logger):
+        """ collect the named executors used by registered tasks, creating the pools
+            given as specs on `pools` so they shut down with the run
+        """
+        self._pools = {}
+        self._capacity = {}
+        self._process_lanes = {None} if self._backend == 'process' else set()
+        used = {options['executor'] for options in self._options.values()}
+        for name, (kind, size, executor) in self._executor_specs.items():
+            if name not in used:
+                continue
+            logger.info(f'starting {kind} pool {name!r} with {size} workers')
+            if executor is None and kind == 'process':
+                functions = [function for task, (function, _) in self._callables.items()
+                             if self._options[task]['executor'] == name]
+                executor = create_executor(size, task_modules(functions), self._start_method)
+                pools.callback(self._shutdown, executor)
+            elif executor is None:
+                executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=name)
+                pools.callback(self._shutdown, executor)
+            if kind == 'process':
+                self._process_lanes.add(name)
+            self._pools[name] = executor
+            self._capacity[name] = size
+
+    def _lane_of(self, name):
+        """ return the ready-queue lane of a task: 'async' for coroutine tasks, the
+            executor name for tasks routed to a named executor, 'barrier' for barrier
+            nodes and None for tasks of the default pool
+        """
+        if name in self._coroutines:
+            return 'async'
+        options = self._options.get(name)
+        if options is None:
+            return 'barrier' if self._graph.is_barrier(name) else None
+        return options['executor']
+
+    def _start_loop(self, logger):
+        """ start the event loop that runs coroutine tasks on its own thread
+        """
+        logger.info(f'starting event loop for up to {self._async_workers} coroutines')
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name=f'{self._prefix}_async', daemon=True)
+        self._loop_thread.start()
+
+    def _stop_loop(self):
+        """ stop the coroutine event loop, cancelling whatever an interrupt left running
+        """
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        pending = asyncio.all_tasks(self._loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        self._loop.close()
+        self._loop = None
+        self._loop_thread = None
+
+    def _apply_policy(self, logger):
+        """ let the policy inspect the graph and order the ready queue by its key
+        """
+        logger.debug(f'ordering ready tasks with {type(self._policy).__name__}')
+        self._policy.prepare(self._graph, self._options, self._history)
+        self._graph.set_priority(self._policy.key)
+
+    def _save_history(self, logger):
+        """ record the durations and outcomes of this run into the history file, if one
+            is kept
+        """
+        if self._history is None:
+            return
+        for name, duration in self._durations.items():
+            if name in self._cache_hits:
+                # restored, not run
+                continue
+            self._history.record(name, duration)
+        failed = set(self._failed)
+        for name, result in self._results.items():
+            outcome = 'passed' if result['ok'] else 'failed' if name in failed else 'skipped'
+            self._history.record_outcome(name, outcome)
+        try:
+            self._history.save()
+        except OSError as exception:
+            logger.warning(f'unable to save history to {self._history.path!r}: {exception}')
+
     def _submit(self, name):
         """ submit a ready task to the thread pool and queue its start event
         """
-        logger = logging.getLogger(threading.current_thread().name)
-        logger.debug(f'submitting {name!r} to thread pool')
+        logger = get_thread_logger()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f'submitting {name!r} to thread pool')
 
-        # queue 'start' event
-        self._events.put(('start', name))
+        # queue 'start' event (only needed to fire the callback on the scheduler thread)
+        if self._on_task_start:
+            self._events.put(('start', name))
 
-        future = self._executor.submit(self._run, name)
-        logger.debug(f'adding {name} to active futures')
+        lane = self._lane_of(name) if self._capacity else None
+        if self._watched:
+            # before the launch: the run may begin, and look for its timers, right away
+            self._arm(name)
+        future = self._launch(name, lane)
+        if debug:
+            logger.debug(f'adding {name} to active futures')
         self._active.add(name)
+        if lane is not None:
+            self._running[lane] += 1
         with self._lock:
             # track future to name
             self._futures[future] = name
+            if self._watched:
+                self._copies.setdefault(name, []).append(future)
         future.add_done_callback(self._done)
 
+    def _launch(self, name, lane):
+        """ start task `name` in the pool of its lane and return its future
+        """
+        if lane == 'async':
+            return asyncio.run_coroutine_threadsafe(self._run_async(name), self._loop)
+        executor = self._executor if lane is None else self._pools[lane]
+        if lane in self._process_lanes:
+            key = self._cache_key(name) if self._caching else None
+            if key:
+                hit, _ = self._restore(name, key)
+                if hit:
+                    future = Future()
+                    future.set_result((name, True, None, None))
+                    if self._watched:
+                        # balances the run _arm counted for it
+                        self._returned(name)
+                    return future
+                self._keys[name] = key
+            function, with_state = self._callables[name]
+            state = None
+            if with_state:
+                with self.state_lock:
+                    state = snapshot(self.state)
+            return self._try_submit(executor, run_in_process, name, function,
+                                    with_state, state, self._store_results)
+        return self._try_submit(executor, self._work if self._worker_dispatch else self._run,
+                                name)
+
+    def _try_submit(self, executor, function, *args):
+        """ submit to `executor`; a pool that refuses work (a worker process died and
+            broke it, say) yields an already failed future so the task fails normally
+        """
+        try:
+            return executor.submit(function, *args)
+        except RuntimeError as exception:
+            future = Future()
+            future.set_exception(exception)
+            return future
+
     def _done(self, future):
         """ enqueue a 'done' event for a finished Future
             safely extracts the task result or synthesizes a failure if the Future raised
         """
+        with self._lock:
+            # cleanup no matter what
+            name = self._futures.pop(future, '<unknown>')
+        returned = False
         try:
             payload = future.result()
         except Exception as exception:
-            # worker failed before building payload - recover name and emit synthetic failure
-            name = self._futures.get(future, '<unknown>')
+            # worker failed before building payload - emit synthetic failure for its name
             payload = (name, False, type(exception).__name__, str(exception))
-        finally:
-            # cleanup no matter what
-            with self._lock:
-                self._futures.pop(future, '<unknown>')
+            returned = True
+
+        if payload is None:
+            # worker dispatch: the worker settled its tasks and queued their events
+            return
+        if self._watched:
+            # _run and _run_async count their own return; a process run, or a run that
+            # failed or was cancelled before either returned, is counted here
+            if returned or isinstance(payload, Outcome):
+                self._returned(payload[0])
+            if not self._claim(payload[0]):
+                # the task already timed out, or its hedged copy finished first
+                return
+        if isinstance(payload, Outcome):
+            payload = self._absorb(payload)
+        self._deliver(payload)
 
-        # queue 'done' event
-        self._events.put(('done', payload))
+    def _deliver(self, payload):
+        """ hand the result tuple of a finished task to whoever settles it
+        """
+        if self._worker_dispatch:
+            # coroutine task, or a worker that raised: settle it here
+            self._settle(payload, inline=False)
+        else:
+            # queue 'done' event
+            self._events.put(('done', payload))
+
+    def _absorb(self, outcome):
+        """ take in what a worker process sent back for a task: store its result,
+            merge its state changes and return its result tuple
+        """
+        name = outcome.name
+        if self._on_task_run:
+            self._events.put(('run', (name, outcome.worker)))
+        if not outcome.ok:
+            function, _ = self._callables[name]
+            get_thread_logger().error(
+                f"{getattr(function, '__name__', name)}: FAILED: "
+                f'{outcome.error_type}: {outcome.error}')
+        with self.state_lock:
+            if outcome.ok and self._store_results:
+                self.state['results'][name] = outcome.result
+            merge(self.state, outcome.updates, outcome.removed)
+        self._durations[name] = outcome.duration
+        key = self._keys.pop(name, None)
+        if key and outcome.ok:
+            self._remember(key, outcome.result)
+        return (name, outcome.ok, outcome.error_type, outcome.error)
+
+    def _work(self, name):
+        """ worker dispatch: run `name`, then keep running a dependent it released inline
+        """
+        while name is not None:
+            payload = self._run(name)
+            if self._watched and not self._claim(name):
+                # the task timed out, or its hedged copy finished first
+                return None
+            name = self._settle(payload)
+
+    @contextmanager
+    def _dispatching(self):
+        """ hold the dispatch lock, then settle any task deferred meanwhile by this thread
+        """
+        with self._dispatch_lock:
+            self._deferred.payloads = []
+            try:
+                yield
+            finally:
+                deferred, self._deferred.payloads = self._deferred.payloads, None
+        for payload in deferred:
+            self._settle(payload, inline=False)
+
+    def _settle(self, payload, inline=True):
+        """ worker dispatch: settle a finished task on the thread that ran it
+
+            Under the dispatch lock the task leaves the graph, the descendants of a
+            failed task are pruned when skip_dependents is set, and the tasks this
+            releases are launched. With `inline` the first of them is returned for
+            this worker to run next instead of going through the pool. Results and
+            callbacks are still handled by the scheduler thread from the events queued here.
+        """
+        name, ok, error_type, _ = payload
+        logger = get_thread_logger()
+        if getattr(self._deferred, 'payloads', None) is not None:
+            # a future finished while this thread was dispatching and ran its done
+            # callback right away; settle it once the dispatch lock is released
+            self._deferred.payloads.append(payload)
+            return None
+        with self._dispatching():
+            if not ok and self._retrying and self._retry(payload, logger):
+                # the slot of the failed attempt goes to another task meanwhile
+                if self._stopping.is_set():
+                    return None
+                lane = self._lane_of(name) if self._capacity else None
+                return self._maybe_schedule_next(logger, keep=inline, lane=lane)
+            if self._breaker and error_type != 'CircuitOpenError':
+                self._trip(name, ok, error_type, logger)
+            self._deactivate(name)
+            descendants = []
+            if not ok and self._skip_dependents:
+                # collect before remove() detaches the task from its dependents
+                descendants = self._graph.descendants_of(name)
+            self._graph.remove(name)
+            self._events.put(('done', payload))
+            if descendants:
+                self._graph.prune(descendants)
+                self._events.put(('skipped', (name, descendants)))
+            if self._limit_reached(ok, error_type):
+                # no worker starts a task from here on; the event loop records the rest
+                self._halted = True
+                self._events.put(('halted', None))
+            if self._stopping.is_set():
+                return None
+            lane = self._lane_of(name) if self._capacity else None
+            following = self._maybe_schedule_next(logger, keep=inline, lane=lane)
+            if (self._halted or self._graph.is_empty()) and not self._active:
+                self._events.put(('completed', None))
+        return following
 
     def _run(self, name):
         """ execute a task callable, capture errors, and return its result tuple
         """
-        thread = threading.current_thread().name
-        logger = logging.getLogger(thread)
+        started = self._begin(name, 'run')
+        try:
+            key, hit, result = self._lookup(name)
+            if not hit:
+                function, with_state = self._callables[name]
+                result = function(self.state) if with_state else function()
+            self._keep(name, key, hit, result)
+        except Exception as exception:
+            return self._end(name, started, exception)
+        return self._end(name, started)
 
-        # queue 'run' event
-        payload = (name, thread)
-        self._events.put(('run', payload))
+    async def _run_async(self, name):
+        """ await a coroutine task on the event loop, capture errors, and return its
+            result tuple (the coroutine counterpart of _run)
+        """
+        started = self._begin(name, 'await')
+        try:
+            key, hit, result = self._lookup(name)
+            if not hit:
+                function, with_state = self._callables[name]
+                result = await (function(self.state) if with_state else function())
+            self._keep(name, key, hit, result)
+        except Exception as exception:
+            return self._end(name, started, exception)
+        return self._end(name, started)
+
+    def _begin(self, name, verb):
+        """ announce that task `name` starts running on this thread and return the
+            time it started
+        """
+        # queue 'run' event (only needed to fire the callback on the scheduler thread)
+        if self._on_task_run:
+            self._events.put(('run', (name, threading.current_thread().name)))
+        if self._watched:
+            with self._lock:
+                attempt = self._armed.pop(name, None)
+            if attempt is not None:
+                self._set_timers(name, attempt)
+        logger = get_thread_logger()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'{verb} {name!r}')
+        return time.perf_counter()
+
+    def _lookup(self, name):
+        """ return (key, hit, result) for task `name` in the result cache; the key is
+            None when the task is not cached
+        """
+        key = self._cache_key(name) if self._caching else None
+        hit, result = self._restore(name, key) if key else (False, None)
+        return key, hit, result
 
-        logger.debug(f'run {name!r}')
-        ok = False
+    def _keep(self, name, key, hit, result):
+        """ store the result of a run of task `name` in the result cache and the state
+        """
+        if key and not hit:
+            self._remember(key, result)
+        # a copy finishing after its task settled leaves the stored result alone
+        if self._store_results and not (self._watched and name in self._settled):
+            with self.state_lock:
+                self.state['results'][name] = result
+
+    def _end(self, name, started, exception=None):
+        """ record the duration of a run of task `name` that started at `started`,
+            log the `exception` it failed with and return its result tuple
+        """
         error_type = None
         error = None
-        try:
-            function, with_state = self._callables[name]
-            if with_state:
-                result = function(self.state)
-            else:
-                result = function()
-
-            if self._store_results:
-                with self.state_lock:
-                    self.state['results'][name] = result
-            ok = True
-        except Exception as exception:
+        if exception is not None:
             error_type = type(exception).__name__
             error = str(exception)
-            logger.error(f'{function.__name__}: FAILED: {error_type}: {error}')
-        return (name, ok, error_type, error)
+            function = self._callables.get(name, (None, None))[0]
+            get_thread_logger().error(
+                f"{getattr(function, '__name__', name)}: FAILED: {error_type}: {error}")
+        self._durations[name] = time.perf_counter() - started
+        if self._watched:
+            self._returned(name)
+        return (name, exception is None, error_type, error)
+
+    def _watch(self, logger):
+        """ decide whether this run needs timers: when a task has a timeout or retries
+            or is idempotent; hedging reads the 95th percentile durations of the history
+        """
+        idempotent = any(options['idempotent'] for options in self._options.values())
+        self._retrying = any(options['retries'] for options in self._options.values())
+        self._watched = bool(self._timeout or idempotent or self._retrying or any(
+            options['timeout'] for options in self._options.values()))
+        if idempotent and self._history is None:
+            self._history = History(self._history_file)
+        if self._timeout:
+            logger.info(f'tasks time out after {self._timeout:g}s unless they set their own')
+
+    def _open_cache(self, logger):
+        """ decide whether this run uses the result cache: when a task has cache set,
+            unless the cache is turned off or results are not stored
+        """
+        cached = [name for name, options in self._options.items() if options['cache']]
+        self._caching = bool(cached and self._use_cache)
+        if not self._caching:
+            return
+        if not self._store_results:
+            logger.warning('the result cache needs store_results; not caching results')
+            self._caching = False
+            return
+        if self._cache is None:
+            self._cache = ResultCache(self._cache_dir)
+        self._codes = {name: code_digest(self._callables[name][0]) for name in cached}
+        logger.info(f'caching the results of {len(cached)} tasks in {self._cache.directory}')
+
+    def _cache_key(self, name):
+        """ return the cache key of task `name` from its code, the state it reads and
+            the results of its dependencies, or None if it is not cached
+        """
+        options = self._options[name]
+        if not options['cache']:
+            return None
+        after, after_tags = self._parents[name]
+        parents = set(after)
+        for tag in after_tags:
+            parents.update(self._tags[tag])
+        inputs = {}
+        with self.state_lock:
+            if self._callables[name][1]:
+                # cache=True reads the whole state, a list of keys only those keys
+                keys = options['cache'] if options['cache'] is not True else [
+                    key for key in self.state
+                    if key not in private_keys and not str(key).startswith('_')]
+                inputs = {key: self.state.get(key) for key in keys}
+            results = self.state['results']
+            parents = {parent: results.get(parent) for parent in parents}
+        return task_key(self._codes[name], inputs, parents)
+
+    def _restore(self, name, key):
+        """ look task `name` up in the cache under `key`, restoring a stored result
+            into the state; return (hit, result)
+        """
+        hit, result = self._cache.get(key)
+        if not hit:
+            self._cache_misses.add(name)
+            return False, None
+        get_thread_logger().info(f'{name} restored from the result cache')
+        self._cache_hits.add(name)
+        with self.state_lock:
+            self.state['results'][name] = result
+        return True, result
+
+    def _remember(self, key, result):
+        """ store the result of a cached task that ran under its `key`
+        """
+        try:
+            self._cache.put(key, result)
+        except OSError as exception:
+            get_thread_logger().warning(f'unable to store a result in {self._cache.directory!r}: '
+                                        f'{exception}')
+
+    def _evict_cache(self, logger):
+        """ trim the result cache to its size limit, if this run used it
+        """
+        if not self._caching:
+            return
+        try:
+            removed = self._cache.evict()
+        except OSError as exception:
+            logger.warning(f'unable to evict from {self._cache.directory!r}: {exception}')
+            return
+        if removed:
+            logger.debug(f'evicted {removed} least recently used results from the cache')
+
+    def _arm(self, name):
+        """ count the run of a task about to be launched; its timeout and hedge timers
+            are set when the run begins on a worker, or right away for a task run in
+            a worker process, which reports no start
+        """
+        with self._lock:
+            self._runs[name] += 1
+        self._starts[name] += 1
+        lane = self._lane_of(name) if self._capacity else None
+        if lane in self._process_lanes:
+            self._set_timers(name, self._starts[name])
+            return
+        with self._lock:
+            self._armed[name] = self._starts[name]
+
+    def _set_timers(self, name, attempt):
+        """ set the timeout and hedge timers of `attempt` of task `name`
+        """
+        options = self._options[name]
+        timeout = options['timeout'] or self._timeout
+        if timeout:
+            self._add_timer(timeout, 'timeout', name, attempt)
+        # a hedged copy would hold the task's resource tokens a second time
+        if options['idempotent'] and not options['resources'] and name not in self._hedged:
+            delay = self._history.percentile(name, 0.95, minimum=hedge_samples)
+            if delay is not None:
+                self._add_timer(delay, 'hedge', name, attempt)
+
+    def _add_timer(self, delay, action, name, attempt):
+        """ schedule `action` for task `name` in `delay` seconds, waking the scheduler
+            thread if it is now the earliest timer
+        """
+        entry = (time.monotonic() + delay, next(self._timer_sequence), action, name, attempt)
+        with self._timer_lock:
+            heapq.heappush(self._timers, entry)
+            earliest = self._timers[0] is entry
+        if earliest:
+            self._events.put(('wake', None))
+
+    def _wait_time(self):
+        """ return how long the scheduler thread may wait for an event: until the next
+            timer, and at most a second
+        """
+        with self._timer_lock:
+            if not self._timers:
+                return 1.0
+            return min(1.0, max(0.0, self._timers[0][0] - time.monotonic()))
+
+    def _fire_timers(self, logger):
+        """ run the actions of the timers that are due, skipping those of tasks that
+            settled or started again since
+        """
+        now = time.monotonic()
+        while True:
+            with self._timer_lock:
+                if not self._timers or self._timers[0][0] > now:
+                    return
+                _, _, action, name, attempt = heapq.heappop(self._timers)
+            if attempt != self._starts[name]:
+                continue
+            if action == 'retry':
+                self._resume(name, logger)
+                continue
+            with self._lock:
+                if name in self._settled:
+                    continue
+                if action == 'timeout':
+                    self._settled.add(name)
+                    futures = self._copies.pop(name, [])
+            if action == 'timeout':
+                self._expire(name, futures, logger)
+            elif action == 'hedge':
+                self._hedge(name, logger)
+
+    def _expire(self, name, futures, logger):
+        """ fail task `name` with TimeoutError; a running thread cannot be stopped, so
+            it is abandoned and whatever it returns is ignored
+        """
+        timeout = self._options[name]['timeout'] or self._timeout
+        error = f'timed out after {timeout:g}s'
+        logger.error(f'{name}: FAILED: TimeoutError: {error}')
+        self._abandon(name, futures)
+        self._deliver((name, False, 'TimeoutError', error))
+
+    def _abandon(self, name, futures):
+        """ cancel the runs of timed-out task `name` in `futures`; coroutines and runs
+            still waiting for a worker stop, but a thread running the task is left
+            behind, so its thread pool gets a thread in its place and the tasks queued
+            after it still start
+        """
+        # a run kept inline by a worker has no future of its own but holds a thread
+        held = max(1, sum(1 for future in futures if not future.cancel() and not future.done()))
+        lane = self._lane_of(name) if self._capacity else None
+        executor = self._executor if lane is None else self._pools.get(lane)
+        if isinstance(executor, ThreadPoolExecutor):
+            # the pool starts threads on submit, up to _max_workers
+            executor._max_workers += held
+
+    def _hedge(self, name, logger):
+        """ start a second copy of idempotent task `name` in the same pool
+        """
+        self._hedged.add(name)
+        logger.info(f'{name} is running past the 95th percentile of its recorded '
+                    f'durations; starting a hedged copy')
+        with self._lock:
+            self._runs[name] += 1
+        future = self._launch(name, self._lane_of(name) if self._capacity else None)
+        with self._lock:
+            self._futures[future] = name
+            self._copies.setdefault(name, []).append(future)
+        future.add_done_callback(self._done)
+
+    def _retry(self, payload, logger):
+        """ record a failed attempt of a task and, if it has retries left, free its
+            slot and set a 'retry' timer for the attempt after its backoff; returns
+            whether it will be retried
+
+            A TimeoutError is only retried for idempotent tasks, since the thread of
+            the timed-out attempt may still be running.
+        """
+        name, _, error_type, error = payload
+        options = self._options.get(name)
+        if (not options or not options['retries']
+                or error_type in ('DependencyError', 'CircuitOpenError')):
+            return False
+        errors = self._errors.setdefault(name, [])
+        errors.append({'error_type': error_type, 'error': error})
+        if (len(errors) > options['retries'] or self._stopping.is_set() or self._halted
+                or (error_type == 'TimeoutError' and not options['idempotent'])):
+            return False
+        delay = options['backoff'] * 2 ** (len(errors) - 1)
+        logger.warning(f'{name} failed attempt {len(errors)} of {options["retries"] + 1}: '
+                       f'{error_type}: {error}; retrying in {delay:g}s')
+        self._deactivate(name)
+        self._waiting.add(name)
+        # timers of the failed attempt no longer apply
+        self._starts[name] += 1
+        self._add_timer(delay, 'retry', name, self._starts[name])
+        return True
+
+    def _resume(self, name, logger):
+        """ put a task whose retry is due back on the ready queue and fill free slots
+        """
+        with self._dispatching():
+            if name not in self._waiting:
+                # cancelled by an interrupt meanwhile
+                return
+            self._waiting.discard(name)
+            with self._lock:
+                self._settled.discard(name)
+            logger.debug(f'retrying {name}')
+            self._graph.requeue(name)
+            if not self._stopping.is_set():
+                self._maybe_schedule_next(logger)
+
+    def _claim(self, name):
+        """ return whether this completion settles task `name`: only the first of its
+            completions (a timeout, the task or its hedged copy) does; copies of the
+            task still waiting for a worker are cancelled
+        """
+        with self._lock:
+            if name in self._settled:
+                return False
+            self._settled.add(name)
+            futures = self._copies.pop(name, [])
+        for future in futures:
+            future.cancel()
+        return True
+
+    def _returned(self, name):
+        """ count a run of watched task `name` as no longer in flight
+        """
+        with self._lock:
+            self._runs[name] -= 1
 
     def _callback(self, callback, *args):
         """ safely invoke a user callback, logging any exceptions raised
@@ -420,7 +1632,122 @@ class Scheduler:
         return self._graph
 
 
-def mark(*, after=None, with_state=True, tags=None):
+def _split_tags(tags):
+    """ return a list of tags from a comma-separated string or an iterable
+    """
+    if tags is None:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    return [t.strip() for t in tags if t.strip()]
+
+def _barrier_name(tag):
+    """ return the name of the barrier node standing in for all tasks tagged `tag`
+    """
+    return f'tag:{tag}'
+
+def _executor_spec(name, executor, workers):
+    """ return (kind, size, Executor or None) for an `executors` entry: an Executor
+        instance, or a 'thread[:size]' or 'process[:size]' spec of a pool to create
+    """
+    if name in ('async', 'barrier'):
+        raise ValueError(f'executor name {name!r} is reserved')
+    if isinstance(executor, Executor):
+        kind = 'process' if isinstance(executor, ProcessPoolExecutor) else 'thread'
+        return kind, getattr(executor, '_max_workers', None) or workers, executor
+    kind, _, size = str(executor).partition(':')
+    if kind not in ('thread', 'process') or (size and not size.isdigit()) or size == '0':
+        raise ValueError(f"executor {name!r} must be an Executor or a 'thread[:size]' or "
+                         f"'process[:size]' spec, not {executor!r}")
+    return kind, int(size) if size else workers, None
+
+
+def _resource_counts(owner, resources):
+    """ return `resources` as a validated `{resource: tokens}` dict; `owner` names the
+        Scheduler or task it belongs to in errors
+    """
+    resources = dict(resources or {})
+    for resource, tokens in resources.items():
+        if isinstance(tokens, bool) or not isinstance(tokens, int) or tokens < 1:
+            raise ValueError(f'{owner} resource {resource} must be a positive number of tokens')
+    return resources
+
+
+def _timeout_seconds(owner, timeout):
+    """ return `timeout` validated as a positive number of seconds or None; `owner`
+        names the Scheduler or task it belongs to in errors
+    """
+    if timeout is None:
+        return None
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+        raise ValueError(f'{owner} timeout must be a positive number of seconds')
+    return timeout
+
+
+def _cache_inputs(owner, cache):
+    """ validate the cache option of `owner`: False, True (the whole state) or a list
+        of the state keys its result depends on
+    """
+    if not cache:
+        return False
+    if cache is True:
+        return True
+    if isinstance(cache, str) or not all(isinstance(key, str) for key in cache):
+        raise ValueError(f'{owner} cache must be True or a list of state keys')
+    return list(cache)
+
+def _wrap(function):
+    """ return a transparent wrapper of `function`, itself a coroutine function if
+        `function` is one so the scheduler still recognizes it
+    """
+    if inspect.iscoroutinefunction(function):
+        @wraps(function)
+        async def wrapped(*args, **kwargs):
+            return await function(*args, **kwargs)
+    else:
+        @wraps(function)
+        def wrapped(*args, **kwargs):
+            return function(*args, **kwargs)
+    return wrapped
+
+
+def _task_record(name, obj, after, with_state, options=None):
+    """ normalize a register_many() record to (name, obj, after, with_state, options)
+    """
+    options = dict(options or {})
+    unknown = set(options) - {'tags', 'after_tags', 'priority', 'executor', 'resources',
+                              'timeout', 'idempotent', 'retries', 'backoff', 'cache'}
+    if unknown:
+        raise ValueError(f'{name} has unknown options {sorted(unknown)}')
+    priority = options.get('priority')
+    if priority is not None and (isinstance(priority, bool)
+                                 or not isinstance(priority, (int, float))):
+        raise ValueError(f'{name} priority must be a number')
+    options['priority'] = priority
+    executor = options.get('executor')
+    if executor is not None and not isinstance(executor, str):
+        raise ValueError(f'{name} executor must be the name of an executor')
+    options['executor'] = executor
+    options['resources'] = _resource_counts(name, options.get('resources'))
+    options['timeout'] = _timeout_seconds(name, options.get('timeout'))
+    options['idempotent'] = bool(options.get('idempotent'))
+    retries = options.get('retries') or 0
+    if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+        raise ValueError(f'{name} retries must be a number of retries')
+    options['retries'] = retries
+    backoff = options.get('backoff', 1.0)
+    if isinstance(backoff, bool) or not isinstance(backoff, (int, float)) or backoff < 0:
+        raise ValueError(f'{name} backoff must be a number of seconds')
+    options['backoff'] = backoff
+    options['cache'] = _cache_inputs(name, options.get('cache'))
+    options['tags'] = _split_tags(options.get('tags'))
+    options['after_tags'] = _split_tags(options.get('after_tags'))
+    return name, obj, list(after or []), with_state, options
+
+
+def mark(*, after=None, with_state=True, tags=None, after_tags=None, priority=None,
+         executor=None, resources=None, timeout=None, idempotent=False, retries=0,
+         backoff=1.0, cache=False):
     """ mark a function for deferred registration by a Scheduler
         does NOT register anything; only attaches metadata for discovery
     """
@@ -428,23 +1755,32 @@ def mark(*, after=None, with_state=True, tags=None):
 
     def decorator(function):
         # preserve wrapper metadata if function is further decorated later
-        @wraps(function)
-        def wrapped(*args, **kwargs):
-            return function(*args, **kwargs)
+        wrapped = _wrap(function)
 
         # attach metadata to the function object
         wrapped.__threaded_order__ = {
             'after': deps,
             'with_state': with_state,
             'orig_name': function.__name__,
-            'tags': [] if tags is None else [t.strip() for t in tags.split(',') if t.strip()],
+            'tags': _split_tags(tags),
+            'after_tags': _split_tags(after_tags),
+            'priority': priority,
+            'executor': executor,
+            'resources': dict(resources or {}),
+            'timeout': timeout,
+            'idempotent': idempotent,
+            'retries': retries,
+            'backoff': backoff,
+            'cache': cache,
         }
         return wrapped
 
     return decorator
 
 
-def dmark(*, after=None, with_state=False, tags=None):
+def dmark(*, after=None, with_state=False, tags=None, after_tags=None, priority=None,
+          executor=None, resources=None, timeout=None, idempotent=False, retries=0,
+          backoff=1.0, cache=False):
     """ mark a function for deferred registration by a Scheduler
         does NOT register anything; only attaches metadata for discovery
     """
@@ -452,16 +1788,23 @@ def dmark(*, after=None, with_state=False, tags=None):
 
     def decorator(function):
         # preserve wrapper metadata if function is further decorated later
-        @wraps(function)
-        def wrapped(*args, **kwargs):
-            return function(*args, **kwargs)
+        wrapped = _wrap(function)
 
         # attach metadata to the function object
         wrapped.__threaded_order__ = {
             'after': deps,
             'with_state': with_state,
             'orig_name': function.__name__,
-            'tags': [] if tags is None else [t.strip() for t in tags.split(',') if t.strip()],
+            'tags': _split_tags(tags),
+            'after_tags': _split_tags(after_tags),
+            'priority': priority,
+            'executor': executor,
+            'resources': dict(resources or {}),
+            'timeout': timeout,
+            'idempotent': idempotent,
+            'retries': retries,
+            'backoff': backoff,
+            'cache': cache,
         }
         return wrapped
 